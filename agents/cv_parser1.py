@@ -1,14 +1,65 @@
 # Change this line:
 import re
-import ollama
-from db.database import store_candidate_profile
+import threading
+import dataclasses
+from config import Config
+from utils.llm_connector import chat, route_model, CircuitOpenError
+from utils import metrics
+from utils.near_duplicate import MinHashIndex
+from utils.sections import RESUME_SECTIONS, prompt_text
+from utils.skills import SKILLS
+from utils.document_processor import extract_text_from_file
+from db.database import (store_candidate_profile, store_resume_signature, get_candidate_profiles,
+                         get_candidate_details, iter_resume_signatures)
+from db.models import Candidate
+
+# Patterns of the basic extractor, compiled once per process
+_NAME = re.compile(r'^([A-Z][a-z]+(?:\s+[A-Z][a-z]+){1,3})')
+_EMAIL = re.compile(r'[\w\.-]+@[\w\.-]+\.\w+')
+_PHONE = re.compile(r'(?:\+\d{1,2}\s?)?\(?\d{3}\)?[\s.-]?\d{3}[\s.-]?\d{4}')
+_SKILL_ITEM = re.compile(r'(?:•|\*|\-|\,|\n)\s*([A-Za-z0-9+#]+(?:\s+[A-Za-z0-9+#]+){0,3})')
+_COMPANY = re.compile(r'(?:^|\n)([A-Z][A-Za-z\s,\.]+?(?:Inc|LLC|Ltd|Corp|Corporation|Company)?)\s*(?:,|\n|$)')
+_DATE_RANGE = re.compile(r'\b((?:19|20)\d{2}(?:[-/]\d{2})?)\s*(?:-|–|to)\s*((?:19|20)\d{2}(?:[-/]\d{2})?|present|current)\b',
+                         re.IGNORECASE)
+_DEGREE = re.compile(r'(?:Bachelor|Master|PhD|MBA|BS|MS|BA|MD|JD)[^\n,]+(?: of | in )[^\n,]+')
+_INSTITUTION = re.compile(r'(?:University|College|Institute|School) of [A-Za-z\s]+')
+
+def same_contact(candidate, cv_text):
+    """Whether a resume gives the email address or phone number of a stored Candidate"""
+    if candidate.email and candidate.email.lower() in (match.lower() for match in _EMAIL.findall(cv_text)):
+        return True
+    phone = _phone_digits(candidate.phone)
+    return bool(phone) and phone in (_phone_digits(match) for match in _PHONE.findall(cv_text))
+
+def _phone_digits(phone):
+    """Last ten digits of a phone number, so formatting and country codes do not matter"""
+    digits = re.sub(r'\D', '', phone or '')
+    return digits[-10:] if len(digits) >= 7 else ''
+
+def load_duplicate_index(threshold):
+    """Build the near-duplicate resume index from stored signatures (None when disabled)"""
+    if threshold <= 0:
+        return None
+    
+    duplicate_index = MinHashIndex(threshold=threshold)
+    duplicate_index.add_many(iter_resume_signatures())
+    return duplicate_index
 
 class CVParser:
-    def __init__(self, model_name="mistral"):
+    def __init__(self, model_name=Config.DEFAULT_MODEL, writer=None, duplicate_index=None, use_llm=True,
+                 skill_matcher=None):
         self.model_name = model_name
+        self.writer = writer  # Optional WriteBehindWriter for non-blocking persistence
+        self.duplicate_index = duplicate_index  # Optional MinHashIndex of known resumes
+        self.use_llm = use_llm  # False parses every resume with the basic extractor (bulk screening)
+        self.skill_matcher = skill_matcher  # Optional utils.skills.SkillMatcher for the basic extractor
+        self._index_lock = threading.Lock()  # Resumes may be parsed and stored from several threads
         
     def extract_profile(self, cv_text):
         """Extract candidate profile from CV text"""
+        if not self.use_llm:
+            return self._basic_profile_extraction(cv_text)
+        
         prompt = f"""
         Extract the following information from this resume:
         1. Candidate name
@@ -46,28 +97,30 @@ class CVParser:
         }}
         
         Here is the resume:
-        {cv_text}
+        {prompt_text(cv_text, RESUME_SECTIONS, "cv", "cv_parser")}
         """
         
+        model_name = route_model("cv", prompt, self.model_name)
         try:
-            response = ollama.chat(
-                model=self.model_name,
-                messages=[{"role": "user", "content": prompt}]
-            )
-            
-            output = response["message"]["content"]
+            output = chat(prompt, model_name, task="cv")
             
             # Parse the response to extract structured data
-            structured_profile = self._parse_profile(output)
+            structured_profile = self._parse_profile(output, model_name)
             return structured_profile
             
+        except CircuitOpenError:
+            # The LLM is failing; skip it without waiting for another error
+            metrics.increment("llm_parse_total", agent="cv_parser", model=model_name, outcome="circuit_open")
+            return self._basic_profile_extraction(cv_text)
         except Exception as e:
             print(f"Error extracting profile from CV: {e}")
+            metrics.increment("llm_parse_total", agent="cv_parser", model=model_name, outcome="basic_fallback")
             # Fallback to basic extraction if LLM fails
             return self._basic_profile_extraction(cv_text)
     
-    def _parse_profile(self, llm_response):
+    def _parse_profile(self, llm_response, model_name=None):
         """Parse LLM response into structured format"""
+        model_name = model_name or self.model_name
         # Extract JSON block from response if present
         json_match = re.search(r'```(?:json)?\s*(.*?)\s*```', llm_response, re.DOTALL)
         if json_match:
@@ -100,10 +153,12 @@ class CVParser:
             if "education" not in data:
                 data["education"] = []
                 
+            metrics.increment("llm_parse_total", agent="cv_parser", model=model_name, outcome="json")
             return data
             
         except Exception as e:
             print(f"Error parsing LLM response as JSON: {e}")
+            metrics.increment("llm_parse_total", agent="cv_parser", model=model_name, outcome="regex_fallback")
             # If JSON parsing fails, create a minimal profile with available data
             return {
                 "name": self._extract_name(llm_response) or "Unknown",
@@ -119,57 +174,62 @@ class CVParser:
     def _basic_profile_extraction(self, cv_text):
         """Basic extraction of profile information without using LLM"""
         # Extract name (usually at the beginning of a resume)
-        name_match = re.search(r'^([A-Z][a-z]+(?:\s+[A-Z][a-z]+){1,3})', cv_text)
+        name_match = _NAME.search(cv_text)
         name = name_match.group(1) if name_match else "Unknown"
         
         # Extract email
-        email_match = re.search(r'[\w\.-]+@[\w\.-]+\.\w+', cv_text)
+        email_match = _EMAIL.search(cv_text)
         email = email_match.group(0) if email_match else ""
         
         # Extract phone
-        phone_match = re.search(r'(?:\+\d{1,2}\s?)?\(?\d{3}\)?[\s.-]?\d{3}[\s.-]?\d{4}', cv_text)
+        phone_match = _PHONE.search(cv_text)
         phone = phone_match.group(0) if phone_match else ""
         
+        # Split the resume into its sections in one pass
+        sections = RESUME_SECTIONS.split(cv_text)
+        
         # Extract skills (look for "Skills" section and extract words)
-        skills_section = re.search(r'(?:Skills|Proficiencies|Abilities)(?::|\.)(.*?)(?:Education|Experience|Reference|$)', 
-                                  cv_text, re.IGNORECASE | re.DOTALL)
+        skills_text = RESUME_SECTIONS.section_text(cv_text, "skills", sections=sections)
         
         skills = []
-        if skills_section:
-            skills_text = skills_section.group(1)
+        if skills_text is not None:
             # Extract skills from bullet points, comma-separated lists, etc.
-            skills = re.findall(r'(?:•|\*|\-|\,|\n)\s*([A-Za-z0-9+#]+(?:\s+[A-Za-z0-9+#]+){0,3})', skills_text)
+            skills = _SKILL_ITEM.findall(skills_text)
             skills = [s.strip() for s in skills if len(s.strip()) > 2]
         
+        if self.skill_matcher is not None:
+            # Known skills anywhere after the contact details, under their canonical names,
+            # then the listed skills the dictionary does not know
+            skills = self.skill_matcher.extract(cv_text[sections[0].end:] or cv_text, skills)
+        
         # Extract experience (basic - just company names and titles)
         experience = []
-        exp_section = re.search(r'(?:Experience|Work Experience|Employment)(?::|\.)(.*?)(?:Education|Skills|References|$)', 
-                               cv_text, re.IGNORECASE | re.DOTALL)
+        exp_text = RESUME_SECTIONS.section_text(cv_text, "experience", sections=sections)
         
-        if exp_section:
-            exp_text = exp_section.group(1)
+        if exp_text is not None:
             # Look for company names (often in ALL CAPS or bold)
-            companies = re.findall(r'(?:^|\n)([A-Z][A-Za-z\s,\.]+?(?:Inc|LLC|Ltd|Corp|Corporation|Company)?)\s*(?:,|\n|$)', exp_text)
+            companies = _COMPANY.findall(exp_text)
+            # Date ranges ("2019-04 - 2023-10", "2021 to present"), taken to be in the same order
+            dates = _DATE_RANGE.findall(exp_text)
             
             for i, company in enumerate(companies[:3]):  # Limit to 3 most recent
+                start_date, end_date = dates[i] if i < len(dates) else ("", "")
                 experience.append({
                     "company": company.strip(),
                     "title": "Position " + str(i+1),
-                    "start_date": "",
-                    "end_date": "",
+                    "start_date": start_date,
+                    "end_date": "present" if end_date[:1].isalpha() else end_date,
                     "description": ""
                 })
         
         # Extract education (basic - just degree and institution)
         education = []
-        edu_section = re.search(r'(?:Education|Academic Background|Qualifications)(?::|\.)(.*?)(?:Experience|Skills|References|$)', 
-                               cv_text, re.IGNORECASE | re.DOTALL)
+        edu_text = RESUME_SECTIONS.section_text(cv_text, "education", sections=sections)
         
-        if edu_section:
-            edu_text = edu_section.group(1)
+        if edu_text is not None:
             # Look for degree names and institutions
-            degrees = re.findall(r'(?:Bachelor|Master|PhD|MBA|BS|MS|BA|MD|JD)[^\n,]+(?: of | in )[^\n,]+', edu_text)
-            institutions = re.findall(r'(?:University|College|Institute|School) of [A-Za-z\s]+', edu_text)
+            degrees = _DEGREE.findall(edu_text)
+            institutions = _INSTITUTION.findall(edu_text)
             
             if degrees:
                 education.append({
@@ -212,8 +272,103 @@ class CVParser:
             return re.findall(r'"([^"]+)"', skills_text)
         return []
     
-    def process_cv(self, candidate_id, cv_text):
-        """Process a CV and store profile in the database"""
-        profile = self.extract_profile(cv_text)
-        store_candidate_profile(candidate_id, profile)
-        return profile
\ No newline at end of file
+    def find_near_duplicate(self, cv_text):
+        """Find a known resume that is a near-duplicate of this one
+        
+        Returns (signature, duplicate) where duplicate is a (candidate_id,
+        similarity) pair or None.
+        """
+        if self.duplicate_index is None:
+            return None, None
+        
+        signature = self.duplicate_index.signature(cv_text)
+        with self._index_lock:
+            return signature, self.duplicate_index.query(signature)
+    
+    def _load_candidate(self, candidate_id):
+        """Load a stored Candidate, waiting for pending background writes first"""
+        if self.writer:
+            self.writer.flush()
+        
+        candidate = get_candidate_profiles(candidate_id).get(candidate_id)
+        if candidate is not None:
+            # Include experience descriptions, which compact storage keeps in a separate column
+            candidate.experience = get_candidate_details(candidate_id)["experience"]
+        return candidate
+    
+    def parse_cv(self, candidate_id, cv_text):
+        """Parse a CV into a Candidate without storing it
+        
+        Returns (candidate, duplicate_of, signature). Near-duplicates of an
+        already parsed resume reuse its profile instead of calling the LLM
+        again; duplicate_of is then the ID of the original candidate.
+        """
+        with metrics.timer("agent_seconds", agent="cv_parser", operation="parse"):
+            return self._parse_cv(candidate_id, cv_text)
+    
+    def _parse_cv(self, candidate_id, cv_text):
+        signature, duplicate = self.find_near_duplicate(cv_text)
+        
+        if duplicate:
+            duplicate_of, similarity = duplicate
+            original = self._load_candidate(duplicate_of)
+            # Resumes built from the same template are near-duplicates too, so the
+            # profile is only reused for a resume with the same contact details
+            if original is not None and same_contact(original, cv_text):
+                print(f"  → Near-duplicate of {duplicate_of} ({similarity*100:.0f}% similar), reusing its profile")
+                candidate = dataclasses.replace(original, candidate_id=candidate_id, resume_text=cv_text)
+                return candidate, duplicate_of, signature
+            if original is not None:
+                print(f"  → Near-duplicate of {duplicate_of} ({similarity*100:.0f}% similar) with other contact details, parsing it")
+        
+        candidate = Candidate.from_profile(candidate_id, self.extract_profile(cv_text), cv_text)
+        return candidate, None, signature
+    
+    def store_cv(self, candidate, content_hash=None, duplicate_of=None, signature=None):
+        """Store a parsed Candidate and index its resume for near-duplicate detection"""
+        if self.writer:
+            self.writer.submit("candidates", candidate, content_hash, duplicate_of)
+        else:
+            store_candidate_profile(candidate, content_hash, duplicate_of)
+        
+        # Only original resumes are indexed, so duplicates always link to the first copy
+        if duplicate_of is None and signature is not None:
+            with self._index_lock:
+                self.duplicate_index.add(candidate.candidate_id, signature)
+            if self.writer:
+                self.writer.submit("resume_signatures", candidate.candidate_id, signature)
+            else:
+                store_resume_signature(candidate.candidate_id, signature)
+        
+        return candidate
+    
+    def process_cv(self, candidate_id, cv_text, content_hash=None):
+        """Process a CV and store the resulting Candidate in the database"""
+        candidate, duplicate_of, signature = self.parse_cv(candidate_id, cv_text)
+        return self.store_cv(candidate, content_hash, duplicate_of, signature)
+
+_bulk_parser = None
+
+def parse_resumes_without_llm(tasks):
+    """Extract and parse a chunk of (candidate_id, file_path) tasks with the basic extractor and the skill dictionary
+    
+    Module-level so bulk screening can run it in worker processes; a chunk
+    per call spreads the cost of passing work between processes over many
+    resumes. Returns (candidates, failures), failures being (candidate_id,
+    error message) pairs of the files that could not be read.
+    """
+    global _bulk_parser
+    if _bulk_parser is None:
+        _bulk_parser = CVParser(use_llm=False, skill_matcher=SKILLS)
+    
+    candidates = []
+    failures = []
+    for candidate_id, file_path in tasks:
+        try:
+            cv_text = extract_text_from_file(file_path)
+            with metrics.timer("agent_seconds", agent="cv_parser", operation="parse"):
+                profile = _bulk_parser.extract_profile(cv_text)
+            candidates.append(Candidate.from_profile(candidate_id, profile, cv_text))
+        except Exception as e:
+            failures.append((candidate_id, f"{type(e).__name__}: {e}"))
+    return candidates, failures
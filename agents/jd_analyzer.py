@@ -1,13 +1,31 @@
 import re
-import ollama
+import dataclasses
+from config import Config
+from utils.llm_connector import chat, route_model, CircuitOpenError
+from utils import metrics
+from utils.sections import JOB_SECTIONS, prompt_text
 from db.database import store_job_requirements
+from db.models import JobRequirements
+
+# Patterns of the basic extractor, compiled once per process
+_SKILL_ITEM = re.compile(r'(?:•|\*|\-|\d+\.)\s*([A-Za-z0-9+#\s]+)(?:\s*\([^)]+\))?')
+_EXPERIENCE = re.compile(r'(\d+\+?)\s*(?:-\s*\d+)?\s*years?(?:\s+of)?\s+experience', re.IGNORECASE)
+_EDUCATION = re.compile(r'(?:Bachelor|Master|PhD|Degree|BS|MS|BA|MBA)[\'\s]+(?:degree\s+)?(?:in|of|with)?[\s\']+([^,.]+)',
+                        re.IGNORECASE)
+_RESPONSIBILITY = re.compile(r'(?:•|\*|\-|\d+\.)\s*([A-Za-z][^•\*\-\d\.]+)')
 
 class JDAnalyzer:
-    def __init__(self, model_name="mistral"):
+    def __init__(self, model_name=Config.DEFAULT_MODEL, writer=None, use_llm=True, skill_matcher=None):
         self.model_name = model_name
+        self.writer = writer  # Optional WriteBehindWriter for non-blocking persistence
+        self.use_llm = use_llm  # False analyzes every description with the basic extractor (bulk screening)
+        self.skill_matcher = skill_matcher  # Optional utils.skills.SkillMatcher for the basic extractor
         
     def extract_requirements(self, job_description):
         """Extract key requirements from job description text"""
+        if not self.use_llm:
+            return self._basic_requirements_extraction(job_description)
+        
         prompt = f"""
         Extract the following information from this job description:
         1. Required skills (list all technical and soft skills)
@@ -22,28 +40,30 @@ class JDAnalyzer:
         "responsibilities": [list of key responsibilities]
         
         Here is the job description:
-        {job_description}
+        {prompt_text(job_description, JOB_SECTIONS, "jd", "jd_analyzer")}
         """
         
+        model_name = route_model("jd", prompt, self.model_name)
         try:
-            response = ollama.chat(
-                model=self.model_name,
-                messages=[{"role": "user", "content": prompt}]
-            )
-            
-            output = response["message"]["content"]
+            output = chat(prompt, model_name, task="jd")
             
             # Parse the response to extract structured data
-            structured_requirements = self._parse_requirements(output)
+            structured_requirements = self._parse_requirements(output, model_name)
             return structured_requirements
             
+        except CircuitOpenError:
+            # The LLM is failing; skip it without waiting for another error
+            metrics.increment("llm_parse_total", agent="jd_analyzer", model=model_name, outcome="circuit_open")
+            return self._basic_requirements_extraction(job_description)
         except Exception as e:
             print(f"Error extracting requirements from job description: {e}")
+            metrics.increment("llm_parse_total", agent="jd_analyzer", model=model_name, outcome="basic_fallback")
             # Fallback to basic extraction if LLM fails
             return self._basic_requirements_extraction(job_description)
     
-    def _parse_requirements(self, llm_response):
+    def _parse_requirements(self, llm_response, model_name=None):
         """Parse LLM response into structured format"""
+        model_name = model_name or self.model_name
         # Extract JSON block from response if present
         json_match = re.search(r'```json\s*(.*?)\s*```', llm_response, re.DOTALL)
         if json_match:
@@ -60,8 +80,10 @@ class JDAnalyzer:
             for key in required_keys:
                 if key not in data:
                     data[key] = [] if key in ["skills", "responsibilities"] else ""
+            metrics.increment("llm_parse_total", agent="jd_analyzer", model=model_name, outcome="json")
             return data
         except:
+            metrics.increment("llm_parse_total", agent="jd_analyzer", model=model_name, outcome="regex_fallback")
             # If JSON parsing fails, try to extract requirements manually
             skills = re.findall(r'"skills":\s*\[(.*?)\]', json_str, re.DOTALL)
             skills_list = re.findall(r'"([^"]+)"', skills[0]) if skills else []
@@ -84,32 +106,30 @@ class JDAnalyzer:
     
     def _basic_requirements_extraction(self, job_description):
         """Basic extraction of requirements without using LLM"""
-        # Simple regex-based extraction as backup
-        skills_section = re.search(r'(?:Requirements|Skills|Qualifications):(.*?)(?:Responsibilities|About Us|Benefits|$)', 
-                                  job_description, re.IGNORECASE | re.DOTALL)
-        
-        skills_text = skills_section.group(1) if skills_section else job_description
+        # Simple regex-based extraction as backup, over the sections found in one pass
+        sections = JOB_SECTIONS.split(job_description)
+        skills_text = JOB_SECTIONS.section_text(job_description, "requirements", sections=sections)
+        if skills_text is None:
+            skills_text = job_description
         
         # Extract skills using bullet points or common formats
-        skills = re.findall(r'(?:•|\*|\-|\d+\.)\s*([A-Za-z0-9+#\s]+)(?:\s*\([^)]+\))?', skills_text)
+        skills = _SKILL_ITEM.findall(skills_text)
         skills = [s.strip() for s in skills if len(s.strip()) > 2]
+        if self.skill_matcher is not None:
+            # Known skills under their canonical names first, then the listed ones the dictionary does not know
+            skills = self.skill_matcher.extract(skills_text, skills)
         
         # Try to extract years of experience
-        experience = re.search(r'(\d+\+?)\s*(?:-\s*\d+)?\s*years?(?:\s+of)?\s+experience', 
-                              job_description, re.IGNORECASE)
+        experience = _EXPERIENCE.search(job_description)
         experience_text = f"{experience.group(1)} years" if experience else ""
         
         # Try to extract education
-        education = re.search(r'(?:Bachelor|Master|PhD|Degree|BS|MS|BA|MBA)[\'\s]+(?:degree\s+)?(?:in|of|with)?[\s\']+([^,.]+)', 
-                             job_description, re.IGNORECASE)
+        education = _EDUCATION.search(job_description)
         education_text = education.group(0) if education else ""
         
         # Try to extract responsibilities
-        resp_section = re.search(r'(?:Responsibilities|Duties|You will):(.*?)(?:Requirements|Qualifications|Skills|About Us|Benefits|$)', 
-                                job_description, re.IGNORECASE | re.DOTALL)
-        
-        resp_text = resp_section.group(1) if resp_section else ""
-        responsibilities = re.findall(r'(?:•|\*|\-|\d+\.)\s*([A-Za-z][^•\*\-\d\.]+)', resp_text)
+        resp_text = JOB_SECTIONS.section_text(job_description, "responsibilities", sections=sections) or ""
+        responsibilities = _RESPONSIBILITY.findall(resp_text)
         responsibilities = [r.strip() for r in responsibilities if len(r.strip()) > 10]
         
         return {
@@ -120,7 +140,20 @@ class JDAnalyzer:
         }
     
     def process_job(self, job_id, job_description):
-        """Process a job and store requirements in the database"""
-        requirements = self.extract_requirements(job_description)
-        store_job_requirements(job_id, requirements)
-        return requirements
\ No newline at end of file
+        """Process a job and store its JobRequirements in the database"""
+        with metrics.timer("agent_seconds", agent="jd_analyzer", operation="analyze"):
+            requirements = JobRequirements.from_dict(job_id, self.extract_requirements(job_description))
+        if self.writer:
+            self.writer.submit("job_requirements", requirements)
+        else:
+            store_job_requirements(requirements)
+        return requirements
+    
+    def reuse_requirements(self, job_id, requirements):
+        """Store a copy of another job's JobRequirements for a job with the same description"""
+        requirements = dataclasses.replace(requirements, job_id=job_id)
+        if self.writer:
+            self.writer.submit("job_requirements", requirements)
+        else:
+            store_job_requirements(requirements)
+        return requirements
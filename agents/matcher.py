@@ -1,10 +1,23 @@
-from db.database import get_job_requirements, get_candidate_profiles, store_match_results
-import datetime
+from config import Config
+from utils import metrics
+from db.database import get_job_requirements, iter_candidate_profiles, store_match_results, CANDIDATE_PAGE_SIZE
+from db.models import MatchResult, EDUCATION_LEVELS
+from db.columnar import NO_EDUCATION
+import heapq
 import re
 
 class MatchingEngine:
-    def __init__(self, threshold=70.0):
+    # Weighted average - adjust weights based on job requirements
+    # Skills are typically most important, followed by experience and education
+    WEIGHTS = Config.WEIGHTS
+    
+    def __init__(self, threshold=Config.DEFAULT_THRESHOLD, top_k=None, page_size=CANDIDATE_PAGE_SIZE, writer=None, candidate_store=None):
         self.threshold = threshold
+        self.top_k = _check_top_k(top_k)  # Keep only the best K results in memory (None keeps all)
+        self.page_size = page_size
+        self.writer = writer  # Optional WriteBehindWriter for non-blocking persistence
+        self.candidate_store = candidate_store  # Optional ColumnarCandidateStore to score from
+        self.last_match_stats = {"matched": 0, "shortlisted": 0}
         
     def calculate_skills_match(self, required_skills, candidate_skills):
         """Calculate match score for skills"""
@@ -36,8 +49,12 @@ class MatchingEngine:
             return 100.0  # If no clear requirement or couldn't parse, give full score
             
         # Calculate total years from candidate experience
-        candidate_years = sum(self._calculate_experience_duration(exp) for exp in candidate_experience)
+        candidate_years = sum(exp.duration_years() for exp in candidate_experience)
         
+        return self.score_experience_years(required_years, candidate_years)
+    
+    def score_experience_years(self, required_years, candidate_years):
+        """Score a candidate's total years against the required years (> 0)"""
         if candidate_years >= required_years:
             return 100.0
         elif candidate_years >= (required_years * 0.7):
@@ -53,38 +70,23 @@ class MatchingEngine:
         """Calculate match score for education"""
         if not required_education or not candidate_education:
             return 50.0  # Neutral score if either is missing
-            
-        education_levels = {
-            "high school": 1,
-            "associate": 2, 
-            "bachelor": 3,
-            "master": 4,
-            "phd": 5,
-            "doctorate": 5
-        }
-        
-        # Determine required education level
-        required_level = 0
-        for level, value in education_levels.items():
+        
+        # Find highest education level of candidate
+        candidate_level = max(education.level() for education in candidate_education)
+        
+        return self.score_education_level(self._required_education_level(required_education), candidate_level)
+    
+    def _required_education_level(self, required_education):
+        """Determine the education level a requirement text asks for"""
+        for level, value in EDUCATION_LEVELS.items():
             if level in required_education.lower():
-                required_level = value
-                break
+                return value
                 
         # If no specific level found but education is required, assume bachelor's
-        if required_level == 0 and required_education:
-            required_level = 3
-                
-        # Find highest education level of candidate
-        candidate_level = 0
-        for education in candidate_education:
-            degree_lower = education["degree"].lower() if "degree" in education else ""
-            
-            # Check each education level
-            for level, value in education_levels.items():
-                if level in degree_lower and value > candidate_level:
-                    candidate_level = value
-        
-        # Score based on comparison of education levels
+        return 3
+    
+    def score_education_level(self, required_level, candidate_level):
+        """Score a candidate's highest education level against the required level"""
         if candidate_level >= required_level:
             return 100.0
         elif candidate_level == required_level - 1:
@@ -96,26 +98,24 @@ class MatchingEngine:
         else:
             return 0.0
     
-    def calculate_overall_match(self, job_requirements, candidate_profile, candidate_id):
-        """Calculate overall match score"""
+    def calculate_overall_match(self, job_requirements, candidate):
+        """Calculate overall match score of a Candidate against JobRequirements"""
         skills_score = self.calculate_skills_match(
-            job_requirements["skills"], 
-            candidate_profile["skills"]
+            job_requirements.skills, 
+            candidate.skills
         )
         
         experience_score = self.calculate_experience_match(
-            job_requirements["experience"], 
-            candidate_profile["experience"]
+            job_requirements.experience, 
+            candidate.experience
         )
         
         education_score = self.calculate_education_match(
-            job_requirements["education"], 
-            candidate_profile["education"]
+            job_requirements.education, 
+            candidate.education
         )
         
-        # Weighted average - adjust weights based on job requirements
-        # Skills are typically most important, followed by experience and education
-        weights = {"skills": 0.5, "experience": 0.3, "education": 0.2}
+        weights = self.WEIGHTS
         
         overall_score = (
             (skills_score * weights["skills"]) + 
@@ -123,15 +123,16 @@ class MatchingEngine:
             (education_score * weights["education"])
         )
         
-        return {
-            "candidate_id": candidate_id,
-            "candidate_name": candidate_profile["name"],
-            "skills_score": skills_score,
-            "experience_score": experience_score,
-            "education_score": education_score,
-            "overall_score": overall_score,
-            "shortlisted": overall_score >= self.threshold
-        }
+        return MatchResult(
+            job_requirements.job_id,
+            candidate.candidate_id,
+            candidate.name,
+            skills_score,
+            experience_score,
+            education_score,
+            overall_score,
+            overall_score >= self.threshold
+        )
     
     def _parse_years_experience(self, experience_text):
         """Parse years of experience from text like '3+ years' or '2-4 years'"""
@@ -160,77 +161,127 @@ class MatchingEngine:
         # If no pattern matches, default to 0
         return 0
     
-    def _calculate_experience_duration(self, experience):
-        """Calculate duration of a work experience in years"""
-        if not experience:
-            return 0
-            
-        if not isinstance(experience, dict):
-            return 0
-            
-        if "start_date" not in experience or "end_date" not in experience:
-            return 0
-            
-        start_date = experience["start_date"]
-        end_date = experience["end_date"]
+    def _iter_store_matches(self, job_requirements, candidate_ids):
+        """Score candidates from the columnar store, scanning its arrays"""
+        store = self.candidate_store
         
-        # Handle cases where dates might be empty
-        if not start_date:
-            return 0
-            
-        # Parse start year
-        start_year_match = re.search(r'(\d{4})', str(start_date))
-        if not start_year_match:
-            return 0
-            
-        start_year = int(start_year_match.group(1))
+        # Resolve each required skill against the skill vocabulary once per job:
+        # skill ID -> bitmask of required skills it matches exactly / partially
+        exact_masks = {}
+        partial_masks = {}
+        for bit, req_skill in enumerate(job_requirements.skills):
+            req_skill_lower = req_skill.lower()
+            for skill_id, skill_lower in enumerate(store.skill_names_lower):
+                if skill_lower == req_skill_lower:
+                    exact_masks[skill_id] = exact_masks.get(skill_id, 0) | (1 << bit)
+                elif req_skill_lower in skill_lower or skill_lower in req_skill_lower:
+                    partial_masks[skill_id] = partial_masks.get(skill_id, 0) | (1 << bit)
+        num_required = len(job_requirements.skills)
         
-        # Parse end year (could be "present" or a year)
-        if not end_date or end_date.lower() == "present":
-            # Use current year for "present"
-            end_year = datetime.datetime.now().year
-        else:
-            end_year_match = re.search(r'(\d{4})', str(end_date))
-            if not end_year_match:
-                return 0
-            end_year = int(end_year_match.group(1))
-                
-        # Calculate years of experience
-        years = end_year - start_year
+        required_years = self._parse_years_experience(job_requirements.experience)
+        required_education = job_requirements.education
+        required_level = self._required_education_level(required_education) if required_education else 0
         
-        # Add partial year if month information is available
-        start_month_match = re.search(r'(\d{4})-(\d{2})', str(start_date))
-        end_month_match = re.search(r'(\d{4})-(\d{2})', str(end_date))
+        years = store.years
+        education_levels = store.education_levels
+        weights = self.WEIGHTS
         
-        if start_month_match and end_month_match and end_date.lower() != "present":
-            start_month = int(start_month_match.group(2))
-            end_month = int(end_month_match.group(2))
+        for row in store.rows(candidate_ids):
+            if num_required:
+                exact = 0
+                partial = 0
+                for skill_id in store.skills_of(row):
+                    exact |= exact_masks.get(skill_id, 0)
+                    partial |= partial_masks.get(skill_id, 0)
+                total_matches = exact.bit_count() + 0.5 * (partial & ~exact).bit_count()
+                skills_score = min(100.0, (total_matches / num_required) * 100.0)
+            else:
+                skills_score = 100.0
+            
+            if required_years <= 0:
+                experience_score = 100.0
+            else:
+                experience_score = self.score_experience_years(required_years, years[row])
+            
+            candidate_level = education_levels[row]
+            if not required_education or candidate_level == NO_EDUCATION:
+                education_score = 50.0
+            else:
+                education_score = self.score_education_level(required_level, candidate_level)
+            
+            overall_score = (
+                (skills_score * weights["skills"]) + 
+                (experience_score * weights["experience"]) + 
+                (education_score * weights["education"])
+            )
             
-            months = (end_year - start_year) * 12 + (end_month - start_month)
-            years = months / 12
+            yield MatchResult(
+                job_requirements.job_id,
+                store.candidate_ids[row],
+                store.names[row],
+                skills_score,
+                experience_score,
+                education_score,
+                overall_score,
+                overall_score >= self.threshold
+            )
+    
+    def _iter_database_matches(self, job_requirements, candidate_ids):
+        """Score candidates streamed from the database page by page"""
+        for candidate_id, candidate in iter_candidate_profiles(candidate_ids, self.page_size):
+            yield self.calculate_overall_match(job_requirements, candidate)
+    
+    def match_candidates(self, job_id, candidate_ids=None, top_k=None):
+        """Match all candidates to a specific job
         
-        return max(0, years)  # Ensure non-negative
+        Candidates are scored from the columnar candidate store when one is
+        set, otherwise streamed from the database page by page. When top_k is
+        set, only the best top_k results are kept in a bounded heap, so memory
+        stays flat regardless of the size of the talent pool. Every match is
+        still stored in the database.
+        """
+        _check_top_k(top_k)
+        with metrics.timer("agent_seconds", agent="matcher", operation="match"):
+            return self._match_candidates(job_id, candidate_ids, top_k)
     
-    def match_candidates(self, job_id, candidate_ids=None):
-        """Match all candidates to a specific job"""
+    def _match_candidates(self, job_id, candidate_ids, top_k):
         job_requirements = get_job_requirements(job_id)
+        top_k = top_k if top_k is not None else self.top_k
         
-        # If candidate_ids not provided, match all candidates in the database
-        candidates = get_candidate_profiles(candidate_ids)
+        if self.candidate_store is not None:
+            results = self._iter_store_matches(job_requirements, candidate_ids)
+        else:
+            results = self._iter_database_matches(job_requirements, candidate_ids)
         
-        if not candidates:
-            return []
+        matched = 0
+        shortlisted = 0
+        heap = []  # Min-heap of (overall_score, sequence, match_result)
         
-        match_results = []
-        for candidate_id, profile in candidates.items():
-            match_result = self.calculate_overall_match(job_requirements, profile, candidate_id)
-            match_result["job_id"] = job_id
-            
+        # If candidate_ids not provided, match all candidates
+        for match_result in results:
             # Store match result in database
-            store_match_results(match_result)
-            match_results.append(match_result)
+            if self.writer:
+                self.writer.submit("match_results", match_result)
+            else:
+                store_match_results(match_result)
             
-        # Sort by overall score, descending
-        match_results.sort(key=lambda x: x["overall_score"], reverse=True)
+            matched += 1
+            if match_result.shortlisted:
+                shortlisted += 1
+            
+            entry = (match_result.overall_score, -matched, match_result)
+            if top_k is None or len(heap) < top_k:
+                heapq.heappush(heap, entry)
+            elif entry[:2] > heap[0][:2]:
+                heapq.heapreplace(heap, entry)
+        
+        self.last_match_stats = {"matched": matched, "shortlisted": shortlisted}
         
-        return match_results
+        # Sort by overall score, descending
+        return [entry[2] for entry in sorted(heap, key=lambda x: x[:2], reverse=True)]
+
+def _check_top_k(top_k):
+    """Return top_k, raising ValueError unless it is None or at least 1"""
+    if top_k is not None and top_k < 1:
+        raise ValueError(f"top_k must be at least 1, got {top_k}")
+    return top_k
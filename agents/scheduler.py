@@ -1,23 +1,74 @@
 # File: agents/scheduler.py
 # Interview Scheduler Agent
 
-import ollama
 import datetime
+import hashlib
 import re
-from db.database import get_shortlisted_candidates, update_interview_status
+import threading
+from string import Template
+from concurrent.futures import ThreadPoolExecutor
+from config import Config
+from utils.llm_connector import chat, route_model, limiter, CircuitOpenError
+from utils import metrics
+from utils.slot_allocator import SlotAllocator, Slot, load_availability_file, expand_availability
+from db.database import (get_shortlisted_candidates, store_interviews, get_email_template, store_email_template,
+                         get_held_interview_slots, get_interviewer_availability, store_interviewer_availability,
+                         get_interview_statuses)
+
+EMAIL_MODES = ("llm", "template")
+
+# Used when the LLM is unavailable; $time_slots lists the proposed times
+DEFAULT_EMAIL_TEMPLATE = Template("""Subject: Interview Invitation - $job_title Position at $company_name
+
+Dear $candidate_name,
+
+Congratulations! We are pleased to inform you that you have been shortlisted for the $job_title position at $company_name. Your qualifications and experience impressed our hiring team, and we would like to invite you for an interview.
+
+We would like to schedule the interview for next week. Please let us know which of the following time slots works best for you:
+
+$time_slots
+
+Additionally, please indicate your preferred interview format (video call, phone call, or in-person).
+
+We look forward to your confirmation and to learning more about your skills and experience.
+
+Best regards,
+Hiring Team
+$company_name
+""")
+
+DEFAULT_TIME_SLOTS = ["Monday, 10:00 AM - 11:00 AM", "Wednesday, 2:00 PM - 3:00 PM", "Friday, 11:00 AM - 12:00 PM"]
 
 class InterviewScheduler:
-    def __init__(self, model_name="mistral"):
+    def __init__(self, model_name=Config.DEFAULT_MODEL, email_mode=Config.EMAIL_MODE, tone=Config.EMAIL_TONE,
+                 personalize=False, allocator=None, use_llm=True):
+        if email_mode not in EMAIL_MODES:
+            raise ValueError(f"Unknown email mode: {email_mode}")
         self.model_name = model_name
+        self.email_mode = email_mode
+        self.tone = tone
+        self.personalize = personalize  # Template mode: let the LLM add a personal touch to each rendered email
+        self.allocator = allocator  # SlotAllocator handing out interviewer time; None offers the same fixed slots to everyone
+        self.use_llm = use_llm  # False writes every email from a stored or the default template (bulk screening)
+        self._templates = {}  # (job title, company, tone) -> Template
+        self._template_lock = threading.Lock()
         
-    def generate_interview_email(self, candidate_name, job_title, company_name):
+    def generate_interview_email(self, candidate_name, job_title, company_name, time_slots=None):
         """Generate personalized interview invitation email"""
+        if not self.use_llm:
+            return render_email(DEFAULT_EMAIL_TEMPLATE, candidate_name, job_title, company_name,
+                                time_slots or DEFAULT_TIME_SLOTS)
+        
+        if time_slots:
+            slot_request = "Offer these interview time slots: " + "; ".join(time_slots)
+        else:
+            slot_request = "Propose three different time slots next week for the interview"
         prompt = f"""
         Write a professional email inviting {candidate_name} for an interview for the {job_title} position at {company_name}. 
         Include the following:
         1. A congratulatory message for being shortlisted
         2. Brief mention of the impressive qualifications
-        3. Propose three different time slots next week for the interview
+        3. {slot_request}
         4. Ask about their preferred interview format (video call, phone, in-person)
         5. Request confirmation
         6. Professional closing
@@ -25,39 +76,94 @@ class InterviewScheduler:
         Keep the tone professional but friendly.
         """
         
+        model_name = route_model("email", prompt, self.model_name)
         try:
-            response = ollama.chat(
-                model=self.model_name,
-                messages=[{"role": "user", "content": prompt}]
-            )
-            
-            return response["message"]["content"]
+            email = chat(prompt, model_name, task="email")
+            metrics.increment("llm_parse_total", agent="scheduler", model=model_name, outcome="llm")
+            return email
         except Exception as e:
-            print(f"Error generating interview email: {e}")
+            if isinstance(e, CircuitOpenError):
+                metrics.increment("llm_parse_total", agent="scheduler", model=model_name, outcome="circuit_open")
+            else:
+                print(f"Error generating interview email: {e}")
+                metrics.increment("llm_parse_total", agent="scheduler", model=model_name, outcome="template_fallback")
             # Fallback template
-            return f"""
-            Subject: Interview Invitation - {job_title} Position at {company_name}
-            
-            Dear {candidate_name},
-            
-            Congratulations! We are pleased to inform you that you have been shortlisted for the {job_title} position at {company_name}. Your qualifications and experience impressed our hiring team, and we would like to invite you for an interview.
-            
-            We would like to schedule the interview for next week. Please let us know which of the following time slots works best for you:
-            
-            - Monday, 10:00 AM - 11:00 AM
-            - Wednesday, 2:00 PM - 3:00 PM
-            - Friday, 11:00 AM - 12:00 PM
-            
-            Additionally, please indicate your preferred interview format (video call, phone call, or in-person).
-            
-            We look forward to your confirmation and to learning more about your skills and experience.
-            
-            Best regards,
-            Hiring Team
-            {company_name}
-            """
+            return render_email(DEFAULT_EMAIL_TEMPLATE, candidate_name, job_title, company_name,
+                                time_slots or DEFAULT_TIME_SLOTS)
+    
+    def get_email_template(self, job_title, company_name):
+        """Invitation template for a job, generated once per (job title, company, tone) and kept in the database"""
+        key = (job_title, company_name, self.tone)
+        with self._template_lock:
+            template = self._templates.get(key)
+            if template is None:
+                template = self._templates[key] = self._load_email_template(job_title, company_name)
+        return template
+    
+    def _load_email_template(self, job_title, company_name):
+        template_key = hashlib.sha256("\0".join((job_title, company_name, self.tone)).encode("utf-8")).hexdigest()[:32]
+        body = get_email_template(template_key)
+        if body is not None:
+            metrics.increment("email_templates_total", source="database")
+            return Template(body)
+        if not self.use_llm:
+            metrics.increment("email_templates_total", source="default")
+            return Template(DEFAULT_EMAIL_TEMPLATE.safe_substitute(job_title=job_title, company_name=company_name))
+        
+        prompt = f"""
+        Write an email template inviting a shortlisted candidate for an interview for the {job_title} position at {company_name}.
+        Write $candidate_name where the candidate's name goes and $time_slots where the proposed interview times are listed.
+        Do not make up a name or times.
+        Include the following:
+        1. A congratulatory message for being shortlisted
+        2. Brief mention of the impressive qualifications
+        3. The proposed time slots ($time_slots)
+        4. Ask about their preferred interview format (video call, phone, in-person)
+        5. Request confirmation
+        6. Professional closing
+        
+        Keep the tone {self.tone}. Return only the email, starting with the Subject: line.
+        """
+        
+        model_name = route_model("email", prompt, self.model_name)
+        try:
+            body = chat(prompt, model_name, task="email").strip()
+        except CircuitOpenError:
+            body = None
+        except Exception as e:
+            print(f"Error generating interview email template: {e}")
+            body = None
+        
+        if body is None or "$candidate_name" not in body:
+            metrics.increment("email_templates_total", source="default")
+            return Template(DEFAULT_EMAIL_TEMPLATE.safe_substitute(job_title=job_title, company_name=company_name))
+        
+        metrics.increment("email_templates_total", source="llm")
+        store_email_template(template_key, job_title, company_name, self.tone, model_name, body)
+        return Template(body)
+    
+    def personalize_email(self, email, candidate, job_title):
+        """Ask the LLM to add a personal touch to a rendered email; returns it unchanged on failure"""
+        prompt = f"""
+        Here is an interview invitation for {candidate["name"]}, whose profile matched {candidate.get("match_score") or 0:.0f}% of our requirements for the {job_title} position.
+        Add one sentence on why their profile stood out, and keep everything else, including the proposed times, unchanged.
+        Return only the email.
+        
+        {email}
+        """
+        
+        model_name = route_model("email", prompt, self.model_name)
+        try:
+            personalized = chat(prompt, model_name, task="email").strip()
+            metrics.increment("llm_parse_total", agent="scheduler", model=model_name, outcome="personalized")
+            return personalized or email
+        except CircuitOpenError:
+            return email
+        except Exception as e:
+            print(f"Error personalizing interview email: {e}")
+            return email
     
-    def generate_interview_slots(self, num_slots=3, start_days_from_now=3):
+    def generate_interview_slots(self, num_slots=Config.DEFAULT_SLOTS, start_days_from_now=Config.MIN_DAYS_AHEAD):
         """Generate future interview time slots"""
         slots = []
         today = datetime.datetime.now()
@@ -82,40 +188,125 @@ class InterviewScheduler:
     
     def schedule_interviews(self, job_id, job_title, company_name):
         """Schedule interviews for all shortlisted candidates"""
+        with metrics.timer("agent_seconds", agent="scheduler", operation="schedule"):
+            return self._schedule_interviews(job_id, job_title, company_name)
+    
+    def _schedule_interviews(self, job_id, job_title, company_name):
         shortlisted = get_shortlisted_candidates(job_id)
         
         if not shortlisted:
             print("No candidates were shortlisted for interviews.")
             return []
         
+        # Candidates invited by an earlier run keep their invitation and its slots; only those
+        # still awaiting slots are scheduled again
+        statuses = get_interview_statuses(job_id)
+        pending = [candidate for candidate in shortlisted
+                   if statuses.get(candidate["candidate_id"], "Awaiting Slots") == "Awaiting Slots"]
+        if len(pending) < len(shortlisted):
+            print(f"{len(shortlisted) - len(pending)} shortlisted candidates were already invited.")
+        shortlisted = pending
+        if not shortlisted:
+            return []
+        
+        # Interviewer time from the allocator, or the same generated slots for everyone
+        if self.allocator:
+            allocated = self.allocator.allocate(len(shortlisted), Config.DEFAULT_SLOTS)
+            waiting = sum(1 for candidate_slots in allocated if not candidate_slots)
+            if waiting:
+                print(f"Interviewer availability is fully booked: {waiting} candidates are awaiting interview slots.")
+        else:
+            allocated = [None] * len(shortlisted)
+        slots = [[slot.format() for slot in candidate_slots] if candidate_slots is not None else
+                 [slot.strftime("%A, %B %d at %I:%M %p") for slot in self.generate_interview_slots()]
+                 for candidate_slots in allocated]
+        invited = [i for i, slot_strings in enumerate(slots) if slot_strings]
+        
+        if self.email_mode == "template":
+            # One template per job, rendered locally for each candidate
+            template = self.get_email_template(job_title, company_name)
+            emails = [render_email(template, shortlisted[i]["name"], job_title, company_name, slots[i]) for i in invited]
+            if self.personalize and self.use_llm:
+                emails = self._map_concurrently(
+                    lambda item: self.personalize_email(item[0], shortlisted[item[1]], job_title), list(zip(emails, invited)))
+        else:
+            emails = self._map_concurrently(
+                lambda i: self.generate_interview_email(shortlisted[i]["name"], job_title, company_name,
+                                                        slots[i] if allocated[i] else None), invited)
+        emails = dict(zip(invited, emails))
+        
+        # Invitations go to the outbox, to be sent by dispatch_outbox.py; one per job and candidate
+        messages = []
+        for i, candidate in enumerate(shortlisted):
+            if i in emails and candidate["email"]:
+                subject, body = split_subject(emails[i], f"Interview Invitation - {job_title} Position at {company_name}")
+                key = hashlib.sha256("\0".join(("invitation", job_id, candidate["candidate_id"])).encode("utf-8")).hexdigest()[:32]
+                messages.append((key, candidate["email"], subject, body))
+            else:
+                messages.append(None)
+        
+        # Update database with proposed slots and queue the emails, in one transaction
+        interview_ids, queued = store_interviews(
+            [(job_id, candidate["candidate_id"], slot_strings, "Invitation Sent" if slot_strings else "Awaiting Slots",
+              candidate_slots)
+             for candidate, slot_strings, candidate_slots in zip(shortlisted, slots, allocated)],
+            messages)
+        without_address = sum(1 for i in invited if not shortlisted[i]["email"])
+        print(f"{queued} invitation emails queued in the outbox" +
+              (f" ({without_address} candidates have no email address)" if without_address else ""))
+        
         scheduled_interviews = []
-        for candidate in shortlisted:
-            # Generate email
-            email_content = self.generate_interview_email(
-                candidate["name"],
-                job_title,
-                company_name
-            )
-            
-            # Generate interview slots
-            interview_slots = self.generate_interview_slots()
-            
-            # Format slots as strings
-            slot_strings = [slot.strftime("%A, %B %d at %I:%M %p") for slot in interview_slots]
-            
-            # Update database with proposed slots
-            interview_id = update_interview_status(
-                job_id=job_id,
-                candidate_id=candidate["candidate_id"],
-                proposed_dates=slot_strings,
-                status="Invitation Sent"
-            )
-            
+        for i in invited:
             scheduled_interviews.append({
-                "interview_id": interview_id,
-                "candidate": candidate,
-                "email": email_content,
-                "proposed_slots": slot_strings
+                "interview_id": interview_ids[i],
+                "candidate": shortlisted[i],
+                "email": emails[i],
+                "proposed_slots": slots[i]
             })
             
-        return scheduled_interviews
\ No newline at end of file
+        return scheduled_interviews
+    
+    def _map_concurrently(self, func, items):
+        """func over items on threads; the LLM concurrency limit decides how many requests run at once"""
+        if not items:
+            return []
+        with ThreadPoolExecutor(max_workers=min(len(items), limiter.max_limit), thread_name_prefix="scheduler") as pool:
+            return list(pool.map(func, items))
+
+def create_slot_allocator(availability_file=None, length_minutes=Config.INTERVIEW_MINUTES,
+                          buffer_minutes=Config.INTERVIEW_BUFFER_MINUTES):
+    """SlotAllocator over the interviewer availability of a CSV file (also stored for later runs) or the database
+
+    Returns None when no availability is known. Slots held by earlier
+    invitations are booked, so they are not offered again.
+    """
+    rows = load_availability_file(availability_file) if availability_file else get_interviewer_availability()
+    if not rows:
+        return None
+    
+    earliest = datetime.datetime.combine(datetime.date.today() + datetime.timedelta(days=Config.MIN_DAYS_AHEAD),
+                                         datetime.time.min)
+    windows = expand_availability(rows, earliest.date(), Config.SCHEDULING_HORIZON_DAYS)
+    if availability_file:
+        # Only rows that parsed are stored
+        store_interviewer_availability(rows)
+    allocator = SlotAllocator(windows, length_minutes, buffer_minutes, earliest)
+    allocator.book(Slot.from_dict(slot) for slot in get_held_interview_slots())
+    print(f"Allocating interview slots from the availability of {len(windows)} interviewers")
+    return allocator
+
+def split_subject(email, default_subject):
+    """(subject, body) of an email that may start with a Subject: line"""
+    lines = email.strip().splitlines()
+    if lines and lines[0].lower().startswith("subject:"):
+        return lines[0][len("subject:"):].strip() or default_subject, "\n".join(lines[1:]).strip()
+    return default_subject, email.strip()
+
+def render_email(template, candidate_name, job_title, company_name, time_slots):
+    """Fill in an email template; unknown $placeholders are left as they are"""
+    return template.safe_substitute(
+        candidate_name=candidate_name,
+        job_title=job_title,
+        company_name=company_name,
+        time_slots="\n".join(f"- {slot}" for slot in time_slots)
+    )
\ No newline at end of file
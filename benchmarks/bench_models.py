@@ -0,0 +1,70 @@
+# File: benchmarks/bench_models.py
+# Per-candidate memory footprint: nested profile dicts vs slotted Candidate models
+
+import os
+import sys
+import json
+import random
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db.models import Candidate
+from bench_storage import make_profile
+
+def make_rows(count, seed):
+    """Build candidates table rows (JSON columns) for a synthetic corpus"""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        profile, _ = make_profile(rng, i)
+        rows.append((
+            f"cand_{i:08d}",
+            profile["name"],
+            profile["contact"]["email"],
+            profile["contact"]["phone"],
+            json.dumps(profile["skills"]),
+            json.dumps(profile["experience"]),
+            json.dumps(profile["education"])
+        ))
+    return rows
+
+def profile_dict_from_row(row):
+    """The nested dict shape candidates were loaded into before the models were used"""
+    return {
+        "name": row[1],
+        "contact": {"email": row[2], "phone": row[3]},
+        "skills": json.loads(row[4]) if row[4] else [],
+        "experience": json.loads(row[5]) if row[5] else [],
+        "education": json.loads(row[6]) if row[6] else []
+    }
+
+def measure(build, rows):
+    """Bytes allocated per candidate while holding every built object"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [build(row) for row in rows]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objects
+    return (after - before) / len(rows)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark per-candidate memory of profile representations')
+    parser.add_argument('--count', type=int, default=20000, help='Number of synthetic candidates')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed for the synthetic corpus')
+    args = parser.parse_args()
+    
+    rows = make_rows(args.count, args.seed)
+    
+    dict_bytes = measure(profile_dict_from_row, rows)
+    model_bytes = measure(Candidate.from_row, rows)
+    
+    print(f"{'representation':<20}{'bytes/candidate':>16}")
+    print(f"{'nested dicts':<20}{dict_bytes:>16.0f}")
+    print(f"{'slotted models':<20}{model_bytes:>16.0f}")
+    print(f"\nFootprint reduction: {(1 - model_bytes / dict_bytes) * 100:.1f}%")
+
+if __name__ == "__main__":
+    main()
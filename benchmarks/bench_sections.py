@@ -0,0 +1,79 @@
+# File: benchmarks/bench_sections.py
+# Section lookup in the regex extractors: one search per section vs one-pass segmentation
+
+import os
+import re
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.sections import RESUME_SECTIONS, JOB_SECTIONS
+from benchmarks.corpus import iter_resumes, iter_jobs
+
+# The searches _basic_profile_extraction and _basic_requirements_extraction used before utils/sections.py
+RESUME_SEARCHES = [
+    r'(?:Skills|Proficiencies|Abilities)(?::|\.)(.*?)(?:Education|Experience|Reference|$)',
+    r'(?:Experience|Work Experience|Employment)(?::|\.)(.*?)(?:Education|Skills|References|$)',
+    r'(?:Education|Academic Background|Qualifications)(?::|\.)(.*?)(?:Experience|Skills|References|$)',
+]
+JOB_SEARCHES = [
+    r'(?:Requirements|Skills|Qualifications):(.*?)(?:Responsibilities|About Us|Benefits|$)',
+    r'(?:Responsibilities|Duties|You will):(.*?)(?:Requirements|Qualifications|Skills|About Us|Benefits|$)',
+]
+
+def search_sections(text, searches):
+    return [re.search(pattern, text, re.IGNORECASE | re.DOTALL) for pattern in searches]
+
+def split_sections(text, splitter, labels):
+    sections = splitter.split(text)
+    return [splitter.section_text(text, label, sections=sections) for label in labels]
+
+def grow(text, heading, target_chars):
+    """text with the section after heading repeated until the text is about target_chars long"""
+    start = text.index(heading) + len(heading)
+    end = text.find("\n\n", start)
+    end = len(text) if end < 0 else end
+    body = text[start:end]
+    repeats = max(1, (target_chars - len(text)) // max(len(body), 1))
+    return text[:start] + body * repeats + text[end:]
+
+def rate(func, texts, min_seconds=0.5):
+    """Documents per second, repeating the texts until min_seconds have passed"""
+    count = 0
+    start = time.perf_counter()
+    while True:
+        for text in texts:
+            func(text)
+        count += len(texts)
+        seconds = time.perf_counter() - start
+        if seconds >= min_seconds:
+            return count / seconds
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark per-section regex searches against one-pass segmentation')
+    parser.add_argument('--sizes', type=str, default='2000,20000,200000,1000000',
+                        help='Comma-separated document sizes in characters')
+    parser.add_argument('--documents', type=int, default=20, help='Documents of each kind and size')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed of the corpus')
+    args = parser.parse_args()
+
+    resumes = [text for _, text in iter_resumes(args.documents, args.seed)]
+    jobs = [description for _, description in iter_jobs(args.documents, args.seed)]
+    kinds = [
+        ("resume", resumes, "Experience:", RESUME_SEARCHES, RESUME_SECTIONS, ("skills", "experience", "education")),
+        ("job", jobs, "Responsibilities:", JOB_SEARCHES, JOB_SECTIONS, ("requirements", "responsibilities")),
+    ]
+
+    print(f"{'Document':<10} {'Chars':>9} {'Searches/s':>12} {'One pass/s':>12} {'Speedup':>8}")
+    for name, texts, heading, searches, splitter, labels in kinds:
+        for size in (int(size) for size in args.sizes.split(',')):
+            sized = [grow(text, heading, size) for text in texts]
+            chars = sum(len(text) for text in sized) // len(sized)
+            before = rate(lambda text: search_sections(text, searches), sized)
+            after = rate(lambda text: split_sections(text, splitter, labels), sized)
+            print(f"{name:<10} {chars:>9} {before:>12.1f} {after:>12.1f} {after / before:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
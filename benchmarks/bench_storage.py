@@ -0,0 +1,102 @@
+# File: benchmarks/bench_storage.py
+# Compare JSON and compact candidate storage: database size and profile load time
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db.database as database
+from db.models import Candidate
+from db.writer import WriteBehindWriter
+
+SKILLS = ["Python", "Java", "JavaScript", "SQL", "React", "Django", "Flask", "AWS", "Docker",
+          "Kubernetes", "Git", "Agile development", "Machine Learning", "TensorFlow", "Go",
+          "Communication", "Leadership", "Problem solving", "PostgreSQL", "REST APIs"]
+WORDS = ["developed", "maintained", "designed", "scalable", "services", "team", "clients",
+         "performance", "improved", "applications", "data", "pipelines", "cloud", "led",
+         "projects", "customers", "automated", "testing", "deployment", "features"]
+
+def make_profile(rng, i):
+    """Build a deterministic synthetic profile and resume text"""
+    experience = []
+    for j in range(rng.randint(1, 4)):
+        start = rng.randint(2005, 2020)
+        experience.append({
+            "company": f"Company {rng.randint(1, 500)} Inc.",
+            "title": rng.choice(["Software Engineer", "Senior Developer", "Data Analyst", "Team Lead"]),
+            "start_date": f"{start}-{rng.randint(1, 12):02d}",
+            "end_date": "Present" if j == 0 else f"{start + rng.randint(1, 4)}-{rng.randint(1, 12):02d}",
+            "description": " ".join(rng.choice(WORDS) for _ in range(rng.randint(30, 80)))
+        })
+    
+    profile = {
+        "name": f"Candidate {i}",
+        "contact": {"email": f"candidate{i}@example.com", "phone": f"555-{i % 1000:03d}-{i % 10000:04d}"},
+        "skills": rng.sample(SKILLS, rng.randint(4, 12)),
+        "experience": experience,
+        "education": [{"degree": rng.choice(["BS in Computer Science", "Master of Science", "PhD in Physics"]),
+                       "institution": "University of Technology", "year": rng.randint(2000, 2020)}]
+    }
+    resume_text = "\n".join([profile["name"], "Skills: " + ", ".join(profile["skills"])] +
+                            [exp["description"] for exp in experience] * 3)
+    return profile, resume_text
+
+def build_database(path, count, compact, seed):
+    """Write count synthetic candidates to a fresh database"""
+    database.DB_FILE = path
+    database.set_compact_storage(compact)
+    database.setup_database()
+    
+    rng = random.Random(seed)
+    with WriteBehindWriter(batch_size=1000) as writer:
+        for i in range(count):
+            profile, resume_text = make_profile(rng, i)
+            writer.submit("candidates", Candidate.from_profile(f"cand_{i:08d}", profile, resume_text))
+    
+    # Reclaim free pages so the file size reflects the stored data
+    conn = database.get_connection()
+    conn.execute("VACUUM")
+    conn.close()
+
+def time_load(path, repeat):
+    """Best wall time to stream every profile out of the database"""
+    database.DB_FILE = path
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        loaded = sum(1 for _ in database.iter_candidate_profiles())
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, loaded
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark JSON vs compact candidate storage')
+    parser.add_argument('--count', type=int, default=20000, help='Number of synthetic candidates')
+    parser.add_argument('--repeat', type=int, default=3, help='Load-time repetitions (best is reported)')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed for the synthetic corpus')
+    args = parser.parse_args()
+    
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for label, compact in (("json", False), ("compact", True)):
+            path = os.path.join(tmp_dir, f"{label}.db")
+            build_database(path, args.count, compact, args.seed)
+            load_time, loaded = time_load(path, args.repeat)
+            results[label] = (os.path.getsize(path), load_time, loaded)
+    
+    print(f"{'storage':<10}{'db size (MB)':>14}{'load time (s)':>15}{'profiles/s':>12}")
+    for label, (size, load_time, loaded) in results.items():
+        print(f"{label:<10}{size / 1e6:>14.2f}{load_time:>15.3f}{loaded / load_time:>12.0f}")
+    
+    json_size, json_time, _ = results["json"]
+    compact_size, compact_time, _ = results["compact"]
+    print(f"\nDB size reduction: {(1 - compact_size / json_size) * 100:.1f}%")
+    print(f"Load time reduction: {(1 - compact_time / json_time) * 100:.1f}%")
+
+if __name__ == "__main__":
+    main()
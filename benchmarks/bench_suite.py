@@ -0,0 +1,314 @@
+# File: benchmarks/bench_suite.py
+# Scalability benchmarks on a synthetic corpus, with JSON results to compare between commits
+#
+#     python benchmarks/bench_suite.py --scale 1k --output before.json
+#     (change something)
+#     python benchmarks/bench_suite.py --scale 1k --compare before.json
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import subprocess
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import db.database as database
+from db.models import Candidate, JobRequirements
+from db.writer import WriteBehindWriter
+from db.columnar import ColumnarCandidateStore
+from db.outbox import OutboxDispatcher
+from config import Config
+from agents.cv_parser1 import CVParser, parse_resumes_without_llm
+from agents.jd_analyzer import JDAnalyzer
+from agents.matcher import MatchingEngine
+from utils.document_processor import extract_text_from_file
+from utils.slot_allocator import SlotAllocator, expand_availability
+from utils.mailer import FileSender
+from utils.pipeline import Pipeline, Stage, PROCESS, DEFAULT_BULK_WORKERS, chunked
+from utils.skills import SKILLS
+from benchmarks.corpus import SCALES, FORMATS, WRITERS, iter_resumes, iter_jobs
+
+# Per-item benchmarks stop at these counts; their rate does not depend on the corpus size
+MAX_FILES_PER_FORMAT = 300
+MAX_TEXTS = 20_000
+MAX_DIRECT_WRITES = 2_000
+MAX_LOOKUPS = 5_000
+MAX_SHORTLIST = 100_000
+MAX_INVITATIONS = 20_000
+MAX_BULK_RESUMES = 100_000
+INTERVIEWERS = 50
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+class Suite:
+    """Runs benchmarks and collects their results"""
+
+    def __init__(self, only=None):
+        self.only = only
+        self.results = {}
+
+    def wanted(self, name):
+        return not self.only or any(name.startswith(prefix) for prefix in self.only)
+
+    def measure(self, name, items, func):
+        """Time func(), which handles items items, and record the rate"""
+        if not self.wanted(name):
+            return None
+        start = time.perf_counter()
+        value = func()
+        self.record(name, items, time.perf_counter() - start)
+        return value
+
+    def record(self, name, items, seconds):
+        """Record a benchmark timed by the caller"""
+        self.results[name] = {
+            "items": items,
+            "seconds": round(seconds, 4),
+            "per_second": round(items / seconds, 1) if seconds > 0 else None
+        }
+        rate = f"{items / seconds:>12.1f}/s" if seconds > 0 else f"{'-':>14}"
+        print(f"{name:<32} {items:>9} items {seconds:>9.3f}s {rate}")
+
+def bench_extraction(suite, work_dir, count, seed):
+    """extract_text_from_file on files of each format"""
+    texts = [text for _, text in iter_resumes(count, seed)]
+    for ext in FORMATS:
+        name = f"extract.{ext}"
+        if not suite.wanted(name):
+            continue
+        paths = []
+        for i, text in enumerate(texts):
+            path = os.path.join(work_dir, f"resume_{i:05d}.{ext}")
+            WRITERS[ext](path, text)
+            paths.append(path)
+        suite.measure(name, len(paths), lambda: [extract_text_from_file(path) for path in paths])
+
+def bench_basic_extractors(suite, count, seed):
+    """The regex fallbacks used when the LLM is unavailable"""
+    resumes = [text for _, text in iter_resumes(count, seed)]
+    descriptions = [description for _, description in iter_jobs(count, seed)]
+    cv_parser = CVParser(duplicate_index=None)
+    jd_analyzer = JDAnalyzer()
+    suite.measure("basic.profile", len(resumes),
+                  lambda: [cv_parser._basic_profile_extraction(text) for text in resumes])
+    suite.measure("basic.requirements", len(descriptions),
+                  lambda: [jd_analyzer._basic_requirements_extraction(text) for text in descriptions])
+    
+    cv_parser = CVParser(duplicate_index=None, use_llm=False, skill_matcher=SKILLS)
+    suite.measure("basic.profile.skills", len(resumes),
+                  lambda: [cv_parser._basic_profile_extraction(text) for text in resumes])
+
+def make_candidates(count, seed):
+    """Candidates parsed from synthetic resumes with the basic extractor"""
+    cv_parser = CVParser(duplicate_index=None)
+    for i, text in iter_resumes(count, seed):
+        yield Candidate.from_profile(f"cand_{i:08d}", cv_parser._basic_profile_extraction(text), text)
+
+def bench_database(suite, db_path, count, seed):
+    """Write-behind and direct writes, full scans and point lookups"""
+    database.DB_FILE = db_path
+    database.setup_database()
+
+    # Candidates are built in chunks outside the timed part, so only the writes are measured
+    seconds = 0.0
+    writer = WriteBehindWriter(batch_size=1000)
+    chunk = []
+    for candidate in make_candidates(count, seed):
+        chunk.append(candidate)
+        if len(chunk) == 10_000:
+            start = time.perf_counter()
+            for item in chunk:
+                writer.submit("candidates", item)
+            seconds += time.perf_counter() - start
+            chunk = []
+    start = time.perf_counter()
+    for item in chunk:
+        writer.submit("candidates", item)
+    writer.close()
+    seconds += time.perf_counter() - start
+    suite.record("db.write_behind.candidates", count, seconds)
+
+    direct = min(count, MAX_DIRECT_WRITES)
+    candidates = list(make_candidates(direct, seed + 1))
+    for candidate in candidates:
+        candidate.candidate_id = "direct_" + candidate.candidate_id
+    suite.measure("db.store_candidate_profile", direct,
+                  lambda: [database.store_candidate_profile(candidate) for candidate in candidates])
+
+    suite.measure("db.iter_candidate_profiles", count + direct,
+                  lambda: sum(1 for _ in database.iter_candidate_profiles()))
+
+    lookups = min(count, MAX_LOOKUPS)
+    rng = random.Random(seed)
+    ids = [f"cand_{rng.randrange(count):08d}" for _ in range(lookups)]
+    suite.measure("db.iter_candidate_profiles.by_id", lookups,
+                  lambda: sum(1 for _ in database.iter_candidate_profiles(ids)))
+
+    jobs = min(count, MAX_LOOKUPS)
+    analyzer = JDAnalyzer()
+    job_rows = list(iter_jobs(jobs, seed))
+    requirements = [JobRequirements.from_dict(f"job_{i:08d}", analyzer._basic_requirements_extraction(description))
+                    for i, (_, description) in enumerate(job_rows)]
+
+    def write_jobs():
+        with WriteBehindWriter(batch_size=1000) as writer:
+            for i, (title, description) in enumerate(job_rows):
+                writer.submit("jobs", f"job_{i:08d}", title, "Example Company", description)
+    suite.measure("db.write_behind.jobs", jobs, write_jobs)
+    suite.measure("db.store_job_requirements", jobs,
+                  lambda: [database.store_job_requirements(item) for item in requirements])
+    suite.measure("db.get_job_requirements", jobs,
+                  lambda: [database.get_job_requirements(item.job_id) for item in requirements])
+
+def bench_matching(suite, db_path, count, top_k):
+    """match_candidates for one job against every candidate, from the database and the columnar store"""
+    database.DB_FILE = db_path
+    job_id = "job_00000000"
+
+    with WriteBehindWriter(batch_size=1000) as writer:
+        engine = MatchingEngine(threshold=70, top_k=top_k, writer=writer)
+        suite.measure("match.database", count, lambda: engine.match_candidates(job_id))
+
+        store = ColumnarCandidateStore()
+        suite.measure("match.columnar.load", count, store.load)
+        engine = MatchingEngine(threshold=70, top_k=top_k, writer=writer, candidate_store=store)
+        suite.measure("match.columnar", count, lambda: engine.match_candidates(job_id))
+
+def bench_scheduling(suite, db_path, count):
+    """Slot allocation for a shortlist of count candidates, and storing their interviews"""
+    # Weekday 09:00-17:00 calendars with one-hour interviews and 15-minute buffers hold
+    # 6 interviews a day, so the horizon is sized for three slots per candidate
+    weeks = -(-count * 3 // (INTERVIEWERS * 6 * 5)) + 1
+    rows = [(f"interviewer_{i:03d}", "mon-fri", "09:00", "17:00") for i in range(INTERVIEWERS)]
+    first_day = datetime(2030, 1, 7).date()
+    windows = expand_availability(rows, first_day, weeks * 7)
+    allocator = SlotAllocator(windows, 60, 15, datetime.combine(first_day, datetime.min.time()))
+    allocated = suite.measure("schedule.allocate", count, lambda: allocator.allocate(count, 3))
+    if allocated is None or not suite.wanted("schedule.store_interviews"):
+        return
+    
+    database.DB_FILE = db_path
+    database.setup_database()
+    add_interview_references(count)
+    interviews = [("job_00000000", f"cand_{i:08d}", [slot.format() for slot in slots], "Invitation Sent", slots)
+                  for i, slots in enumerate(allocated)]
+    suite.measure("schedule.store_interviews", count, lambda: database.store_interviews(interviews))
+
+def add_interview_references(count):
+    """The job and candidate rows that interviews reference"""
+    conn = database.get_connection()
+    conn.execute("INSERT INTO jobs (job_id) VALUES ('job_00000000')")
+    conn.executemany("INSERT INTO candidates (candidate_id) VALUES (?)", ((f"cand_{i:08d}",) for i in range(count)))
+    conn.commit()
+    conn.close()
+
+def bench_outbox(suite, work_dir, count):
+    """Queuing invitations with their interviews, and sending them in batches to .eml files"""
+    if not suite.wanted("outbox."):
+        return
+    database.DB_FILE = os.path.join(work_dir, "outbox.db")
+    database.setup_database()
+    add_interview_references(count)
+    interviews = [("job_00000000", f"cand_{i:08d}", [], "Invitation Sent", None) for i in range(count)]
+    messages = [(f"invitation_{i:08d}", f"candidate{i}@example.com", "Interview Invitation",
+                 "Dear candidate,\n\nWe would like to invite you for an interview.\n") for i in range(count)]
+    suite.measure("outbox.enqueue", count, lambda: database.store_interviews(interviews, messages))
+    
+    dispatcher = OutboxDispatcher(FileSender(os.path.join(work_dir, "sent_mail")))
+    suite.measure("outbox.dispatch.file", count, dispatcher.drain)
+
+def bench_bulk(suite, work_dir, count, seed):
+    """--no_llm screening of txt resumes: extraction and parsing in worker processes, then batched writes"""
+    if not suite.wanted("bulk."):
+        return
+    resume_dir = os.path.join(work_dir, "bulk")
+    os.makedirs(resume_dir)
+    tasks = []
+    for i, text in iter_resumes(count, seed):
+        path = os.path.join(resume_dir, f"resume_{i:08d}.txt")
+        WRITERS["txt"](path, text)
+        tasks.append((f"cand_{i:08d}", path))
+    
+    database.DB_FILE = os.path.join(work_dir, "bulk.db")
+    database.setup_database()
+    
+    def screen():
+        with WriteBehindWriter(Config.BULK_WRITE_BATCH_SIZE, max_pending=Config.BULK_MAX_PENDING_WRITES) as writer:
+            def store(parsed):
+                for candidate in parsed[0]:
+                    writer.submit("candidates", candidate)
+            Pipeline([
+                Stage("parse", parse_resumes_without_llm, DEFAULT_BULK_WORKERS, PROCESS),
+                Stage("store", store)
+            ], name="bulk").run(chunked(tasks, Config.BULK_CHUNK_SIZE))
+    suite.measure(f"bulk.screen.{DEFAULT_BULK_WORKERS}_workers", count, screen)
+
+def compare(results, baseline_path):
+    """Print the rate change of every benchmark against a saved result file"""
+    with open(baseline_path) as file:
+        baseline = json.load(file)
+    print(f"\nCompared with {baseline_path} (commit {baseline.get('commit')}, scale {baseline.get('scale')}):")
+    print(f"{'Benchmark':<32} {'Before/s':>12} {'After/s':>12} {'Change':>8}")
+    for name, result in results.items():
+        before = baseline.get("benchmarks", {}).get(name)
+        if not before or not before.get("per_second") or not result.get("per_second"):
+            continue
+        change = (result["per_second"] / before["per_second"] - 1) * 100
+        print(f"{name:<32} {before['per_second']:>12.1f} {result['per_second']:>12.1f} {change:>+7.1f}%")
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the scalability benchmarks on a synthetic corpus')
+    parser.add_argument('--scale', choices=sorted(SCALES), default='1k', help='Number of candidates and jobs')
+    parser.add_argument('--count', type=int, help='Number of candidates (overrides --scale)')
+    parser.add_argument('--top_k', type=int, default=10, help='Matches kept per job')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed of the corpus')
+    parser.add_argument('--only', type=str, help='Comma-separated benchmark name prefixes to run, e.g. extract,match')
+    parser.add_argument('--output', type=str, help='Write the results as JSON to this file')
+    parser.add_argument('--compare', type=str, metavar='RESULTS_JSON', help='Compare with results saved by --output')
+    args = parser.parse_args()
+
+    count = args.count if args.count is not None else SCALES[args.scale]
+    suite = Suite(args.only.split(',') if args.only else None)
+    print(f"Benchmarking with {count} candidates (seed {args.seed})\n")
+
+    with tempfile.TemporaryDirectory(prefix="bench-suite-") as work_dir:
+        bench_extraction(suite, work_dir, min(count, MAX_FILES_PER_FORMAT), args.seed)
+        bench_basic_extractors(suite, min(count, MAX_TEXTS), args.seed)
+        if suite.wanted("db.") or suite.wanted("match."):
+            db_path = os.path.join(work_dir, "bench.db")
+            bench_database(suite, db_path, count, args.seed)
+            bench_matching(suite, db_path, count, args.top_k)
+        bench_scheduling(suite, os.path.join(work_dir, "schedule.db"), min(count, MAX_SHORTLIST))
+        bench_outbox(suite, work_dir, min(count, MAX_INVITATIONS))
+        bench_bulk(suite, work_dir, min(count, MAX_BULK_RESUMES), args.seed)
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "scale": args.scale if args.count is None else count,
+        "seed": args.seed,
+        "benchmarks": suite.results
+    }
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+        print(f"\nResults written to {args.output}")
+    if args.compare:
+        compare(suite.results, args.compare)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# File: benchmarks/check_import_time.py
+# Import-time regression check for the CLI entry points, based on python -X importtime
+#
+# Exits with status 1 when an entry point takes longer than the budget to
+# import, or when it eagerly loads a heavy dependency that should only be
+# imported on first use.
+
+import os
+import re
+import sys
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENTRY_POINTS = ["main", "process_multiple_jobs", "watch_daemon"]
+
+# Loaded on first use only (LLM client, document parsers, asyncio machinery)
+LAZY_MODULES = ["ollama", "httpx", "PyPDF2", "docx", "asyncio"]
+
+IMPORTTIME_LINE = re.compile(r'import time:\s*(\d+)\s*\|\s*(\d+)\s*\|\s*(\S+)')
+
+def measure(module):
+    """Import a module in a fresh interpreter; return (cumulative microseconds, set of loaded modules)"""
+    code = f"import {module}"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True, env=dict(os.environ, PYTHONPATH=ROOT)
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+
+    cumulative = None
+    loaded = set()
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        name = match.group(3)
+        loaded.add(name.split(".")[0])
+        if name == module:
+            cumulative = int(match.group(2))
+    return cumulative, loaded
+
+def main():
+    parser = argparse.ArgumentParser(description='Check CLI import time against a budget')
+    parser.add_argument('--budget_ms', type=float, default=150.0, help='Maximum median import time per entry point')
+    parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters per entry point (the median is used)')
+    args = parser.parse_args()
+
+    failures = []
+    print(f"{'Entry point':<24} {'Median':>9} {'Min':>9} {'Budget':>9}")
+    for module in ENTRY_POINTS:
+        timings = []
+        loaded = set()
+        for _ in range(args.runs):
+            cumulative, loaded = measure(module)
+            timings.append(cumulative / 1000)
+
+        median = statistics.median(timings)
+        print(f"{module:<24} {median:>7.1f}ms {min(timings):>7.1f}ms {args.budget_ms:>7.1f}ms")
+
+        if median > args.budget_ms:
+            failures.append(f"{module} takes {median:.1f}ms to import (budget {args.budget_ms:.1f}ms)")
+        eager = sorted(name for name in LAZY_MODULES if name in loaded)
+        if eager:
+            failures.append(f"{module} eagerly imports {', '.join(eager)}")
+
+    if failures:
+        print("\nFAILED:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print("\nAll entry points within budget")
+
+if __name__ == "__main__":
+    main()
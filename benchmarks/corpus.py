@@ -0,0 +1,221 @@
+# File: benchmarks/corpus.py
+# Deterministic synthetic resumes (txt, PDF, DOCX) and job description CSVs
+#
+# The same seed always yields the same corpus, so benchmark results from
+# different commits are measured on identical inputs. PDF and DOCX files are
+# written by hand (no extra dependencies) in the simplest form the text
+# extractors accept.
+#
+#     python benchmarks/corpus.py corpus --scale 1k
+
+import os
+import csv
+import sys
+import random
+import zipfile
+import argparse
+from xml.sax.saxutils import escape
+
+SCALES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+FORMATS = ("txt", "pdf", "docx")
+
+FIRST_NAMES = ["James", "Maria", "Wei", "Aisha", "Carlos", "Priya", "Olga", "Kwame", "Hannah", "Diego",
+               "Yuki", "Fatima", "Liam", "Sofia", "Arjun", "Chloe", "Mateo", "Amara", "Noah", "Elena"]
+LAST_NAMES = ["Smith", "Garcia", "Chen", "Khan", "Silva", "Patel", "Ivanova", "Mensah", "Schmidt", "Lopez",
+              "Tanaka", "Haddad", "Murphy", "Rossi", "Sharma", "Martin", "Fernandez", "Okafor", "Brown", "Popescu"]
+SKILLS = ["Python", "Java", "JavaScript", "SQL", "React", "Django", "Flask", "AWS", "Docker", "Kubernetes",
+          "Git", "Agile development", "Machine Learning", "TensorFlow", "Go", "Communication", "Leadership",
+          "Problem solving", "PostgreSQL", "REST APIs", "Linux", "Terraform", "Spark", "C++", "TypeScript"]
+TITLES = ["Software Engineer", "Senior Developer", "Data Analyst", "Team Lead", "Backend Engineer",
+          "Data Scientist", "DevOps Engineer", "Frontend Developer"]
+DEGREES = ["Bachelor of Science in Computer Science", "Master of Science in Data Science",
+           "Bachelor of Engineering in Electronics", "PhD in Physics", "MBA in Technology Management"]
+WORDS = ["developed", "maintained", "designed", "scalable", "services", "team", "clients", "performance",
+         "improved", "applications", "data", "pipelines", "cloud", "led", "projects", "customers",
+         "automated", "testing", "deployment", "features", "reduced", "latency", "migrated", "platform"]
+
+def make_resume(rng, i):
+    """Build the text of resume i, laid out in the sections resumes usually have"""
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    lines = [
+        name,
+        f"{name.lower().replace(' ', '.')}{i}@example.com | 555-{rng.randint(100, 999)}-{rng.randint(1000, 9999)}",
+        "",
+        "Summary",
+        " ".join(rng.choice(WORDS) for _ in range(rng.randint(20, 40))).capitalize() + ".",
+        "",
+        "Skills:",
+    ]
+    lines += [f"- {skill}" for skill in rng.sample(SKILLS, rng.randint(4, 12))]
+
+    lines += ["", "Experience:"]
+    year = 2024
+    for j in range(rng.randint(1, 4)):
+        start = year - rng.randint(1, 5)
+        lines.append(f"Company {rng.randint(1, 500)} Inc")
+        lines.append(f"{rng.choice(TITLES)}, {start}-{rng.randint(1, 12):02d} - "
+                     f"{'Present' if j == 0 else f'{year}-{rng.randint(1, 12):02d}'}")
+        lines += [f"- {' '.join(rng.choice(WORDS) for _ in range(rng.randint(8, 16)))}"
+                  for _ in range(rng.randint(2, 5))]
+        year = start
+
+    lines += ["", "Education:",
+              f"{rng.choice(DEGREES)}, University of {rng.choice(['Technology', 'Science', 'Engineering'])}, "
+              f"{year - rng.randint(0, 3)}"]
+    return "\n".join(lines) + "\n"
+
+def make_job(rng, i):
+    """Build (title, description) of job i, with requirement and responsibility bullets"""
+    title = rng.choice(TITLES)
+    years = rng.randint(1, 8)
+    lines = [
+        "Description:",
+        f"We are hiring a {title} to join team {i}. " +
+        " ".join(rng.choice(WORDS) for _ in range(rng.randint(15, 30))) + ".",
+        "",
+        "Requirements:",
+    ]
+    lines += [f"- {skill}" for skill in rng.sample(SKILLS, rng.randint(3, 8))]
+    lines += [f"- {years}+ years of experience",
+              f"- {rng.choice(['Bachelor', 'Master'])}'s degree in Computer Science or a related field",
+              "", "Responsibilities:"]
+    lines += [f"- {' '.join(rng.choice(WORDS) for _ in range(rng.randint(6, 12))).capitalize()}"
+              for _ in range(rng.randint(3, 6))]
+    return title, "\n".join(lines)
+
+def write_txt(path, text):
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(text)
+
+def _pdf_string(line):
+    text = line.encode("latin-1", "replace").decode("latin-1")
+    return "(" + text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") + ")"
+
+def write_pdf(path, text, lines_per_page=60):
+    """Write text as a minimal PDF: Helvetica, one text object per page"""
+    lines = text.splitlines() or [""]
+    pages = [lines[start:start + lines_per_page] for start in range(0, len(lines), lines_per_page)]
+
+    # Objects 1-3 are the catalog, page tree and font; each page adds a page and a content stream
+    page_ids = [4 + 2 * n for n in range(len(pages))]
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{' '.join(f'{pid} 0 R' for pid in page_ids)}] /Count {len(pages)} >>".encode(),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for page_id, page_lines in zip(page_ids, pages):
+        content = "BT /F1 10 Tf 12 TL 50 760 Td " + " T* ".join(f"{_pdf_string(line)} Tj" for line in page_lines) + " ET"
+        content = content.encode("latin-1")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {page_id + 1} 0 R >>".encode())
+        objects.append(f"<< /Length {len(content)} >>\nstream\n".encode() + content + b"\nendstream")
+
+    data = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(data))
+        data += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(data)
+    data += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    data += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    data += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+
+    with open(path, "wb") as file:
+        file.write(data)
+
+DOCX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '</Types>'
+)
+DOCX_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="word/document.xml"/>'
+    '</Relationships>'
+)
+
+def write_docx(path, text):
+    """Write text as a minimal DOCX: one paragraph per line"""
+    paragraphs = "".join(f'<w:p><w:r><w:t xml:space="preserve">{escape(line)}</w:t></w:r></w:p>'
+                         for line in text.splitlines())
+    document = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+        f'<w:body>{paragraphs}</w:body></w:document>'
+    )
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", DOCX_CONTENT_TYPES)
+        archive.writestr("_rels/.rels", DOCX_RELS)
+        archive.writestr("word/document.xml", document)
+
+WRITERS = {"txt": write_txt, "pdf": write_pdf, "docx": write_docx}
+
+def iter_resumes(count, seed=42):
+    """Yield (index, text) of count synthetic resumes"""
+    rng = random.Random(seed)
+    for i in range(count):
+        yield i, make_resume(rng, i)
+
+def iter_jobs(count, seed=42):
+    """Yield (title, description) of count synthetic jobs"""
+    rng = random.Random(seed + 1)
+    for i in range(count):
+        yield make_job(rng, i)
+
+def write_resumes(directory, count, formats=FORMATS, seed=42):
+    """Write count resumes to directory, cycling through formats; returns their paths
+
+    Files are spread over subdirectories of 1000, so a million resumes do not
+    end up in one directory listing.
+    """
+    paths = []
+    for i, text in iter_resumes(count, seed):
+        ext = formats[i % len(formats)]
+        subdirectory = os.path.join(directory, f"{i // 1000:04d}")
+        if i % 1000 == 0:
+            os.makedirs(subdirectory, exist_ok=True)
+        path = os.path.join(subdirectory, f"resume_{i:07d}.{ext}")
+        WRITERS[ext](path, text)
+        paths.append(path)
+    return paths
+
+def write_jobs_csv(path, count, seed=42):
+    """Write a job CSV in the layout process_multiple_jobs.py reads"""
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(["Job Title", "Job Description"])
+        for title, description in iter_jobs(count, seed):
+            writer.writerow([title, description])
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a deterministic synthetic corpus')
+    parser.add_argument('output_dir', help='Directory for the resumes and jobs.csv')
+    parser.add_argument('--scale', choices=sorted(SCALES), default='1k', help='Number of resumes and jobs')
+    parser.add_argument('--resumes', type=int, help='Number of resumes (overrides --scale)')
+    parser.add_argument('--jobs', type=int, help='Number of jobs (overrides --scale)')
+    parser.add_argument('--formats', default=','.join(FORMATS), help='Comma-separated resume formats to cycle through')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed')
+    args = parser.parse_args()
+
+    formats = tuple(args.formats.split(','))
+    unknown = [ext for ext in formats if ext not in WRITERS]
+    if unknown:
+        sys.exit(f"Unknown formats: {', '.join(unknown)}")
+
+    resumes = args.resumes if args.resumes is not None else SCALES[args.scale]
+    jobs = args.jobs if args.jobs is not None else SCALES[args.scale]
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    write_jobs_csv(os.path.join(args.output_dir, "jobs.csv"), jobs, args.seed)
+    write_resumes(os.path.join(args.output_dir, "resumes"), resumes, formats, args.seed)
+    print(f"Wrote {resumes} resumes ({', '.join(formats)}) and {jobs} jobs to {args.output_dir}")
+
+if __name__ == "__main__":
+    main()
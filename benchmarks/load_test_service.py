@@ -0,0 +1,165 @@
+# File: benchmarks/load_test_service.py
+# Load-test the screening service against the mock Ollama server
+
+import os
+import sys
+import json
+import time
+import base64
+import random
+import argparse
+import tempfile
+import subprocess
+import urllib.request
+import urllib.error
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils.mock_ollama import MockOllama
+from benchmarks.bench_storage import make_profile
+
+JOB_DESCRIPTION = """Senior Python Developer
+We need an engineer with 3+ years of experience in Python, SQL, Docker and AWS.
+Bachelor's degree in Computer Science required. You will build services and review code."""
+
+def request(base_url, method, path, payload=None):
+    """Send one JSON request, returning (status, body, seconds)"""
+    data = json.dumps(payload).encode("utf-8") if payload is not None else None
+    req = urllib.request.Request(base_url + path, data=data, method=method,
+                                 headers={"Content-Type": "application/json"})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=120) as response:
+            body = json.loads(response.read())
+            status = response.status
+    except urllib.error.HTTPError as e:
+        body = json.loads(e.read() or b"{}")
+        status = e.code
+    return status, body, time.perf_counter() - start
+
+def wait_until_ready(base_url, process, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("Service exited during startup")
+        try:
+            if request(base_url, "GET", "/health")[0] == 200:
+                return
+        except (urllib.error.URLError, ConnectionError):
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("Service did not start in time")
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+def run_phase(name, calls, concurrency):
+    """Run calls (functions returning (status, body, seconds)) concurrently and summarize them"""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(lambda call: call(), calls))
+    elapsed = time.perf_counter() - start
+
+    latencies = [seconds for status, _, seconds in outcomes if status == 200]
+    statuses = {}
+    for status, _, _ in outcomes:
+        statuses[status] = statuses.get(status, 0) + 1
+    summary = {
+        "phase": name,
+        "requests": len(outcomes),
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(len(outcomes) / elapsed, 2) if elapsed > 0 else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+        "statuses": statuses
+    }
+    print(f"{name:<10} {summary['requests']:>6} req  {summary['requests_per_second']:>8.2f} req/s  "
+          f"p50 {summary['p50_ms']:>7.1f} ms  p95 {summary['p95_ms']:>7.1f} ms  p99 {summary['p99_ms']:>7.1f} ms  "
+          f"statuses {statuses}")
+    return summary, outcomes
+
+def main():
+    parser = argparse.ArgumentParser(description='Load-test the screening service with a mock model')
+    parser.add_argument('--resumes', type=int, default=200, help='Resumes to upload and parse')
+    parser.add_argument('--concurrency', type=int, default=16, help='Concurrent client requests')
+    parser.add_argument('--matches', type=int, default=50, help='Match requests to send')
+    parser.add_argument('--llm_latency', type=str, default='0.2',
+                        help='Seconds each mock model call takes, or a distribution such as uniform:0.1:0.5')
+    parser.add_argument('--llm_error_rate', type=float, default=0.0, help='Share of mock model calls that fail')
+    parser.add_argument('--llm_workers', type=int, default=4, help='LLM concurrency limit of the service')
+    parser.add_argument('--port', type=int, default=8765, help='Port for the service')
+    parser.add_argument('--output', type=str, help='Write the results as JSON to this file')
+    args = parser.parse_args()
+
+    stub = MockOllama(latency=args.llm_latency, error_rate=args.llm_error_rate).start()
+    workdir = tempfile.mkdtemp(prefix="service-load-")
+    env = dict(os.environ, OLLAMA_HOST=stub.host, PYTHONPATH=ROOT)
+    log = open(os.path.join(workdir, "service.log"), "w")
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "service.py"), "--port", str(args.port),
+         "--llm_workers", str(args.llm_workers), "--threshold", "50"],
+        cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT
+    )
+    base_url = f"http://127.0.0.1:{args.port}"
+
+    try:
+        wait_until_ready(base_url, process)
+        print(f"Service ready (mock model latency {args.llm_latency}, {args.llm_workers} LLM workers)\n")
+
+        status, job, _ = request(base_url, "POST", "/jobs", {"title": "Senior Python Developer",
+                                                              "company": "Example", "description": JOB_DESCRIPTION})
+        if status != 200:
+            raise RuntimeError(f"Creating the job failed: {job}")
+        job_id = job["job_id"]
+
+        rng = random.Random(7)
+        resumes = [make_profile(rng, i)[1] for i in range(args.resumes)]
+
+        results = []
+        upload_calls = [
+            lambda text=text, i=i: request(base_url, "POST", "/upload", {
+                "filename": f"resume_{i}.txt", "content": base64.b64encode(text.encode("utf-8")).decode("ascii")})
+            for i, text in enumerate(resumes)
+        ]
+        summary, uploads = run_phase("upload", upload_calls, args.concurrency)
+        results.append(summary)
+
+        upload_ids = [body["upload_id"] for status, body, _ in uploads if status == 200]
+        parse_calls = [lambda upload_id=upload_id: request(base_url, "POST", "/parse", {"upload_id": upload_id})
+                       for upload_id in upload_ids]
+        summary, _ = run_phase("parse", parse_calls, args.concurrency)
+        summary["max_concurrent_llm_calls"] = stub.max_in_flight
+        results.append(summary)
+
+        match_calls = [lambda: request(base_url, "POST", "/match", {"job_id": job_id, "top_k": 10})
+                       for _ in range(args.matches)]
+        summary, _ = run_phase("match", match_calls, args.concurrency)
+        results.append(summary)
+
+        shortlist_calls = [lambda: request(base_url, "GET", f"/shortlist?job_id={job_id}")
+                           for _ in range(args.matches)]
+        summary, _ = run_phase("shortlist", shortlist_calls, args.concurrency)
+        results.append(summary)
+
+        print(f"\nMock model: {stub.format_stats()} "
+              f"(service limit {args.llm_workers})")
+
+        if args.output:
+            with open(args.output, "w") as file:
+                json.dump({"settings": vars(args), "results": results}, file, indent=2)
+            print(f"Results written to {args.output}")
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+        log.close()
+        stub.stop()
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,5 @@
+import os
+
 class Config:
     """Configuration settings for the Job Screening System"""
     
@@ -7,6 +9,40 @@ class Config:
     # Ollama settings
     DEFAULT_MODEL = "mistral"
     ALTERNATIVE_MODELS = ["llama2", "gemma", "phi2"]
+    LLM_HOST = os.environ.get("OLLAMA_HOST")  # None uses the Ollama default (localhost:11434)
+    LLM_TIMEOUT = 300.0  # Seconds before a chat request fails
+    
+    # Model routing (--route_models): per task, models from the cheapest up, each with
+    # the longest prompt in characters it handles well (None: any length). Prompts go to
+    # the first model that fits, unless its recorded latency profile predicts more than
+    # the task's budget; then the fastest profiled model of the route or
+    # ALTERNATIVE_MODELS is used instead
+    MODEL_ROUTES = {
+        "jd": [("phi2", 3500), (DEFAULT_MODEL, None)],
+        "cv": [("phi2", 2500), (DEFAULT_MODEL, None)],
+        "email": [("phi2", None), (DEFAULT_MODEL, None)],
+    }
+    MODEL_LATENCY_BUDGETS = {"jd": 30.0, "cv": 60.0, "email": 15.0}  # Seconds
+    MODEL_PROFILE_FILE = "model_profiles.json"  # Latency profiles, recorded on every LLM call
+    
+    # Prompt compression: documents go into prompts with runs of whitespace collapsed
+    # and without these sections (labels from utils/sections.py)
+    COMPRESS_PROMPTS = True
+    PROMPT_DROP_SECTIONS = {"cv": ("references", "interests"), "jd": ("about", "benefits")}
+    
+    # LLM circuit breaker: after this many consecutive failed or slower-than-SLO
+    # requests, agents use their regex extractors until a probe request succeeds
+    LLM_FAILURE_THRESHOLD = 5
+    LLM_LATENCY_SLO = 120.0  # Seconds
+    LLM_PROBE_INTERVAL = 10.0  # Seconds before the first probe, doubled after each failed one
+    LLM_MAX_PROBE_INTERVAL = 300.0
+    
+    # Adaptive LLM concurrency: requests in flight grow by one while latency stays
+    # within LLM_LATENCY_TOLERANCE times its best recent value, and shrink when it rises
+    LLM_INITIAL_CONCURRENCY = 4
+    LLM_MIN_CONCURRENCY = 1
+    LLM_MAX_CONCURRENCY = 16
+    LLM_LATENCY_TOLERANCE = 1.5
     
     # Matching settings
     DEFAULT_THRESHOLD = 70.0  # Default match threshold (0-100)
@@ -16,9 +52,31 @@ class Config:
         "education": 0.2,  # Weight of education score in overall match
     }
     
+    # Bulk screening (--no_llm): worker processes extract and parse resumes with the regex
+    # extractors and the skill dictionary, BULK_CHUNK_SIZE resumes per task, and profiles
+    # are written in large batches
+    BULK_CHUNK_SIZE = 50
+    BULK_WRITE_BATCH_SIZE = 2000
+    BULK_MAX_PENDING_WRITES = 20000  # Records queued for the writer before the parsers wait
+    
     # File handling settings
     SUPPORTED_FORMATS = ['.pdf', '.docx', '.doc', '.txt', '.rtf']
     
     # Interview scheduling settings
     MIN_DAYS_AHEAD = 3  # Minimum days ahead to schedule interviews
     DEFAULT_SLOTS = 3  # Default number of time slots to offer
+    INTERVIEW_MINUTES = 60  # Length of an interview
+    INTERVIEW_BUFFER_MINUTES = 15  # Free time an interviewer keeps between two interviews
+    SCHEDULING_HORIZON_DAYS = 28  # Days of weekly interviewer availability to allocate slots from
+    EMAIL_MODE = "llm"  # "llm": one generated email per candidate; "template": one cached template per job
+    EMAIL_TONE = "professional but friendly"
+    
+    # Invitation outbox (dispatch_outbox.py): emails are queued with the interviews
+    # and sent in batches; failed sends are retried with exponential backoff
+    EMAIL_SENDER = "file:sent_mail"  # "file:DIR" writes .eml files; "smtp://host:port" (e.g. a local debugging server)
+    EMAIL_FROM = "recruiting@example.com"
+    OUTBOX_BATCH_SIZE = 200
+    OUTBOX_MAX_ATTEMPTS = 5  # Attempts before a message is marked failed
+    OUTBOX_RETRY_SECONDS = 30.0  # Wait before the first retry, doubled after each failed attempt
+    OUTBOX_MAX_RETRY_SECONDS = 3600.0
+    OUTBOX_LEASE_SECONDS = 300.0  # A batch claimed by a dispatcher that died is retried after this
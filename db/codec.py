@@ -0,0 +1,131 @@
+# File: db/codec.py
+# Compact binary encoding for candidate profile columns
+
+import json
+import zlib
+
+# Payload kinds (first byte of an encoded value)
+STRINGS = 0x01   # List of strings joined by the unit separator
+RECORDS = 0x02   # List of dicts sharing the same keys, one row per dict
+JSON = 0x03      # Anything else, as compact JSON
+TEXT = 0x04      # Plain text
+COMPRESSED = 0x80  # Flag: payload is zlib-compressed
+
+# Payloads larger than this are compressed
+COMPRESS_MIN_BYTES = 256
+
+_UNIT = "\x1f"    # Separates values
+_RECORD = "\x1e"  # Separates rows
+_INT = "\x01"     # Prefix of an integer value inside a record
+_NONE = "\x02"    # A None value inside a record
+_RESERVED = (_UNIT, _RECORD, _INT, _NONE)
+
+def _plain_string(value):
+    """Check that a string can be stored without escaping"""
+    return isinstance(value, str) and not any(c in value for c in _RESERVED)
+
+def _encode_record_value(value):
+    if value is None:
+        return _NONE
+    if isinstance(value, int) and not isinstance(value, bool):
+        return _INT + str(value)
+    if _plain_string(value):
+        return value
+    raise ValueError("Value cannot be stored in a record")
+
+def _decode_record_value(value):
+    if value and value[0] < " ":
+        if value == _NONE:
+            return None
+        if value[0] == _INT:
+            return int(value[1:])
+    return value
+
+def _pack(kind, payload):
+    if len(payload) > COMPRESS_MIN_BYTES:
+        return bytes([kind | COMPRESSED]) + zlib.compress(payload)
+    return bytes([kind]) + payload
+
+def _encode_strings(values):
+    if not all(_plain_string(value) and value for value in values):
+        return None
+    return _UNIT.join(values).encode("utf-8")
+
+def _encode_records(values):
+    if not values or not all(isinstance(value, dict) for value in values):
+        return None
+
+    keys = list(values[0].keys())
+    if not all(_plain_string(key) and key for key in keys):
+        return None
+
+    rows = [_UNIT.join(keys)]
+    try:
+        for value in values:
+            if list(value.keys()) != keys:
+                return None
+            rows.append(_UNIT.join(_encode_record_value(value[key]) for key in keys))
+    except ValueError:
+        return None
+    return _RECORD.join(rows).encode("utf-8")
+
+def encode_field(value):
+    """Encode a structured profile field (skills, experience, education) as bytes"""
+    if isinstance(value, list):
+        payload = _encode_strings(value)
+        if payload is not None:
+            return _pack(STRINGS, payload)
+
+        payload = _encode_records(value)
+        if payload is not None:
+            return _pack(RECORDS, payload)
+
+    return _pack(JSON, json.dumps(value, separators=(",", ":")).encode("utf-8"))
+
+def decode_field(value, default=None):
+    """Decode a structured field stored with encode_field or as a JSON string"""
+    if value is None or value == "" or value == b"":
+        return default
+
+    # Rows written without compact storage hold plain JSON text
+    if isinstance(value, str):
+        return json.loads(value)
+
+    kind = value[0]
+    payload = value[1:]
+    if kind & COMPRESSED:
+        payload = zlib.decompress(payload)
+        kind &= ~COMPRESSED
+
+    if kind == STRINGS:
+        return payload.decode("utf-8").split(_UNIT) if payload else []
+
+    if kind == RECORDS:
+        rows = payload.decode("utf-8").split(_RECORD)
+        keys = rows[0].split(_UNIT)
+        return [
+            dict(zip(keys, map(_decode_record_value, row.split(_UNIT))))
+            for row in rows[1:]
+        ]
+
+    if kind == JSON:
+        return json.loads(payload)
+
+    raise ValueError(f"Unknown encoded field kind: {kind}")
+
+def encode_text(text):
+    """Encode a large text column, compressing it when it is big enough"""
+    if text is None:
+        return None
+    return _pack(TEXT, text.encode("utf-8"))
+
+def decode_text(value):
+    """Decode a text column stored with encode_text or as a plain string"""
+    if value is None or isinstance(value, str):
+        return value
+
+    kind = value[0]
+    payload = value[1:]
+    if kind & COMPRESSED:
+        payload = zlib.decompress(payload)
+    return payload.decode("utf-8")
@@ -0,0 +1,114 @@
+# File: db/columnar.py
+# Columnar in-memory candidate store for matching large talent pools
+
+from array import array
+from db.database import iter_candidate_changes, CANDIDATE_PAGE_SIZE
+
+NO_EDUCATION = -1  # Education level of a candidate without any education entries
+
+class ColumnarCandidateStore:
+    """Candidate features for matching, held in contiguous arrays
+
+    Each candidate is a row: years of experience and education level are
+    array columns, and skills are stored CSR-style, as one flat array of
+    skill IDs with a per-row offset array. Skill names are interned into a
+    shared vocabulary, so each distinct skill string is held once.
+
+    The store is loaded once from SQLite with load() and kept up to date
+    with refresh(), which only reads candidates written since the last
+    load or refresh. An updated candidate gets a new row and its old row
+    is marked dead.
+    """
+
+    def __init__(self, page_size=CANDIDATE_PAGE_SIZE):
+        self.page_size = page_size
+        self._reset()
+
+    def _reset(self):
+        self.candidate_ids = []
+        self.names = []
+        self.years = array('d')
+        self.education_levels = array('b')
+        self.skill_offsets = array('q', [0])
+        self.skill_ids = array('l')
+        self.alive = bytearray()
+
+        self.skill_names = []  # Skill ID -> skill name
+        self.skill_names_lower = []  # Skill ID -> lowercased skill name
+        self._skill_index = {}  # Skill name -> skill ID
+        self._row_of = {}  # Candidate ID -> live row
+        self.last_change_seq = 0
+
+    def __len__(self):
+        return len(self._row_of)
+
+    def __contains__(self, candidate_id):
+        return candidate_id in self._row_of
+
+    def _intern_skill(self, skill):
+        skill_id = self._skill_index.get(skill)
+        if skill_id is None:
+            skill_id = len(self.skill_names)
+            self._skill_index[skill] = skill_id
+            self.skill_names.append(skill)
+            self.skill_names_lower.append(skill.lower())
+        return skill_id
+
+    def _append(self, candidate):
+        """Add a candidate as a new row, retiring its previous row if any"""
+        old_row = self._row_of.get(candidate.candidate_id)
+        if old_row is not None:
+            self.alive[old_row] = 0
+
+        row = len(self.candidate_ids)
+        self._row_of[candidate.candidate_id] = row
+        self.candidate_ids.append(candidate.candidate_id)
+        self.names.append(candidate.name)
+        self.years.append(candidate.experience_years())
+        self.education_levels.append(candidate.education_level() if candidate.education else NO_EDUCATION)
+        self.skill_ids.extend(self._intern_skill(skill) for skill in candidate.skills)
+        self.skill_offsets.append(len(self.skill_ids))
+        self.alive.append(1)
+
+    def _ingest(self, changes):
+        count = 0
+        for change_seq, candidate in changes:
+            self._append(candidate)
+            if change_seq is not None and change_seq > self.last_change_seq:
+                self.last_change_seq = change_seq
+            count += 1
+        return count
+
+    def load(self):
+        """Load every candidate from the database, replacing the current contents"""
+        self._reset()
+        return self._ingest(iter_candidate_changes(None, self.page_size))
+
+    def refresh(self):
+        """Load candidates written since the last load or refresh
+
+        Returns the number of rows read. When dead rows outnumber live ones,
+        the store is rebuilt from scratch to reclaim the space.
+        """
+        count = self._ingest(iter_candidate_changes(self.last_change_seq, self.page_size))
+        if len(self.candidate_ids) > 2 * len(self._row_of) + 1000:
+            self.load()
+        return count
+
+    def rows(self, candidate_ids=None):
+        """Yield the live row index of every candidate, or of the given IDs"""
+        if not candidate_ids:
+            for row, alive in enumerate(self.alive):
+                if alive:
+                    yield row
+        else:
+            if isinstance(candidate_ids, str):
+                candidate_ids = [candidate_ids]
+            for candidate_id in sorted(set(candidate_ids)):
+                row = self._row_of.get(candidate_id)
+                if row is not None:
+                    yield row
+
+    def skills_of(self, row):
+        """Skill IDs of a row, as a slice of the flat skill array"""
+        return self.skill_ids[self.skill_offsets[row]:self.skill_offsets[row + 1]]
@@ -1,10 +1,28 @@
 import os
 import sqlite3
 import json
+import itertools
 from datetime import datetime
+from config import Config
+from utils import metrics
+from utils.near_duplicate import signature_to_bytes, signature_from_bytes
+from db.codec import encode_field, decode_field, encode_text, decode_text
+from db.models import Job, Candidate, JobRequirements, Experience, Run, OutboxMessage
 
 # Database file
-DB_FILE = "recruitment_system.db"
+DB_FILE = Config.DB_FILE
+
+# Number of candidate rows fetched per page when streaming profiles
+CANDIDATE_PAGE_SIZE = 500
+
+# Store profile fields in the compact binary encoding and compress large text
+# columns (see db/codec.py). Rows written either way can be read back.
+COMPACT_STORAGE = False
+
+def set_compact_storage(enabled):
+    """Choose between JSON text columns and compact binary storage for new rows"""
+    global COMPACT_STORAGE
+    COMPACT_STORAGE = enabled
 
 def get_connection():
     """Get SQLite connection"""
@@ -25,7 +43,10 @@ def setup_database():
             title TEXT,
             company TEXT,
             description TEXT,
-            date_posted DATE
+            date_posted DATE,
+            content_hash TEXT,
+            description_hash TEXT,
+            status TEXT
         )
     ''')
     
@@ -52,7 +73,20 @@ def setup_database():
             skills TEXT,
             experience TEXT,
             education TEXT,
-            resume_text TEXT
+            resume_text TEXT,
+            content_hash TEXT,
+            duplicate_of TEXT,
+            experience_details TEXT,
+            change_seq INTEGER
+        )
+    ''')
+    
+    # Create resume signatures table (MinHash signatures for near-duplicate detection)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS resume_signatures (
+            candidate_id TEXT PRIMARY KEY,
+            signature BLOB,
+            FOREIGN KEY (candidate_id) REFERENCES candidates (candidate_id)
         )
     ''')
     
@@ -82,82 +116,446 @@ def setup_database():
             proposed_dates TEXT,
             status TEXT,
             notes TEXT,
+            proposed_slots TEXT,
             FOREIGN KEY (job_id) REFERENCES jobs (job_id),
             FOREIGN KEY (candidate_id) REFERENCES candidates (candidate_id)
         )
     ''')
     
+    # Create interviewer availability table (weekly or one-off windows, see utils/slot_allocator.py)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS interviewer_availability (
+            interviewer TEXT,
+            days TEXT,
+            start_time TEXT,
+            end_time TEXT
+        )
+    ''')
+    
+    # Create outbox table (invitation emails waiting to be sent, see db/outbox.py)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS outbox (
+            message_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            idempotency_key TEXT UNIQUE,
+            interview_id INTEGER,
+            recipient TEXT,
+            subject TEXT,
+            body TEXT,
+            status TEXT,
+            attempts INTEGER DEFAULT 0,
+            next_attempt_at TIMESTAMP,
+            last_error TEXT,
+            created_at TIMESTAMP,
+            sent_at TIMESTAMP,
+            FOREIGN KEY (interview_id) REFERENCES interviews (interview_id)
+        )
+    ''')
+    
+    # Create email templates table (one invitation template per job title, company and tone)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS email_templates (
+            template_key TEXT PRIMARY KEY,
+            job_title TEXT,
+            company TEXT,
+            tone TEXT,
+            model TEXT,
+            body TEXT,
+            created_at TIMESTAMP
+        )
+    ''')
+    
+    # Create batch runs table (arguments and status of each run, for --resume)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS runs (
+            run_id TEXT PRIMARY KEY,
+            kind TEXT,
+            params TEXT,
+            status TEXT,
+            started_at TIMESTAMP,
+            finished_at TIMESTAMP
+        )
+    ''')
+    
+    # Create run checkpoints table (one row per resume or job a run has handled)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS run_checkpoints (
+            run_id TEXT,
+            stage TEXT,
+            item_key TEXT,
+            status TEXT,
+            error TEXT,
+            updated_at TIMESTAMP,
+            PRIMARY KEY (run_id, stage, item_key),
+            FOREIGN KEY (run_id) REFERENCES runs (run_id)
+        )
+    ''')
+    
+    # Bring databases created by older versions up to date
+    _add_missing_columns(cursor, "jobs", {"content_hash": "TEXT", "description_hash": "TEXT",
+                                              "status": "TEXT"})
+    _add_missing_columns(cursor, "candidates", {"content_hash": "TEXT", "duplicate_of": "TEXT",
+                                                    "experience_details": "TEXT", "change_seq": "INTEGER"})
+    _add_missing_columns(cursor, "interviews", {"proposed_slots": "TEXT"})
+    
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_jobs_content_hash ON jobs (content_hash)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_jobs_description_hash ON jobs (description_hash)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_candidates_content_hash ON candidates (content_hash)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_candidates_change_seq ON candidates (change_seq)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox (status, next_attempt_at)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_interviews_job_candidate ON interviews (job_id, candidate_id)')
+    
+    # One requirements row and one match row per job (and candidate), so reruns upsert
+    _create_unique_index(cursor, "idx_job_requirements_job", "job_requirements", "requirement_id", ["job_id"])
+    _create_unique_index(cursor, "idx_match_results_job_candidate", "match_results", "match_id", ["job_id", "candidate_id"])
+    
     conn.commit()
     conn.close()
 
-def store_job(job_id, title, company, description):
-    """Store job in database"""
+def _add_missing_columns(cursor, table, columns):
+    """Add columns that are missing from an existing table"""
+    cursor.execute(f"PRAGMA table_info({table})")
+    existing = {row[1] for row in cursor.fetchall()}
+    
+    for column, column_type in columns.items():
+        if column not in existing:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+
+def _create_unique_index(cursor, index_name, table, id_column, key_columns):
+    """Create a unique index, first dropping older duplicate rows (the newest row wins)"""
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", (index_name,))
+    if cursor.fetchone():
+        return
+    
+    keys = ", ".join(key_columns)
+    cursor.execute(f'''
+        DELETE FROM {table}
+        WHERE {id_column} NOT IN (
+            SELECT MAX({id_column}) FROM {table} GROUP BY {keys}
+        )
+    ''')
+    cursor.execute(f"CREATE UNIQUE INDEX {index_name} ON {table} ({keys})")
+
+def fingerprint_to_id(prefix, content_hash):
+    """Build a stable job or candidate ID from a content fingerprint"""
+    return f"{prefix}_{content_hash[:16]}"
+
+STORE_JOB_SQL = '''
+    INSERT INTO jobs (job_id, title, company, description, date_posted, content_hash, description_hash)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (job_id) DO UPDATE SET
+        title = excluded.title,
+        company = excluded.company,
+        description = excluded.description,
+        content_hash = COALESCE(excluded.content_hash, jobs.content_hash),
+        description_hash = COALESCE(excluded.description_hash, jobs.description_hash)
+'''
+
+STORE_JOB_REQUIREMENTS_SQL = '''
+    INSERT INTO job_requirements (job_id, skills, experience, education, responsibilities)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT (job_id) DO UPDATE SET
+        skills = excluded.skills,
+        experience = excluded.experience,
+        education = excluded.education,
+        responsibilities = excluded.responsibilities
+'''
+
+STORE_CANDIDATE_SQL = '''
+    INSERT INTO candidates (candidate_id, name, email, phone, skills, experience, education,
+                            content_hash, duplicate_of, experience_details, resume_text, change_seq)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?,
+            (SELECT COALESCE(MAX(change_seq), 0) + 1 FROM candidates))
+    ON CONFLICT (candidate_id) DO UPDATE SET
+        name = excluded.name,
+        email = excluded.email,
+        phone = excluded.phone,
+        skills = excluded.skills,
+        experience = excluded.experience,
+        education = excluded.education,
+        content_hash = COALESCE(excluded.content_hash, candidates.content_hash),
+        duplicate_of = excluded.duplicate_of,
+        experience_details = excluded.experience_details,
+        resume_text = COALESCE(excluded.resume_text, candidates.resume_text),
+        change_seq = excluded.change_seq
+'''
+
+STORE_MATCH_RESULT_SQL = '''
+    INSERT INTO match_results (
+        job_id, candidate_id, skills_score, experience_score, 
+        education_score, overall_score, shortlisted, match_date
+    )
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (job_id, candidate_id) DO UPDATE SET
+        skills_score = excluded.skills_score,
+        experience_score = excluded.experience_score,
+        education_score = excluded.education_score,
+        overall_score = excluded.overall_score,
+        shortlisted = excluded.shortlisted,
+        match_date = excluded.match_date
+'''
+
+STORE_RESUME_SIGNATURE_SQL = '''
+    INSERT INTO resume_signatures (candidate_id, signature)
+    VALUES (?, ?)
+    ON CONFLICT (candidate_id) DO UPDATE SET signature = excluded.signature
+'''
+
+STORE_INTERVIEW_SQL = '''
+    INSERT INTO interviews (job_id, candidate_id, proposed_dates, status, proposed_slots)
+    VALUES (?, ?, ?, ?, ?)
+'''
+
+STORE_RUN_CHECKPOINT_SQL = '''
+    INSERT INTO run_checkpoints (run_id, stage, item_key, status, error, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT (run_id, stage, item_key) DO UPDATE SET
+        status = excluded.status,
+        error = excluded.error,
+        updated_at = excluded.updated_at
+'''
+
+def job_row(job_id, title, company, description, content_hash=None, description_hash=None):
+    """Build the parameters for STORE_JOB_SQL"""
+    if COMPACT_STORAGE:
+        description = encode_text(description)
+    return (job_id, title, company, description, datetime.now().date(), content_hash, description_hash)
+
+def job_requirements_row(requirements):
+    """Build the parameters for STORE_JOB_REQUIREMENTS_SQL from a JobRequirements"""
+    # Convert lists to JSON strings for storage
+    return (
+        requirements.job_id,
+        json.dumps(requirements.skills),
+        requirements.experience,
+        requirements.education,
+        json.dumps(requirements.responsibilities)
+    )
+
+def candidate_row(candidate, content_hash=None, duplicate_of=None):
+    """Build the parameters for STORE_CANDIDATE_SQL from a Candidate"""
+    experience_details = None
+    resume_text = candidate.resume_text or None
+    
+    if COMPACT_STORAGE:
+        # Descriptions go to their own column, so loading profiles for matching never decodes them
+        skills_value = encode_field(candidate.skills)
+        experience_value = encode_field([exp.to_dict(include_description=False) for exp in candidate.experience])
+        education_value = encode_field([edu.to_dict() for edu in candidate.education])
+        
+        descriptions = [exp.description for exp in candidate.experience]
+        if any(descriptions):
+            experience_details = encode_field(descriptions)
+        resume_text = encode_text(resume_text)
+    else:
+        # Convert complex structures to JSON strings for storage
+        skills_value = json.dumps(candidate.skills)
+        experience_value = json.dumps([exp.to_dict() for exp in candidate.experience])
+        education_value = json.dumps([edu.to_dict() for edu in candidate.education])
+    
+    return (
+        candidate.candidate_id,
+        candidate.name,
+        candidate.email,
+        candidate.phone,
+        skills_value,
+        experience_value,
+        education_value,
+        content_hash,
+        duplicate_of,
+        experience_details,
+        resume_text
+    )
+
+def match_result_row(match_result):
+    """Build the parameters for STORE_MATCH_RESULT_SQL from a MatchResult"""
+    return (
+        match_result.job_id,
+        match_result.candidate_id,
+        match_result.skills_score,
+        match_result.experience_score,
+        match_result.education_score,
+        match_result.overall_score,
+        1 if match_result.shortlisted else 0,
+        match_result.match_date or datetime.now().date()
+    )
+
+def resume_signature_row(candidate_id, signature):
+    """Build the parameters for STORE_RESUME_SIGNATURE_SQL"""
+    return (candidate_id, signature_to_bytes(signature))
+
+def interview_row(job_id, candidate_id, proposed_dates, status, proposed_slots=None):
+    """Build the parameters for STORE_INTERVIEW_SQL; proposed_slots are Slots from utils/slot_allocator.py"""
+    # Convert date list to JSON string
+    slots = json.dumps([slot.to_dict() for slot in proposed_slots]) if proposed_slots else None
+    return (job_id, candidate_id, json.dumps(proposed_dates), status, slots)
+
+def run_checkpoint_row(run_id, stage, item_key, status="done", error=None):
+    """Build the parameters for STORE_RUN_CHECKPOINT_SQL"""
+    return (run_id, stage, item_key, status, error, datetime.now())
+
+@metrics.timed("db_write_seconds", table="jobs")
+def store_job(job_id, title, company, description, content_hash=None, description_hash=None):
+    """Store job in database, updating it if the job already exists"""
     conn = get_connection()
     cursor = conn.cursor()
     
-    cursor.execute('''
-        INSERT INTO jobs (job_id, title, company, description, date_posted)
-        VALUES (?, ?, ?, ?, ?)
-    ''', (job_id, title, company, description, datetime.now().date()))
+    cursor.execute(STORE_JOB_SQL, job_row(job_id, title, company, description, content_hash, description_hash))
     
     conn.commit()
     conn.close()
 
-def store_job_requirements(job_id, requirements):
+@metrics.timed("db_write_seconds", table="job_requirements")
+def store_job_requirements(requirements):
     """Store job requirements in database"""
     conn = get_connection()
     cursor = conn.cursor()
     
-    # Convert lists to JSON strings for storage
-    skills_json = json.dumps(requirements.get("skills", []))
-    responsibilities_json = json.dumps(requirements.get("responsibilities", []))
+    cursor.execute(STORE_JOB_REQUIREMENTS_SQL, job_requirements_row(requirements))
+    
+    conn.commit()
+    conn.close()
+    
+    return requirements
+
+@metrics.timed("db_write_seconds", table="candidates")
+def store_candidate_profile(candidate, content_hash=None, duplicate_of=None):
+    """Store a Candidate in database, updating it if the candidate already exists"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute(STORE_CANDIDATE_SQL, candidate_row(candidate, content_hash, duplicate_of))
+    
+    conn.commit()
+    conn.close()
+    
+    return candidate
+
+@metrics.timed("db_write_seconds", table="resume_signatures")
+def store_resume_signature(candidate_id, signature):
+    """Store the MinHash signature of a candidate's resume"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute(STORE_RESUME_SIGNATURE_SQL, resume_signature_row(candidate_id, signature))
+    
+    conn.commit()
+    conn.close()
+
+def set_job_status(job_ids, status):
+    """Set the status of jobs, e.g. "open" while the watch daemon should match new candidates to them"""
+    if isinstance(job_ids, str):
+        job_ids = [job_ids]
+    
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.executemany('UPDATE jobs SET status = ? WHERE job_id = ?', [(status, job_id) for job_id in job_ids])
+    
+    conn.commit()
+    conn.close()
+
+def get_open_jobs():
+    """Get {job_id: title} for every open job"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute("SELECT job_id, title FROM jobs WHERE status = 'open' ORDER BY job_id")
+    jobs = dict(cursor.fetchall())
+    conn.close()
+    
+    return jobs
+
+def create_run(kind, params):
+    """Record the start of a batch run and return its ID"""
+    run_id = f"run_{datetime.now():%Y%m%d_%H%M%S}_{os.urandom(3).hex()}"
+    
+    conn = get_connection()
+    cursor = conn.cursor()
     
     cursor.execute('''
-        INSERT INTO job_requirements (job_id, skills, experience, education, responsibilities)
+        INSERT INTO runs (run_id, kind, params, status, started_at)
         VALUES (?, ?, ?, ?, ?)
-    ''', (
-        job_id,
-        skills_json,
-        requirements.get("experience", ""),
-        requirements.get("education", ""),
-        responsibilities_json
-    ))
+    ''', (run_id, kind, json.dumps(params), "running", datetime.now()))
     
     conn.commit()
     conn.close()
     
-    return requirements
+    return run_id
 
-def store_candidate_profile(candidate_id, profile):
-    """Store candidate profile in database"""
+def get_run(run_id):
+    """Get a batch run as a Run, or None if it does not exist"""
     conn = get_connection()
     cursor = conn.cursor()
     
-    # Convert complex structures to JSON strings for storage
-    skills_json = json.dumps(profile.get("skills", []))
-    experience_json = json.dumps(profile.get("experience", []))
-    education_json = json.dumps(profile.get("education", []))
+    cursor.execute('''
+        SELECT run_id, kind, params, status, started_at, finished_at
+        FROM runs
+        WHERE run_id = ?
+    ''', (run_id,))
     
+    row = cursor.fetchone()
+    conn.close()
+    
+    return Run.from_row(row) if row else None
+
+def update_run_status(run_id, status):
+    """Set the status of a batch run ("running", "completed", "incomplete" or "failed")"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    finished_at = None if status == "running" else datetime.now()
     cursor.execute('''
-        INSERT INTO candidates (candidate_id, name, email, phone, skills, experience, education)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-    ''', (
-        candidate_id,
-        profile.get("name", "Unknown"),
-        profile.get("contact", {}).get("email", ""),
-        profile.get("contact", {}).get("phone", ""),
-        skills_json,
-        experience_json,
-        education_json
-    ))
+        UPDATE runs SET status = ?, finished_at = ? WHERE run_id = ?
+    ''', (status, finished_at, run_id))
+    
+    conn.commit()
+    conn.close()
+
+@metrics.timed("db_write_seconds", table="run_checkpoints")
+def store_run_checkpoint(run_id, stage, item_key, status="done", error=None):
+    """Record that a run has completed (or failed on) one item of a stage"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute(STORE_RUN_CHECKPOINT_SQL, run_checkpoint_row(run_id, stage, item_key, status, error))
     
     conn.commit()
     conn.close()
+
+def get_run_checkpoints(run_id, stage, status="done"):
+    """Return the keys of the items of a stage that a run has checkpointed with a status"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute('''
+        SELECT item_key FROM run_checkpoints
+        WHERE run_id = ? AND stage = ? AND status = ?
+    ''', (run_id, stage, status))
+    
+    keys = {row[0] for row in cursor.fetchall()}
+    conn.close()
+    
+    return keys
+
+def iter_resume_signatures(page_size=CANDIDATE_PAGE_SIZE):
+    """Yield (candidate_id, signature) pairs for every stored resume signature"""
+    conn = get_connection()
+    cursor = conn.cursor()
     
-    return profile
+    try:
+        cursor.execute('SELECT candidate_id, signature FROM resume_signatures')
+        while True:
+            rows = cursor.fetchmany(page_size)
+            if not rows:
+                break
+            for row in rows:
+                yield row[0], signature_from_bytes(row[1])
+    finally:
+        conn.close()
 
+@metrics.timed("db_query_seconds", query="job_requirements")
 def get_job_requirements(job_id):
-    """Get job requirements from database"""
+    """Get job requirements from database as a JobRequirements (empty if none are stored)"""
     conn = get_connection()
     cursor = conn.cursor()
     
@@ -171,98 +569,224 @@ def get_job_requirements(job_id):
     conn.close()
     
     if not row:
-        return {
-            "skills": [],
-            "experience": "",
-            "education": "",
-            "responsibilities": []
-        }
+        return JobRequirements(job_id)
     
-    # Parse JSON strings back to Python objects
-    skills = json.loads(row[0]) if row[0] else []
-    responsibilities = json.loads(row[3]) if row[3] else []
+    return JobRequirements.from_row(job_id, row)
+
+def job_requirements_exist(job_id):
+    """Check whether requirements have already been extracted for a job"""
+    conn = get_connection()
+    cursor = conn.cursor()
     
-    return {
-        "skills": skills,
-        "experience": row[1] if row[1] else "",
-        "education": row[2] if row[2] else "",
-        "responsibilities": responsibilities
-    }
+    cursor.execute('SELECT 1 FROM job_requirements WHERE job_id = ?', (job_id,))
+    exists = cursor.fetchone() is not None
+    conn.close()
+    
+    return exists
 
-def get_candidate_profiles(candidate_ids=None):
-    """Get candidate profiles from database"""
+@metrics.timed("db_query_seconds", query="job_requirements_by_description")
+def find_job_requirements_by_description(description_hash):
+    """Get the JobRequirements of any job with the same normalized description, or None"""
     conn = get_connection()
     cursor = conn.cursor()
     
-    if candidate_ids:
-        # Convert list to tuple for SQL IN clause
-        if isinstance(candidate_ids, list):
-            placeholders = ','.join(['?'] * len(candidate_ids))
-            cursor.execute(f'''
-                SELECT candidate_id, name, email, phone, skills, experience, education
-                FROM candidates
-                WHERE candidate_id IN ({placeholders})
-            ''', candidate_ids)
+    cursor.execute('''
+        SELECT r.job_id, r.skills, r.experience, r.education, r.responsibilities
+        FROM jobs j JOIN job_requirements r ON r.job_id = j.job_id
+        WHERE j.description_hash = ?
+        LIMIT 1
+    ''', (description_hash,))
+    
+    row = cursor.fetchone()
+    conn.close()
+    
+    return JobRequirements.from_row(row[0], row[1:]) if row else None
+
+@metrics.timed("db_query_seconds", query="known_candidate_ids")
+def get_known_candidate_ids(candidate_ids):
+    """Return the subset of candidate IDs that are already stored"""
+    ids = list(candidate_ids)
+    known = set()
+    if not ids:
+        return known
+    
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    for start in range(0, len(ids), CANDIDATE_PAGE_SIZE):
+        page_ids = ids[start:start + CANDIDATE_PAGE_SIZE]
+        placeholders = ','.join(['?'] * len(page_ids))
+        cursor.execute(f'''
+            SELECT candidate_id FROM candidates WHERE candidate_id IN ({placeholders})
+        ''', page_ids)
+        known.update(row[0] for row in cursor.fetchall())
+    
+    conn.close()
+    return known
+
+def iter_candidate_profiles(candidate_ids=None, page_size=CANDIDATE_PAGE_SIZE):
+    """Yield (candidate_id, Candidate) pairs one page at a time
+    
+    Pages are fetched with keyset pagination on candidate_id, so only one
+    page of rows is held in memory no matter how large the table grows.
+    """
+    if candidate_ids is not None and not isinstance(candidate_ids, (list, tuple, set)):
+        # Single candidate ID
+        candidate_ids = [candidate_ids]
+    
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    try:
+        if candidate_ids:
+            # Query the requested IDs in page-sized IN clauses
+            ids = sorted(set(candidate_ids))
+            for start in range(0, len(ids), page_size):
+                page_ids = ids[start:start + page_size]
+                placeholders = ','.join(['?'] * len(page_ids))
+                cursor.execute(f'''
+                    SELECT candidate_id, name, email, phone, skills, experience, education
+                    FROM candidates
+                    WHERE candidate_id IN ({placeholders})
+                    ORDER BY candidate_id
+                ''', page_ids)
+                
+                with metrics.timer("db_query_seconds", query="candidate_page"):
+                    rows = cursor.fetchall()
+                for row in rows:
+                    yield row[0], Candidate.from_row(row)
         else:
-            # Single candidate ID
-            cursor.execute('''
-                SELECT candidate_id, name, email, phone, skills, experience, education
-                FROM candidates
-                WHERE candidate_id = ?
-            ''', (candidate_ids,))
-    else:
-        # Get all candidates
-        cursor.execute('''
-            SELECT candidate_id, name, email, phone, skills, experience, education
-            FROM candidates
-        ''')
+            # Walk all candidates, resuming after the last ID of the previous page
+            last_id = None
+            while True:
+                if last_id is None:
+                    cursor.execute('''
+                        SELECT candidate_id, name, email, phone, skills, experience, education
+                        FROM candidates
+                        ORDER BY candidate_id
+                        LIMIT ?
+                    ''', (page_size,))
+                else:
+                    cursor.execute('''
+                        SELECT candidate_id, name, email, phone, skills, experience, education
+                        FROM candidates
+                        WHERE candidate_id > ?
+                        ORDER BY candidate_id
+                        LIMIT ?
+                    ''', (last_id, page_size))
+                
+                with metrics.timer("db_query_seconds", query="candidate_page"):
+                    rows = cursor.fetchall()
+                if not rows:
+                    break
+                
+                for row in rows:
+                    yield row[0], Candidate.from_row(row)
+                
+                if len(rows) < page_size:
+                    break
+                last_id = rows[-1][0]
+    finally:
+        conn.close()
+
+def iter_candidate_changes(after_seq=None, page_size=CANDIDATE_PAGE_SIZE):
+    """Yield (change_seq, Candidate) pairs for candidates written after a change sequence
     
-    rows = cursor.fetchall()
+    Every insert or update of a candidate is stamped with a change sequence
+    that is higher than any committed before it, so a reader that remembers
+    the highest sequence it has seen can pick up later writes incrementally.
+    With after_seq=None every candidate is returned (rows written before change
+    sequences existed have a change_seq of None).
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    try:
+        last_key = None
+        while True:
+            if after_seq is None:
+                # Full scan, keyset-paginated on candidate_id
+                if last_key is None:
+                    cursor.execute('''
+                        SELECT candidate_id, name, email, phone, skills, experience, education, change_seq
+                        FROM candidates
+                        ORDER BY candidate_id
+                        LIMIT ?
+                    ''', (page_size,))
+                else:
+                    cursor.execute('''
+                        SELECT candidate_id, name, email, phone, skills, experience, education, change_seq
+                        FROM candidates
+                        WHERE candidate_id > ?
+                        ORDER BY candidate_id
+                        LIMIT ?
+                    ''', (last_key, page_size))
+            else:
+                # Incremental scan, keyset-paginated on change_seq
+                cursor.execute('''
+                    SELECT candidate_id, name, email, phone, skills, experience, education, change_seq
+                    FROM candidates
+                    WHERE change_seq > ?
+                    ORDER BY change_seq
+                    LIMIT ?
+                ''', (after_seq if last_key is None else last_key, page_size))
+            
+            with metrics.timer("db_query_seconds", query="candidate_changes_page"):
+                rows = cursor.fetchall()
+            for row in rows:
+                yield row[7], Candidate.from_row(row)
+            
+            if len(rows) < page_size:
+                break
+            last_key = rows[-1][0] if after_seq is None else rows[-1][7]
+    finally:
+        conn.close()
+
+@metrics.timed("db_query_seconds", query="candidate_details")
+def get_candidate_details(candidate_id):
+    """Get the columns that profile loading skips: full experience and resume text
+    
+    Returns a dict with a list of Experience (including descriptions) and the
+    resume text, or None if the candidate does not exist.
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute('''
+        SELECT experience, experience_details, resume_text
+        FROM candidates
+        WHERE candidate_id = ?
+    ''', (candidate_id,))
+    
+    row = cursor.fetchone()
     conn.close()
     
-    candidates = {}
-    for row in rows:
-        candidate_id = row[0]
-        
-        # Parse JSON strings back to Python objects
-        skills = json.loads(row[4]) if row[4] else []
-        experience = json.loads(row[5]) if row[5] else []
-        education = json.loads(row[6]) if row[6] else []
-        
-        candidates[candidate_id] = {
-            "name": row[1],
-            "contact": {
-                "email": row[2],
-                "phone": row[3]
-            },
-            "skills": skills,
-            "experience": experience,
-            "education": education
-        }
+    if not row:
+        return None
+    
+    experience = [Experience.from_dict(exp) for exp in decode_field(row[0], [])]
+    descriptions = decode_field(row[1], [])
     
-    return candidates
+    # Put descriptions stored separately back into their experience entries
+    for exp, description in zip(experience, descriptions):
+        exp.description = description
+    
+    return {
+        "experience": experience,
+        "resume_text": decode_text(row[2]) or ""
+    }
 
+def get_candidate_profiles(candidate_ids=None):
+    """Get candidates from database as a dict of candidate_id -> Candidate"""
+    return dict(iter_candidate_profiles(candidate_ids))
+
+@metrics.timed("db_write_seconds", table="match_results")
 def store_match_results(match_result):
     """Store match results in database"""
     conn = get_connection()
     cursor = conn.cursor()
     
-    cursor.execute('''
-        INSERT INTO match_results (
-            job_id, candidate_id, skills_score, experience_score, 
-            education_score, overall_score, shortlisted, match_date
-        )
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-    ''', (
-        match_result["job_id"],
-        match_result["candidate_id"],
-        match_result["skills_score"],
-        match_result["experience_score"],
-        match_result["education_score"],
-        match_result["overall_score"],
-        1 if match_result["shortlisted"] else 0,
-        datetime.now().date()
-    ))
+    cursor.execute(STORE_MATCH_RESULT_SQL, match_result_row(match_result))
     
     conn.commit()
     match_id = cursor.lastrowid
@@ -270,6 +794,23 @@ def store_match_results(match_result):
     
     return match_id
 
+def get_jobs():
+    """Get every stored job as a Job, without its description"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute('''
+        SELECT job_id, title, company, date_posted, status
+        FROM jobs
+        ORDER BY date_posted DESC, job_id
+    ''')
+    
+    rows = cursor.fetchall()
+    conn.close()
+    
+    return [Job(row[0], row[1] or "", row[2] or "", "", row[3], status=row[4]) for row in rows]
+
+@metrics.timed("db_query_seconds", query="shortlisted_candidates")
 def get_shortlisted_candidates(job_id):
     """Get shortlisted candidates for a job"""
     conn = get_connection()
@@ -298,21 +839,231 @@ def get_shortlisted_candidates(job_id):
     
     return shortlisted
 
-def update_interview_status(job_id, candidate_id, proposed_dates, status):
-    """Update interview status in database"""
+@metrics.timed("db_query_seconds", query="interview_statuses")
+def get_interview_statuses(job_id):
+    """Get the status of the latest interview of each candidate of a job, by candidate id"""
     conn = get_connection()
     cursor = conn.cursor()
     
-    # Convert date list to JSON string
-    dates_json = json.dumps(proposed_dates)
+    cursor.execute('''
+        SELECT candidate_id, status FROM interviews
+        WHERE job_id = ?
+        ORDER BY interview_id
+    ''', (job_id,))
+    rows = cursor.fetchall()
+    conn.close()
+    
+    return dict(rows)
+
+@metrics.timed("db_query_seconds", query="email_template")
+def get_email_template(template_key):
+    """Get the body of a stored email template, or None"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute("SELECT body FROM email_templates WHERE template_key = ?", (template_key,))
+    row = cursor.fetchone()
+    conn.close()
+    
+    return row[0] if row else None
+
+@metrics.timed("db_write_seconds", table="email_templates")
+def store_email_template(template_key, job_title, company, tone, model, body):
+    """Store an email template, replacing an older one with the same key"""
+    conn = get_connection()
+    cursor = conn.cursor()
     
     cursor.execute('''
-        INSERT INTO interviews (job_id, candidate_id, proposed_dates, status)
-        VALUES (?, ?, ?, ?)
-    ''', (job_id, candidate_id, dates_json, status))
+        INSERT INTO email_templates (template_key, job_title, company, tone, model, body, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (template_key) DO UPDATE SET model = excluded.model, body = excluded.body,
+            created_at = excluded.created_at
+    ''', (template_key, job_title, company, tone, model, body, datetime.now()))
+    
+    conn.commit()
+    conn.close()
+
+@metrics.timed("db_write_seconds", table="interviews")
+def update_interview_status(job_id, candidate_id, proposed_dates, status, proposed_slots=None):
+    """Update interview status in database"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute(STORE_INTERVIEW_SQL, interview_row(job_id, candidate_id, proposed_dates, status, proposed_slots))
     
     conn.commit()
     interview_id = cursor.lastrowid
     conn.close()
     
-    return interview_id
\ No newline at end of file
+    return interview_id
+
+@metrics.timed("db_write_seconds", table="interviews")
+def store_interviews(interviews, messages=None):
+    """Store (job_id, candidate_id, proposed_dates, status, proposed_slots) interviews in one transaction
+    
+    An interview of the same job and candidate that is still awaiting slots
+    is updated rather than stored again. messages, if given, has one
+    (idempotency_key, recipient, subject, body) email or None per interview.
+    The emails are queued in the outbox in the same transaction, except those
+    whose key is queued already. Returns the interview ids and the number of
+    emails queued.
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    now = datetime.now()
+    
+    interview_ids = []
+    queued = 0
+    for interview, message in zip(interviews, messages or itertools.repeat(None)):
+        row = interview_row(*interview)
+        cursor.execute('''
+            SELECT interview_id FROM interviews
+            WHERE job_id = ? AND candidate_id = ? AND status = 'Awaiting Slots'
+            ORDER BY interview_id DESC LIMIT 1
+        ''', row[:2])
+        awaiting = cursor.fetchone()
+        if awaiting:
+            cursor.execute('''
+                UPDATE interviews SET proposed_dates = ?, status = ?, proposed_slots = ?
+                WHERE interview_id = ?
+            ''', (*row[2:], awaiting[0]))
+            interview_ids.append(awaiting[0])
+        else:
+            cursor.execute(STORE_INTERVIEW_SQL, row)
+            interview_ids.append(cursor.lastrowid)
+        if message is not None:
+            cursor.execute('''
+                INSERT INTO outbox (idempotency_key, interview_id, recipient, subject, body, status, attempts,
+                                    next_attempt_at, created_at)
+                VALUES (?, ?, ?, ?, ?, 'pending', 0, ?, ?)
+                ON CONFLICT (idempotency_key) DO NOTHING
+            ''', (message[0], interview_ids[-1], *message[1:], now, now))
+            queued += cursor.rowcount
+    
+    conn.commit()
+    conn.close()
+    
+    return interview_ids, queued
+
+@metrics.timed("db_query_seconds", query="held_interview_slots")
+def get_held_interview_slots(statuses=("Invitation Sent", "Scheduled")):
+    """Get the proposed slots (as dicts) of interviews in one of statuses, which no other candidate may be offered"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    placeholders = ", ".join("?" for _ in statuses)
+    cursor.execute(f'''
+        SELECT proposed_slots FROM interviews
+        WHERE proposed_slots IS NOT NULL AND status IN ({placeholders})
+    ''', tuple(statuses))
+    rows = cursor.fetchall()
+    conn.close()
+    
+    return [slot for (slots,) in rows for slot in json.loads(slots)]
+
+@metrics.timed("db_query_seconds", query="interviewer_availability")
+def get_interviewer_availability():
+    """Get the (interviewer, days, start, end) availability rows"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute("SELECT interviewer, COALESCE(days, ''), start_time, end_time FROM interviewer_availability")
+    rows = cursor.fetchall()
+    conn.close()
+    
+    return rows
+
+@metrics.timed("db_write_seconds", table="interviewer_availability")
+def store_interviewer_availability(rows):
+    """Replace the stored availability with (interviewer, days, start, end) rows"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute("DELETE FROM interviewer_availability")
+    cursor.executemany('''
+        INSERT INTO interviewer_availability (interviewer, days, start_time, end_time)
+        VALUES (?, ?, ?, ?)
+    ''', rows)
+    
+    conn.commit()
+    conn.close()
+
+@metrics.timed("db_write_seconds", table="outbox")
+def claim_outbox_messages(limit, lease_seconds):
+    """Claim up to limit messages that are due for sending; returns OutboxMessages
+    
+    Claimed messages stay claimed for lease_seconds. When they are not
+    finished by then (the dispatcher died), they are claimed again.
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    now = datetime.now()
+    
+    # Claims from several dispatchers must not interleave
+    cursor.execute("BEGIN IMMEDIATE")
+    cursor.execute('''
+        SELECT message_id, idempotency_key, recipient, subject, body, attempts + 1 FROM outbox
+        WHERE status IN ('pending', 'sending') AND next_attempt_at <= ?
+        ORDER BY next_attempt_at
+        LIMIT ?
+    ''', (now, limit))
+    messages = [OutboxMessage.from_row(row) for row in cursor.fetchall()]
+    lease_until = datetime.fromtimestamp(now.timestamp() + lease_seconds)
+    cursor.executemany('''
+        UPDATE outbox SET status = 'sending', attempts = ?, next_attempt_at = ? WHERE message_id = ?
+    ''', [(message.attempts, lease_until, message.message_id) for message in messages])
+    
+    conn.commit()
+    conn.close()
+    
+    return messages
+
+@metrics.timed("db_write_seconds", table="outbox")
+def finish_outbox_messages(sent, retries=(), failed=()):
+    """Record the outcome of claimed messages
+    
+    sent are message ids; retries are (message_id, error, next_attempt_at)
+    and failed are (message_id, error) tuples.
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    now = datetime.now()
+    
+    cursor.executemany('''
+        UPDATE outbox SET status = 'sent', sent_at = ?, last_error = NULL WHERE message_id = ?
+    ''', [(now, message_id) for message_id in sent])
+    cursor.executemany('''
+        UPDATE outbox SET status = 'pending', last_error = ?, next_attempt_at = ? WHERE message_id = ?
+    ''', [(error, next_attempt_at, message_id) for message_id, error, next_attempt_at in retries])
+    cursor.executemany('''
+        UPDATE outbox SET status = 'failed', last_error = ? WHERE message_id = ?
+    ''', [(error, message_id) for message_id, error in failed])
+    
+    conn.commit()
+    conn.close()
+
+def get_outbox_counts():
+    """Get {status: number of messages} for the outbox"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status")
+    counts = dict(cursor.fetchall())
+    conn.close()
+    
+    return counts
+
+def retry_failed_outbox_messages():
+    """Queue failed messages again, with a fresh attempt count; returns how many"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute('''
+        UPDATE outbox SET status = 'pending', attempts = 0, next_attempt_at = ? WHERE status = 'failed'
+    ''', (datetime.now(),))
+    count = cursor.rowcount
+    
+    conn.commit()
+    conn.close()
+    
+    return count
@@ -1,77 +1,313 @@
 # File: db/models.py
 # Database models for the Job Screening Multi-Agent System
 
+import re
+import json
+import datetime
+from dataclasses import dataclass, field
+from db.codec import decode_field
+
+# Education keywords and their level, from lowest to highest
+EDUCATION_LEVELS = {
+    "high school": 1,
+    "associate": 2, 
+    "bachelor": 3,
+    "master": 4,
+    "phd": 5,
+    "doctorate": 5
+}
+
+def _text(value):
+    """Coerce a loosely typed value (LLM output, NULL column) to text"""
+    if value is None:
+        return ""
+    return value if isinstance(value, str) else str(value)
+
+def _string_list(values):
+    """Keep only the string entries of a list"""
+    if not isinstance(values, list):
+        return []
+    return [value for value in values if isinstance(value, str)]
+
+@dataclass(slots=True)
 class Job:
     """Model representing a job posting"""
-    
-    def __init__(self, job_id, title, company, description, date_posted=None):
-        self.job_id = job_id
-        self.title = title
-        self.company = company
-        self.description = description
-        self.date_posted = date_posted
-        self.requirements = None
 
+    job_id: str
+    title: str
+    company: str
+    description: str
+    date_posted: object = None
+    requirements: object = None
+    status: str = None  # "open" or "closed" for jobs watched by the daemon
+
+@dataclass(slots=True)
 class JobRequirements:
     """Model representing job requirements"""
-    
-    def __init__(self, job_id, skills=None, experience=None, education=None, responsibilities=None):
-        self.job_id = job_id
-        self.skills = skills or []
-        self.experience = experience or ""
-        self.education = education or ""
-        self.responsibilities = responsibilities or []
 
-class Candidate:
-    """Model representing a job candidate"""
-    
-    def __init__(self, candidate_id, name=None, email=None, phone=None):
-        self.candidate_id = candidate_id
-        self.name = name or "Unknown"
-        self.email = email or ""
-        self.phone = phone or ""
-        self.skills = []
-        self.experience = []
-        self.education = []
-        self.resume_text = ""
+    job_id: str
+    skills: list = field(default_factory=list)
+    experience: str = ""
+    education: str = ""
+    responsibilities: list = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, job_id, data):
+        """Build requirements from extracted (LLM or regex) output"""
+        return cls(
+            job_id,
+            _string_list(data.get("skills")),
+            _text(data.get("experience")),
+            _text(data.get("education")),
+            _string_list(data.get("responsibilities"))
+        )
+
+    @classmethod
+    def from_row(cls, job_id, row):
+        """Build requirements from a (skills, experience, education, responsibilities) row"""
+        return cls(job_id, decode_field(row[0], []), row[1] or "", row[2] or "", decode_field(row[3], []))
+
+    def to_dict(self):
+        return {
+            "skills": self.skills,
+            "experience": self.experience,
+            "education": self.education,
+            "responsibilities": self.responsibilities
+        }
 
+@dataclass(slots=True)
 class Experience:
     """Model representing work experience"""
-    
-    def __init__(self, company, title, start_date=None, end_date=None, description=None):
-        self.company = company
-        self.title = title
-        self.start_date = start_date
-        self.end_date = end_date
-        self.description = description or ""
 
+    company: str = ""
+    title: str = ""
+    start_date: str = None  # None when the source had no date at all
+    end_date: str = None
+    description: str = ""
+
+    @classmethod
+    def from_dict(cls, data):
+        if not isinstance(data, dict):
+            return cls()
+
+        start_date = data.get("start_date")
+        end_date = data.get("end_date")
+        return cls(
+            _text(data.get("company")),
+            _text(data.get("title")),
+            None if start_date is None else _text(start_date),
+            None if end_date is None else _text(end_date),
+            _text(data.get("description"))
+        )
+
+    def duration_years(self):
+        """Calculate duration of this work experience in years"""
+        start_date = self.start_date
+        end_date = self.end_date
+        
+        # Handle cases where dates might be empty
+        if not start_date:
+            return 0
+            
+        # Parse start year
+        start_year_match = re.search(r'(\d{4})', start_date)
+        if not start_year_match:
+            return 0
+            
+        start_year = int(start_year_match.group(1))
+        
+        # Parse end year (could be "present" or a year; a missing end date means "present")
+        end_date = end_date or ""
+        if not end_date or end_date.lower() == "present":
+            # Use current year for "present"
+            end_year = datetime.datetime.now().year
+        else:
+            end_year_match = re.search(r'(\d{4})', end_date)
+            if not end_year_match:
+                return 0
+            end_year = int(end_year_match.group(1))
+                
+        # Calculate years of experience
+        years = end_year - start_year
+        
+        # Add partial year if month information is available
+        start_month_match = re.search(r'(\d{4})-(\d{2})', start_date)
+        end_month_match = re.search(r'(\d{4})-(\d{2})', end_date)
+        
+        if start_month_match and end_month_match and end_date.lower() != "present":
+            start_month = int(start_month_match.group(2))
+            end_month = int(end_month_match.group(2))
+            
+            months = (end_year - start_year) * 12 + (end_month - start_month)
+            years = months / 12
+        
+        return max(0, years)  # Ensure non-negative
+
+    def to_dict(self, include_description=True):
+        data = {
+            "company": self.company,
+            "title": self.title,
+            "start_date": self.start_date,
+            "end_date": self.end_date
+        }
+        if include_description:
+            data["description"] = self.description
+        return data
+
+@dataclass(slots=True)
 class Education:
     """Model representing educational background"""
-    
-    def __init__(self, degree, institution, year=None):
-        self.degree = degree
-        self.institution = institution
-        self.year = year
 
+    degree: str = ""
+    institution: str = ""
+    year: object = None
+
+    @classmethod
+    def from_dict(cls, data):
+        if not isinstance(data, dict):
+            return cls()
+        return cls(_text(data.get("degree")), _text(data.get("institution")), data.get("year"))
+
+    def level(self):
+        """Highest education level named in the degree (0 if none is recognised)"""
+        degree_lower = self.degree.lower()
+        level = 0
+        for keyword, value in EDUCATION_LEVELS.items():
+            if keyword in degree_lower and value > level:
+                level = value
+        return level
+
+    def to_dict(self):
+        return {"degree": self.degree, "institution": self.institution, "year": self.year}
+
+@dataclass(slots=True)
+class Candidate:
+    """Model representing a job candidate"""
+
+    candidate_id: str
+    name: str = "Unknown"
+    email: str = ""
+    phone: str = ""
+    skills: list = field(default_factory=list)
+    experience: list = field(default_factory=list)  # List of Experience
+    education: list = field(default_factory=list)  # List of Education
+    resume_text: str = ""
+
+    @classmethod
+    def from_profile(cls, candidate_id, profile, resume_text=""):
+        """Build a candidate from an extracted (LLM or regex) profile dict"""
+        contact = profile.get("contact")
+        if not isinstance(contact, dict):
+            contact = {}
+
+        experience = profile.get("experience")
+        education = profile.get("education")
+        return cls(
+            candidate_id,
+            _text(profile.get("name")) or "Unknown",
+            _text(contact.get("email")),
+            _text(contact.get("phone")),
+            _string_list(profile.get("skills")),
+            [Experience.from_dict(exp) for exp in experience] if isinstance(experience, list) else [],
+            [Education.from_dict(edu) for edu in education] if isinstance(education, list) else [],
+            resume_text or ""
+        )
+
+    @classmethod
+    def from_row(cls, row):
+        """Build a candidate from a (candidate_id, name, email, phone, skills, experience, education) row"""
+        return cls(
+            row[0],
+            row[1] or "Unknown",
+            row[2] or "",
+            row[3] or "",
+            decode_field(row[4], []),
+            [Experience.from_dict(exp) for exp in decode_field(row[5], [])],
+            [Education.from_dict(edu) for edu in decode_field(row[6], [])]
+        )
+
+    def experience_years(self):
+        """Total years of work experience"""
+        return sum(exp.duration_years() for exp in self.experience)
+
+    def education_level(self):
+        """Highest education level of the candidate (0 if none is recognised)"""
+        return max((edu.level() for edu in self.education), default=0)
+
+    def to_profile(self):
+        """Convert back to the nested profile dict produced by the parsers"""
+        return {
+            "name": self.name,
+            "contact": {"email": self.email, "phone": self.phone},
+            "skills": self.skills,
+            "experience": [exp.to_dict() for exp in self.experience],
+            "education": [edu.to_dict() for edu in self.education]
+        }
+
+@dataclass(slots=True)
 class MatchResult:
     """Model representing a job-candidate match result"""
-    
-    def __init__(self, job_id, candidate_id):
-        self.job_id = job_id
-        self.candidate_id = candidate_id
-        self.skills_score = 0.0
-        self.experience_score = 0.0
-        self.education_score = 0.0
-        self.overall_score = 0.0
-        self.shortlisted = False
-        self.match_date = None
 
+    job_id: str
+    candidate_id: str
+    candidate_name: str = ""
+    skills_score: float = 0.0
+    experience_score: float = 0.0
+    education_score: float = 0.0
+    overall_score: float = 0.0
+    shortlisted: bool = False
+    match_date: object = None
+
+    def to_dict(self):
+        return {
+            "job_id": self.job_id,
+            "candidate_id": self.candidate_id,
+            "candidate_name": self.candidate_name,
+            "skills_score": self.skills_score,
+            "experience_score": self.experience_score,
+            "education_score": self.education_score,
+            "overall_score": self.overall_score,
+            "shortlisted": self.shortlisted
+        }
+
+@dataclass(slots=True)
 class Interview:
     """Model representing an interview schedule"""
-    
-    def __init__(self, job_id, candidate_id):
-        self.job_id = job_id
-        self.candidate_id = candidate_id
-        self.proposed_dates = []
-        self.status = "Pending"
-        self.notes = ""
\ No newline at end of file
+
+    job_id: str
+    candidate_id: str
+    proposed_dates: list = field(default_factory=list)
+    status: str = "Pending"
+    notes: str = ""
+
+@dataclass(slots=True)
+class Run:
+    """Model representing a checkpointed batch run"""
+
+    run_id: str
+    kind: str
+    params: dict = field(default_factory=dict)  # Arguments the run was started with
+    status: str = "running"
+    started_at: object = None
+    finished_at: object = None
+
+    @classmethod
+    def from_row(cls, row):
+        """Build a run from a (run_id, kind, params, status, started_at, finished_at) row"""
+        return cls(row[0], row[1], json.loads(row[2]) if row[2] else {}, row[3], row[4], row[5])
+
+@dataclass(slots=True)
+class OutboxMessage:
+    """Model representing an email waiting in the outbox"""
+
+    message_id: int
+    idempotency_key: str  # Same key, same message: senders use it to avoid sending twice
+    recipient: str
+    subject: str
+    body: str
+    attempts: int = 0     # Sending attempts so far, including the current one
+
+    @classmethod
+    def from_row(cls, row):
+        """Build a message from a (message_id, idempotency_key, recipient, subject, body, attempts) row"""
+        return cls(row[0], row[1], row[2], row[3] or "", row[4] or "", row[5] or 0)
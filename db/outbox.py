@@ -0,0 +1,92 @@
+# File: db/outbox.py
+# Dispatcher that sends the invitation emails queued in the outbox table
+#
+# The scheduler queues each invitation in the same transaction as its
+# interview, under an idempotency key per job and candidate, so invitations
+# outlive the screening run and a rescheduled job does not queue them twice.
+# The dispatcher claims due messages in batches, hands each batch to a
+# sender (utils/mailer.py) and records the outcome: sent, retried later with
+# exponential backoff, or failed after max_attempts. A claim expires after
+# lease_seconds, so a batch held by a dispatcher that died is sent by the
+# next one. Delivery is thus at least once; senders use the idempotency key
+# so that a repeat is recognised.
+
+import time
+import threading
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from config import Config
+from utils import metrics
+from utils.mailer import PermanentSendError
+from db.database import claim_outbox_messages, finish_outbox_messages
+
+class OutboxDispatcher:
+    """Send due outbox messages in batches and record retry state"""
+
+    def __init__(self, sender, batch_size=Config.OUTBOX_BATCH_SIZE, max_attempts=Config.OUTBOX_MAX_ATTEMPTS,
+                 retry_seconds=Config.OUTBOX_RETRY_SECONDS, max_retry_seconds=Config.OUTBOX_MAX_RETRY_SECONDS,
+                 lease_seconds=Config.OUTBOX_LEASE_SECONDS):
+        self.sender = sender
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_seconds = retry_seconds
+        self.max_retry_seconds = max_retry_seconds
+        self.lease_seconds = lease_seconds
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+
+    def dispatch_batch(self):
+        """Send one batch of due messages; returns the number of messages claimed"""
+        messages = claim_outbox_messages(self.batch_size, self.lease_seconds)
+        if not messages:
+            return 0
+
+        with metrics.timer("outbox_batch_seconds"):
+            results = self.sender.send_batch(messages)
+
+        sent, retries, failed = [], [], []
+        now = datetime.now()
+        for message, error in zip(messages, results):
+            if error is None:
+                sent.append(message.message_id)
+            elif isinstance(error, PermanentSendError) or message.attempts >= self.max_attempts:
+                failed.append((message.message_id, f"{type(error).__name__}: {error}"))
+            else:
+                delay = min(self.retry_seconds * 2 ** (message.attempts - 1), self.max_retry_seconds)
+                retries.append((message.message_id, f"{type(error).__name__}: {error}", now + timedelta(seconds=delay)))
+        finish_outbox_messages(sent, retries, failed)
+
+        for outcome, items in (("sent", sent), ("retry", retries), ("failed", failed)):
+            if items:
+                metrics.increment("outbox_messages_total", len(items), outcome=outcome)
+        with self._lock:
+            self.sent += len(sent)
+            self.retried += len(retries)
+            self.failed += len(failed)
+        return len(messages)
+
+    def drain(self, workers=1):
+        """Send batches on workers threads until no message is due; returns the number of messages claimed"""
+        def drain_one():
+            claimed = 0
+            while True:
+                count = self.dispatch_batch()
+                if not count:
+                    return claimed
+                claimed += count
+
+        if workers <= 1:
+            return drain_one()
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="outbox") as pool:
+            return sum(pool.map(lambda _: drain_one(), range(workers)))
+
+    def run(self, poll_interval=5.0, workers=1):
+        """Keep sending, looking for newly due messages every poll_interval seconds"""
+        while True:
+            if not self.drain(workers):
+                time.sleep(poll_interval)
+
+    def format_stats(self):
+        return f"{self.sent} sent, {self.retried} to retry, {self.failed} failed"
@@ -0,0 +1,204 @@
+# File: db/writer.py
+# Write-behind persistence layer shared by the agents
+
+import queue
+import threading
+import time
+from utils import metrics
+from db.database import (
+    get_connection,
+    STORE_JOB_SQL, STORE_JOB_REQUIREMENTS_SQL, STORE_CANDIDATE_SQL,
+    STORE_MATCH_RESULT_SQL, STORE_RESUME_SIGNATURE_SQL, STORE_INTERVIEW_SQL,
+    STORE_RUN_CHECKPOINT_SQL,
+    job_row, job_requirements_row, candidate_row, match_result_row,
+    resume_signature_row, interview_row, run_checkpoint_row
+)
+
+# Table name -> (upsert statement, function building its parameters)
+WRITE_TABLES = {
+    "jobs": (STORE_JOB_SQL, job_row),
+    "job_requirements": (STORE_JOB_REQUIREMENTS_SQL, job_requirements_row),
+    "candidates": (STORE_CANDIDATE_SQL, candidate_row),
+    "match_results": (STORE_MATCH_RESULT_SQL, match_result_row),
+    "resume_signatures": (STORE_RESUME_SIGNATURE_SQL, resume_signature_row),
+    "interviews": (STORE_INTERVIEW_SQL, interview_row),
+    "run_checkpoints": (STORE_RUN_CHECKPOINT_SQL, run_checkpoint_row),
+}
+
+class _Barrier:
+    """Queue marker that makes the writer flush and signal the waiting caller"""
+
+    def __init__(self, stop=False):
+        self.stop = stop
+        self.done = threading.Event()
+
+class WriteBehindWriter:
+    """Batch database writes from any agent on a dedicated writer thread
+
+    Records are queued with submit() and written in batches, either when
+    batch_size records are pending or flush_interval seconds after the
+    first pending record. The queue holds at most max_pending records, so
+    producers block (backpressure) when the disk falls behind. Records are
+    written in submission order, which keeps the order within each table
+    and lets rows reference rows submitted earlier (e.g. requirements after
+    their job).
+    """
+
+    def __init__(self, batch_size=200, flush_interval=0.5, max_pending=5000):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._closed = False
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+
+        self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self._thread.start()
+
+    @property
+    def pending(self):
+        """Number of queued records and barriers not yet taken by the writer thread"""
+        return self._queue.qsize()
+
+    def submit(self, table, *args):
+        """Queue a record for a table, blocking while the queue is full
+
+        The arguments are the same as for the matching store_* function,
+        e.g. submit("candidates", candidate, content_hash).
+        """
+        if self._closed:
+            raise RuntimeError("Cannot submit to a closed writer")
+
+        if table not in WRITE_TABLES:
+            raise ValueError(f"Unknown table for write-behind: {table}")
+
+        # Build the row now, so later changes to the caller's objects are not persisted
+        row = WRITE_TABLES[table][1](*args)
+        self._queue.put((table, row))
+
+    def flush(self, timeout=None):
+        """Block until every record submitted so far has been written"""
+        if self._closed:
+            return True
+
+        barrier = _Barrier()
+        self._queue.put(barrier)
+        return barrier.done.wait(timeout)
+
+    def close(self, timeout=None):
+        """Write all pending records and stop the writer thread"""
+        if self._closed:
+            return
+
+        barrier = _Barrier(stop=True)
+        self._queue.put(barrier)
+        self._closed = True
+        barrier.done.wait(timeout)
+        self._thread.join(timeout)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _run(self):
+        """Writer thread loop: collect records and write them in batches"""
+        conn = get_connection()
+        pending = []
+        deadline = None
+
+        try:
+            while True:
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    # Time-based flush
+                    self._write_batch(conn, pending)
+                    pending, deadline = [], None
+                    continue
+
+                if isinstance(item, _Barrier):
+                    self._write_batch(conn, pending)
+                    pending, deadline = [], None
+                    item.done.set()
+                    if item.stop:
+                        break
+                    continue
+
+                pending.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+
+                # Size-based flush
+                if len(pending) >= self.batch_size:
+                    self._write_batch(conn, pending)
+                    pending, deadline = [], None
+        finally:
+            conn.close()
+
+    def _write_batch(self, conn, records):
+        """Write and commit a batch of records, timing it"""
+        if not records:
+            return
+
+        with metrics.timer("db_write_batch_seconds"):
+            self._write_runs(conn, records)
+
+    def _write_runs(self, conn, records):
+        """Write records in order, one executemany per run of the same table, in one transaction
+
+        Each run is a savepoint nested in the batch's transaction: a SAVEPOINT
+        outside a transaction would start one, and its RELEASE would commit it.
+        """
+        cursor = conn.cursor()
+        if not conn.in_transaction:
+            cursor.execute("BEGIN")
+        written_by_table = {}
+        start = 0
+        while start < len(records):
+            table = records[start][0]
+            end = start
+            while end < len(records) and records[end][0] == table:
+                end += 1
+
+            sql = WRITE_TABLES[table][0]
+            rows = [row for _, row in records[start:end]]
+            cursor.execute("SAVEPOINT write_run")
+            try:
+                cursor.executemany(sql, rows)
+                cursor.execute("RELEASE write_run")
+                written_by_table[table] = written_by_table.get(table, 0) + len(rows)
+            except Exception as e:
+                # Undo the partial run and retry row by row, so one bad record does not drop the rest
+                cursor.execute("ROLLBACK TO write_run")
+                cursor.execute("RELEASE write_run")
+                print(f"Error writing batch to {table}: {e}. Retrying rows individually...")
+                for row in rows:
+                    try:
+                        cursor.execute(sql, row)
+                        written_by_table[table] = written_by_table.get(table, 0) + 1
+                    except Exception as row_error:
+                        print(f"Error writing record to {table}: {row_error}")
+                        self.failed += 1
+                        metrics.increment("db_write_errors_total", table=table)
+            start = end
+
+        written = sum(written_by_table.values())
+        try:
+            conn.commit()
+            self.written += written
+            self.batches += 1
+        except Exception as e:
+            print(f"Error committing write batch: {e}")
+            conn.rollback()
+            self.failed += written
+            for table, count in written_by_table.items():
+                metrics.increment("db_write_errors_total", count, table=table)
+            return
+
+        for table, count in written_by_table.items():
+            metrics.increment("db_rows_written_total", count, table=table)
@@ -0,0 +1,60 @@
+# File: dispatch_outbox.py
+# Send the interview invitations queued in the outbox, independently of the screening runs
+import argparse
+from config import Config
+from utils import metrics
+from utils.mailer import create_sender
+from db.database import setup_database, get_outbox_counts, retry_failed_outbox_messages
+from db.outbox import OutboxDispatcher
+
+def main():
+    parser = argparse.ArgumentParser(description='Send the interview invitations queued in the outbox')
+    parser.add_argument('--sender', type=str, default=Config.EMAIL_SENDER,
+                        help='file:DIR writes .eml files; smtp://[user:password@]host[:port] sends through an SMTP server')
+    parser.add_argument('--from_address', type=str, default=Config.EMAIL_FROM, help='From address of the emails')
+    parser.add_argument('--batch_size', type=int, default=Config.OUTBOX_BATCH_SIZE, help='Messages claimed and sent per batch')
+    parser.add_argument('--workers', type=int, default=1, help='Batches being sent at once')
+    parser.add_argument('--max_attempts', type=int, default=Config.OUTBOX_MAX_ATTEMPTS,
+                        help='Attempts before a message is marked failed')
+    parser.add_argument('--watch', action='store_true', help='Keep running and send messages as they become due')
+    parser.add_argument('--poll_interval', type=float, default=5.0, help='Seconds between checks for due messages with --watch')
+    parser.add_argument('--retry_failed', action='store_true', help='Queue failed messages again before sending')
+    parser.add_argument('--status', action='store_true', help='Print the number of messages per status and exit')
+    parser.add_argument('--metrics_file', type=str,
+                        help='Write timings and counters to this file in the Prometheus text format')
+
+    args = parser.parse_args()
+
+    setup_database()
+    if args.status:
+        print_counts()
+        return
+
+    try:
+        sender = create_sender(args.sender, args.from_address)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.retry_failed:
+        print(f"Queued {retry_failed_outbox_messages()} failed messages again")
+
+    dispatcher = OutboxDispatcher(sender, batch_size=args.batch_size, max_attempts=args.max_attempts)
+    print(f"Sending invitations to {sender}")
+    try:
+        if args.watch:
+            dispatcher.run(args.poll_interval, args.workers)
+        else:
+            dispatcher.drain(args.workers)
+    except KeyboardInterrupt:
+        print("\nStopping...")
+    finally:
+        print(f"Outbox: {dispatcher.format_stats()}")
+        print_counts()
+        metrics.report(args.metrics_file)
+
+def print_counts():
+    counts = get_outbox_counts()
+    print("Outbox status: " + (", ".join(f"{count} {status}" for status, count in sorted(counts.items())) or "empty"))
+
+if __name__ == "__main__":
+    main()
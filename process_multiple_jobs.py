@@ -1,34 +1,169 @@
 # File: process_multiple_jobs.py
 import csv
 import os
-import sys
-from datetime import datetime
+import time
+import argparse
+import threading
+from config import Config
+from concurrent.futures import Future
 from agents.jd_analyzer import JDAnalyzer
-from agents.cv_parser1 import CVParser
+from agents.cv_parser1 import CVParser, load_duplicate_index, parse_resumes_without_llm
 from agents.matcher import MatchingEngine
-from agents.scheduler import InterviewScheduler
-from utils.document_processor import extract_text_from_file
-from db.database import setup_database, store_job
+from agents.scheduler import InterviewScheduler, EMAIL_MODES, create_slot_allocator
+from utils.document_processor import (extract_document, compute_file_fingerprint, compute_text_fingerprint,
+                                      compute_description_fingerprint)
+from utils.pipeline import (Pipeline, Stage, PROCESS, ASYNC, DEFAULT_EXTRACT_WORKERS, DEFAULT_LLM_WORKERS,
+                            DEFAULT_BULK_WORKERS, chunked)
+from utils.skills import SKILLS
+from utils.near_duplicate import DEFAULT_SIMILARITY_THRESHOLD
+from utils import metrics
+from utils.llm_connector import configure_llm, close_llm
+from utils.profiling import create_profiler
+from db.database import (setup_database, get_job_requirements, job_requirements_exist,
+                         get_known_candidate_ids, fingerprint_to_id, set_compact_storage,
+                         find_job_requirements_by_description, create_run, get_run, update_run_status, get_run_checkpoints)
+from db.writer import WriteBehindWriter
+from db.columnar import ColumnarCandidateStore
+
+# Arguments saved with each run, so --resume can continue with the same ones
+RUN_PARAMS = ('jobs_csv_file', 'resumes_directory', 'threshold', 'top_k', 'compact_storage', 'no_llm')
 
 def main():
-    # Check arguments
-    if len(sys.argv) < 3:
-        print("Usage: python process_multiple_jobs.py <jobs_csv_file> <resumes_directory> [threshold]")
-        return
+    parser = argparse.ArgumentParser(description='Screen a directory of resumes against every job in a CSV file')
+    parser.add_argument('jobs_csv_file', nargs='?', help='CSV file with job title and description columns')
+    parser.add_argument('resumes_directory', nargs='?', help='Directory containing resume files')
+    parser.add_argument('threshold', nargs='?', type=float, help=f'Match threshold (0-100, default {Config.DEFAULT_THRESHOLD:g})')
+    parser.add_argument('top_k', nargs='?', type=int, help='Only keep and report the best K matches per job')
+    parser.add_argument('--resume', metavar='RUN_ID',
+                        help='Continue an interrupted run, skipping the resumes and jobs it already completed')
+    parser.add_argument('--jd_workers', type=int, default=DEFAULT_LLM_WORKERS,
+                        help='Job descriptions being analyzed at once; the adaptive LLM concurrency limit decides how many requests reach the server')
+    parser.add_argument('--compact_storage', action='store_true',
+                        help='Store profiles in the compact binary encoding and compress resume text')
+    parser.add_argument('--no_llm', '--no-llm', action='store_true',
+                        help='Bulk screening without the LLM: resumes and job descriptions are parsed by the regex '
+                             'extractors with the skill dictionary, in worker processes, and emails use the default template')
+    parser.add_argument('--bulk_workers', type=int, default=DEFAULT_BULK_WORKERS,
+                        help='Processes extracting and parsing resumes with --no_llm')
+    parser.add_argument('--llm_host', type=str, help='Ollama server URL (default: $OLLAMA_HOST or localhost:11434)')
+    parser.add_argument('--route_models', action='store_true',
+                        help='Pick the model per task and prompt size from Config.MODEL_ROUTES and recorded latency profiles')
+    parser.add_argument('--mock_llm', type=str, nargs='?', const='', metavar='SPEC',
+                        help='Answer LLM calls with a local mock server, e.g. "latency=uniform:0.1:0.5,error_rate=0.05"')
+    parser.add_argument('--email_mode', choices=EMAIL_MODES, default=Config.EMAIL_MODE,
+                        help='llm: one LLM-written email per candidate; template: one template per job, filled in per candidate')
+    parser.add_argument('--email_tone', type=str, default=Config.EMAIL_TONE, help='Tone of the email templates')
+    parser.add_argument('--personalize_emails', action='store_true',
+                        help='With --email_mode template, let the LLM add a personal sentence to each email (concurrently)')
+    parser.add_argument('--availability', type=str, metavar='CSV',
+                        help='Interviewer availability (interviewer,days,start,end rows) to allocate interview slots from; '
+                             'stored for later runs, which otherwise use the stored availability')
+    parser.add_argument('--interview_minutes', type=int, default=Config.INTERVIEW_MINUTES, help='Length of an interview')
+    parser.add_argument('--buffer_minutes', type=int, default=Config.INTERVIEW_BUFFER_MINUTES,
+                        help='Free time an interviewer keeps between two interviews')
+    parser.add_argument('--metrics_file', type=str,
+                        help='Write timings and counters to this file in the Prometheus text format')
+    parser.add_argument('--profile', type=str, nargs='?', const='profile', metavar='DIR',
+                        help='Profile every pipeline stage with cProfile and write the reports to DIR (default: profile)')
+    parser.add_argument('--trace_memory', action='store_true',
+                        help='Also report peak memory and the top allocating lines of each pipeline with tracemalloc (implies --profile)')
     
-    jobs_csv_file = sys.argv[1]
-    resumes_dir = sys.argv[2]
-    threshold = float(sys.argv[3]) if len(sys.argv) > 3 else 70.0
+    args = parser.parse_args()
+    if args.top_k is not None and args.top_k < 1:
+        parser.error("top_k must be at least 1")
     
     # Setup database
     print("Setting up database...")
     setup_database()
     
-    # Initialize agents
-    jd_agent = JDAnalyzer()
-    cv_agent = CVParser()
-    matching_agent = MatchingEngine(threshold=threshold)
-    scheduler_agent = InterviewScheduler()
+    if args.resume:
+        run = get_run(args.resume)
+        if run is None:
+            print(f"Error: Run '{args.resume}' not found")
+            return
+        
+        # Arguments that are not given again are taken from the interrupted run
+        for name in RUN_PARAMS:
+            if getattr(args, name) in (None, False) and name in run.params:
+                setattr(args, name, run.params[name])
+        run_id = run.run_id
+        update_run_status(run_id, "running")
+        print(f"Resuming run {run_id} (started {run.started_at}, status {run.status})")
+    elif not args.jobs_csv_file or not args.resumes_directory:
+        parser.print_usage()
+        return
+    
+    if args.threshold is None:
+        args.threshold = Config.DEFAULT_THRESHOLD
+    
+    if not args.resume:
+        run_id = create_run("process_multiple_jobs", {name: getattr(args, name) for name in RUN_PARAMS})
+        print(f"Started run {run_id} (continue it after a failure with --resume {run_id})")
+    
+    set_compact_storage(args.compact_storage)
+    
+    # Database writes happen on a background thread while agents keep working
+    mock_llm = None if args.no_llm else configure_llm(args)
+    profiler = create_profiler(args)
+    if args.no_llm:
+        writer = WriteBehindWriter(Config.BULK_WRITE_BATCH_SIZE, max_pending=Config.BULK_MAX_PENDING_WRITES)
+    else:
+        writer = WriteBehindWriter()
+    status = "failed"
+    try:
+        complete = process_jobs(args, run_id, writer, profiler)
+        status = "completed" if complete else "incomplete"
+    finally:
+        writer.close()
+        close_llm(mock_llm)
+        update_run_status(run_id, status)
+        metrics.report(args.metrics_file)
+        if profiler:
+            profiler.close()
+
+def process_jobs(args, run_id, writer, profiler=None):
+    """Process all resumes, then screen them against every job in the CSV file
+    
+    Every resume and job that completes is checkpointed under run_id, so an
+    interrupted run continued with --resume skips them. Returns False when
+    some resumes or jobs failed.
+    """
+    jobs_csv_file = args.jobs_csv_file
+    resumes_dir = args.resumes_directory
+    
+    # Initialize agents; bulk screening parses with the skill dictionary and skips near-duplicate detection
+    use_llm = not args.no_llm
+    skill_matcher = None if use_llm else SKILLS
+    jd_agent = JDAnalyzer(writer=writer, use_llm=use_llm, skill_matcher=skill_matcher)
+    cv_agent = CVParser(writer=writer, duplicate_index=load_duplicate_index(DEFAULT_SIMILARITY_THRESHOLD if use_llm else 0),
+                        use_llm=use_llm, skill_matcher=skill_matcher)
+    # Every job is scored against the same pool, so candidates are held in a columnar store
+    candidate_store = ColumnarCandidateStore()
+    matching_agent = MatchingEngine(threshold=args.threshold, top_k=args.top_k, writer=writer, candidate_store=candidate_store)
+    try:
+        allocator = create_slot_allocator(args.availability, args.interview_minutes, args.buffer_minutes)
+    except (OSError, ValueError) as e:
+        print(f"Error loading interviewer availability: {e}")
+        return False
+    scheduler_agent = InterviewScheduler(email_mode=args.email_mode if use_llm else "template", tone=args.email_tone,
+                                         personalize=args.personalize_emails, allocator=allocator, use_llm=use_llm)
+    
+    done_resumes = get_run_checkpoints(run_id, "resume")
+    done_jobs = get_run_checkpoints(run_id, "job")
+    resumed_resumes = 0
+    resumed_jobs = 0
+    
+    # Checkpoints go through the writer after the rows they vouch for, so they
+    # are never committed before those rows
+    def checkpoint(stage, item_key, error=None):
+        if error is None:
+            writer.submit("run_checkpoints", run_id, stage, item_key)
+        else:
+            writer.submit("run_checkpoints", run_id, stage, item_key, "failed", str(error))
+    
+    def checkpoint_failure(stage, key_of):
+        """on_error of a pipeline stage, checkpointing the item it failed on as failed"""
+        return lambda item, error: checkpoint(stage, key_of(item), error)
     
     # Process resumes first (to avoid reprocessing for each job)
     print("\nProcessing resumes...")
@@ -36,84 +171,256 @@ def main():
     
     if not cv_files:
         print(f"Error: No CV files found in '{resumes_dir}'")
-        return
+        return False
     
     print(f"Found {len(cv_files)} resume files")
     
+    # Candidates are keyed by a fingerprint of the resume file, so resumes seen
+    # in an earlier run are skipped before any text extraction or LLM parsing
+    cv_hashes = {}
+    for cv_filename in cv_files:
+        cv_hashes[cv_filename] = compute_file_fingerprint(os.path.join(resumes_dir, cv_filename))
+    known_ids = get_known_candidate_ids(fingerprint_to_id("cand", h) for h in cv_hashes.values())
+    
     # Store candidate profiles
     candidate_ids = []
-    candidate_names = {}
+    seen_ids = set()
+    skipped_resumes = 0
+    new_resumes = []
     
     for i, cv_filename in enumerate(cv_files):
-        cv_path = os.path.join(resumes_dir, cv_filename)
-        candidate_id = f"cand_{datetime.now().strftime('%Y%m%d%H%M%S')}_{i}"
-        candidate_ids.append(candidate_id)
+        cv_hash = cv_hashes[cv_filename]
+        candidate_id = fingerprint_to_id("cand", cv_hash)
         
+        if candidate_id in done_resumes:
+            print(f"Skipping resume {i+1}/{len(cv_files)} completed earlier in this run: {cv_filename}")
+            resumed_resumes += 1
+            if candidate_id not in seen_ids:
+                seen_ids.add(candidate_id)
+                candidate_ids.append(candidate_id)
+            continue
+        if candidate_id in known_ids:
+            print(f"Skipping already processed resume {i+1}/{len(cv_files)}: {cv_filename}")
+            skipped_resumes += 1
+            if candidate_id not in seen_ids:
+                seen_ids.add(candidate_id)
+                candidate_ids.append(candidate_id)
+            continue
+        known_ids.add(candidate_id)
+        seen_ids.add(candidate_id)
+        candidate_ids.append(candidate_id)
+        new_resumes.append(((i, cv_filename, candidate_id, cv_hash), os.path.join(resumes_dir, cv_filename)))
+    
+    # Text extraction, LLM parsing and storage overlap in a pipeline
+    def parse_resume(task):
+        (i, cv_filename, candidate_id, cv_hash), cv_text = task
         print(f"Processing resume {i+1}/{len(cv_files)}: {cv_filename}")
-        cv_text = extract_text_from_file(cv_path)
-        profile = cv_agent.process_cv(candidate_id, cv_text)
-        candidate_names[candidate_id] = profile['name']
-        print(f"  → Processed {profile['name']}'s resume")
+        return (cv_hash, *cv_agent.parse_cv(candidate_id, cv_text))
+    
+    def store_resume(parsed):
+        cv_hash, candidate, duplicate_of, signature = parsed
+        cv_agent.store_cv(candidate, cv_hash, duplicate_of, signature)
+        checkpoint("resume", candidate.candidate_id)
+        print(f"  → Processed {candidate.name}'s resume")
+        return candidate
+    
+    # Bulk screening parses chunks of resumes in worker processes instead, without the LLM
+    files = {candidate_id: (cv_filename, cv_hash) for (_, cv_filename, candidate_id, cv_hash), _ in new_resumes}
+    
+    def store_resume_chunk(parsed):
+        candidates, failures = parsed
+        for candidate in candidates:
+            cv_agent.store_cv(candidate, files[candidate.candidate_id][1])
+            checkpoint("resume", candidate.candidate_id)
+        for candidate_id, error in failures:
+            print(f"Error processing resume {files[candidate_id][0]}: {error}")
+            checkpoint("resume", candidate_id, error)
+        return len(candidates)
+    
+    def checkpoint_chunk_failure(chunk, error):
+        # A chunk whose worker failed (e.g. the process died) fails for each of its resumes
+        for candidate_id, _ in chunk:
+            checkpoint("resume", candidate_id, error)
+    
+    if args.no_llm:
+        resume_pipeline = Pipeline([
+            Stage("parse", parse_resumes_without_llm, args.bulk_workers, PROCESS, on_error=checkpoint_chunk_failure),
+            Stage("store", store_resume_chunk)
+        ], name="resumes", profiler=profiler)
+        if new_resumes:
+            # Timed until the last profile is committed, so the rate includes storage
+            start = time.perf_counter()
+            tasks = ((candidate_id, cv_path) for (_, _, candidate_id, _), cv_path in new_resumes)
+            parsed = sum(resume_pipeline.run(chunked(tasks, Config.BULK_CHUNK_SIZE)))
+            writer.flush()
+            elapsed = time.perf_counter() - start
+            rate = parsed / elapsed if elapsed > 0 else 0.0
+            metrics.set_gauge("bulk_resumes_per_second", rate)
+            print(f"Parsed and stored {parsed} of {len(new_resumes)} resumes without the LLM in {elapsed:.2f}s ({rate:.1f} resumes/s)")
+    else:
+        resume_pipeline = Pipeline([
+            Stage("extract", extract_document, DEFAULT_EXTRACT_WORKERS, PROCESS,
+                  on_error=checkpoint_failure("resume", lambda task: task[0][2])),
+            Stage("parse", parse_resume, DEFAULT_LLM_WORKERS, ASYNC,
+                  on_error=checkpoint_failure("resume", lambda task: task[0][2])),
+            Stage("store", store_resume, on_error=checkpoint_failure("resume", lambda parsed: parsed[1].candidate_id))
+        ], name="resumes", profiler=profiler)
+        if new_resumes:
+            resume_pipeline.run(new_resumes)
     
     # Process jobs from CSV
     print("\nProcessing jobs from CSV...")
+    writer.flush()
+    candidate_store.load()
+    skipped_job_ids = set()
+    reused_job_ids = set()
+    
+    # Rows with the same normalized description share one requirements extraction:
+    # the first row to arrive analyzes it, later rows wait for it and reuse the result
+    analyses = {}
+    analyses_lock = threading.Lock()
+    
+    # Requirements of several jobs are extracted concurrently, while matching
+    # and scheduling handle one job at a time
+    def analyze_job(task):
+        row_num, job_title, job_description, company_name, job_hash, job_id = task
+        print(f"\nProcessing job {row_num+1}: {job_title}")
+        
+        if job_requirements_exist(job_id):
+            print(f"Job {row_num+1} already analyzed, reusing stored requirements")
+            job_requirements = get_job_requirements(job_id)
+            skipped_job_ids.add(job_id)
+        else:
+            description_hash = compute_description_fingerprint(job_description)
+            writer.submit("jobs", job_id, job_title, company_name, job_description, job_hash, description_hash)
+            
+            with analyses_lock:
+                analysis = analyses.get(description_hash)
+                first = analysis is None
+                if first:
+                    analysis = analyses[description_hash] = Future()
+            
+            if first:
+                try:
+                    # Requirements extracted in an earlier run for the same description
+                    source = find_job_requirements_by_description(description_hash)
+                    if source is None:
+                        print(f"Extracting requirements for job {row_num+1}...")
+                        source = jd_agent.process_job(job_id, job_description)
+                    analysis.set_result(source)
+                except Exception as e:
+                    analysis.set_exception(e)
+                    raise
+            else:
+                source = analysis.result()
+            
+            if source.job_id == job_id:
+                job_requirements = source
+            else:
+                print(f"Job {row_num+1} has the same description as {source.job_id}, reusing its requirements")
+                job_requirements = jd_agent.reuse_requirements(job_id, source)
+                reused_job_ids.add(job_id)
+        print(f"Job {row_num+1} requirements: {len(job_requirements.skills)} skills, {job_requirements.experience} experience, education: {job_requirements.education}")
+        return job_title, company_name, job_id
+    
+    def match_job(job):
+        job_title, company_name, job_id = job
+        
+        # Match candidates to job (once profiles and requirements have reached the database)
+        print(f"\nMatching {len(candidate_ids)} candidates to '{job_title}'...")
+        writer.flush()
+        candidate_store.refresh()
+        match_results = matching_agent.match_candidates(job_id, candidate_ids)
+        
+        # Print match results
+        print("\nMatch Results:")
+        for i, result in enumerate(match_results):
+            status = "SHORTLISTED" if result.shortlisted else "Not shortlisted"
+            print(f"{i+1}. Candidate {result.candidate_name}: {result.overall_score:.1f}% match - {status}")
+            print(f"   Skills: {result.skills_score:.1f}%, Experience: {result.experience_score:.1f}%, Education: {result.education_score:.1f}%")
+        
+        # Count shortlisted candidates (across all matches, not just the reported top K)
+        shortlisted_count = matching_agent.last_match_stats["shortlisted"]
+        
+        if shortlisted_count == 0:
+            print("\nNo candidates were shortlisted for this job. Consider lowering the threshold.")
+            checkpoint("job", job_id)
+            return None
+        return job_title, company_name, job_id, shortlisted_count
+    
+    def schedule_job(shortlist):
+        job_title, company_name, job_id, shortlisted_count = shortlist
+        
+        # Schedule interviews for shortlisted candidates
+        print(f"\nScheduling interviews for {shortlisted_count} shortlisted candidates of '{job_title}'...")
+        writer.flush()
+        interviews = scheduler_agent.schedule_interviews(job_id, job_title, company_name)
+        
+        print(f"{len(interviews)} interview invitations prepared.")
+        
+        print(f"\nJob screening completed for '{job_title}'")
+        print(f"Processed {len(candidate_ids)} resumes, shortlisted {shortlisted_count} candidates ({shortlisted_count/len(candidate_ids)*100:.1f}%)")
+        checkpoint("job", job_id)
+        return job_id
+    
+    def read_jobs(csv_reader):
+        nonlocal resumed_jobs
+        for row_num, row in enumerate(csv_reader):
+            if len(row) < 2:
+                print(f"Warning: Row {row_num+2} does not have enough columns, skipping")
+                continue
+            
+            job_title = row[0]
+            job_description = row[1]
+            company_name = "Example Company"
+            
+            # Jobs are keyed by a fingerprint of their content, so rows seen
+            # in an earlier run reuse the stored requirements
+            job_hash = compute_text_fingerprint(job_title, company_name, job_description)
+            job_id = fingerprint_to_id("job", job_hash)
+            
+            if job_id in done_jobs:
+                print(f"Skipping job {row_num+1} completed earlier in this run: {job_title}")
+                resumed_jobs += 1
+                continue
+            yield row_num, job_title, job_description, company_name, job_hash, job_id
+    
+    job_pipeline = Pipeline([
+        Stage("analyze", analyze_job, args.jd_workers, ASYNC, on_error=checkpoint_failure("job", lambda task: task[5])),
+        Stage("match", match_job, on_error=checkpoint_failure("job", lambda job: job[2])),
+        Stage("schedule", schedule_job, on_error=checkpoint_failure("job", lambda shortlist: shortlist[2]))
+    ], name="jobs", profiler=profiler)
     
     try:
         with open(jobs_csv_file, 'r', encoding='latin-1') as csv_file:
             csv_reader = csv.reader(csv_file)
             header = next(csv_reader)  # Skip header row
-            
-            for row_num, row in enumerate(csv_reader):
-                if len(row) < 2:
-                    print(f"Warning: Row {row_num+2} does not have enough columns, skipping")
-                    continue
-                
-                job_title = row[0]
-                job_description = row[1]
-                company_name = "Example Company"
-                
-                print(f"\nProcessing job {row_num+1}: {job_title}")
-                
-                # Generate job ID and store job
-                job_id = f"job_{datetime.now().strftime('%Y%m%d%H%M%S')}_{row_num}"
-                store_job(job_id, job_title, company_name, job_description)
-                
-                # Process job requirements
-                print("Extracting job requirements...")
-                job_requirements = jd_agent.process_job(job_id, job_description)
-                print(f"Extracted requirements: {len(job_requirements['skills'])} skills, {job_requirements['experience']} experience, education: {job_requirements['education']}")
-                
-                # Match candidates to job
-                print(f"Matching {len(candidate_ids)} candidates to job requirements...")
-                match_results = matching_agent.match_candidates(job_id, candidate_ids)
-                
-                # Print match results
-                print("\nMatch Results:")
-                for i, result in enumerate(match_results):
-                    status = "SHORTLISTED" if result["shortlisted"] else "Not shortlisted"
-                    print(f"{i+1}. Candidate {result['candidate_name']}: {result['overall_score']:.1f}% match - {status}")
-                    print(f"   Skills: {result['skills_score']:.1f}%, Experience: {result['experience_score']:.1f}%, Education: {result['education_score']:.1f}%")
-                
-                # Count shortlisted candidates
-                shortlisted_count = sum(1 for result in match_results if result["shortlisted"])
-                
-                if shortlisted_count == 0:
-                    print("\nNo candidates were shortlisted for this job. Consider lowering the threshold.")
-                    continue
-                
-                # Schedule interviews for shortlisted candidates
-                print(f"\nScheduling interviews for {shortlisted_count} shortlisted candidates...")
-                interviews = scheduler_agent.schedule_interviews(job_id, job_title, company_name)
-                
-                print(f"{len(interviews)} interview invitations prepared.")
-                
-                print(f"\nJob screening completed for '{job_title}'")
-                print(f"Processed {len(candidate_ids)} resumes, shortlisted {shortlisted_count} candidates ({shortlisted_count/len(candidate_ids)*100:.1f}%)")
+            job_pipeline.run(read_jobs(csv_reader))
     
     except Exception as e:
         print(f"Error processing CSV file: {e}")
     
+    if new_resumes:
+        chunks = f" (chunks of {Config.BULK_CHUNK_SIZE} resumes)" if args.no_llm else ""
+        print(f"\nResume pipeline throughput{chunks}:\n{resume_pipeline.format_stats()}")
+    print(f"\nJob pipeline throughput:\n{job_pipeline.format_stats()}")
+    
+    print(f"\nSkipped {skipped_resumes} already processed resumes and {len(skipped_job_ids)} already analyzed jobs")
+    if reused_job_ids:
+        print(f"Reused requirements for {len(reused_job_ids)} jobs with a duplicate description")
+    
+    # Items that failed and did not succeed later in this run
+    writer.flush()
+    failed_resumes = get_run_checkpoints(run_id, "resume", "failed")
+    failed_jobs = get_run_checkpoints(run_id, "job", "failed")
+    if resumed_resumes or resumed_jobs:
+        print(f"Skipped {resumed_resumes} resumes and {resumed_jobs} jobs completed earlier in run {run_id}")
+    if failed_resumes or failed_jobs:
+        print(f"\n{len(failed_resumes)} resumes and {len(failed_jobs)} jobs failed; retry them with --resume {run_id}")
+        return False
+    
     print("\nAll jobs processed successfully!")
+    return True
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,390 @@
+# File: service.py
+# Local HTTP/JSON screening service that keeps the agents warm between requests
+import os
+import re
+import json
+import uuid
+import time
+import base64
+import asyncio
+import argparse
+from config import Config
+from utils import metrics
+from utils.llm_connector import configure_llm, close_llm
+import multiprocessing
+from urllib.parse import urlsplit, parse_qs
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from agents.jd_analyzer import JDAnalyzer
+from agents.cv_parser1 import CVParser, load_duplicate_index
+from agents.matcher import MatchingEngine
+from utils.document_processor import (extract_text_from_file, compute_file_fingerprint, compute_text_fingerprint,
+                                      compute_description_fingerprint)
+from utils.pipeline import DEFAULT_EXTRACT_WORKERS, DEFAULT_LLM_WORKERS
+from utils.near_duplicate import DEFAULT_SIMILARITY_THRESHOLD
+from db.database import (setup_database, get_job_requirements, job_requirements_exist,
+                         find_job_requirements_by_description, get_known_candidate_ids,
+                         get_candidate_profiles, get_shortlisted_candidates, fingerprint_to_id,
+                         set_compact_storage)
+from db.writer import WriteBehindWriter
+from db.columnar import ColumnarCandidateStore
+
+MAX_BODY_BYTES = 20 * 1024 * 1024
+UPLOAD_EXTENSIONS = ('.pdf', '.docx', '.doc', '.txt')
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+class HTTPError(Exception):
+    """Error returned to the client as a JSON body with an HTTP status"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+def main():
+    parser = argparse.ArgumentParser(description='Local HTTP/JSON screening service')
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='Address to listen on')
+    parser.add_argument('--port', type=int, default=8080, help='Port to listen on')
+    parser.add_argument('--threshold', type=float, default=Config.DEFAULT_THRESHOLD, help='Match threshold (0-100)')
+    parser.add_argument('--max_requests', type=int, default=64,
+                        help='Requests handled at once; further requests get 503 right away')
+    parser.add_argument('--llm_workers', type=int, default=DEFAULT_LLM_WORKERS,
+                        help='Requests calling the LLM at once, at most; the adaptive LLM concurrency limit decides how many reach the server')
+    parser.add_argument('--extract_workers', type=int, default=DEFAULT_EXTRACT_WORKERS,
+                        help='Processes extracting text from uploaded files')
+    parser.add_argument('--upload_dir', type=str, default='uploads', help='Directory for uploaded files')
+    parser.add_argument('--compact_storage', action='store_true',
+                        help='Store profiles in the compact binary encoding and compress resume text')
+    parser.add_argument('--llm_host', type=str, help='Ollama server URL (default: $OLLAMA_HOST or localhost:11434)')
+    parser.add_argument('--route_models', action='store_true',
+                        help='Pick the model per task and prompt size from Config.MODEL_ROUTES and recorded latency profiles')
+    parser.add_argument('--mock_llm', type=str, nargs='?', const='', metavar='SPEC',
+                        help='Answer LLM calls with a local mock server, e.g. "latency=uniform:0.1:0.5,error_rate=0.05"')
+    parser.add_argument('--duplicate_threshold', type=float, default=DEFAULT_SIMILARITY_THRESHOLD,
+                        help='Similarity (0-1) above which a resume reuses an existing profile; 0 disables near-duplicate detection')
+
+    args = parser.parse_args()
+
+    print("Setting up database...")
+    setup_database()
+    set_compact_storage(args.compact_storage)
+
+    mock_llm = configure_llm(args)
+    writer = WriteBehindWriter()
+    service = ScreeningService(args, writer)
+    try:
+        asyncio.run(service.serve())
+    except KeyboardInterrupt:
+        print("\nStopping...")
+    finally:
+        service.close()
+        writer.close()
+        close_llm(mock_llm)
+
+class ScreeningService:
+    """Screening endpoints over warm agents, a warm candidate store and the write-behind writer
+
+    Endpoints (JSON in and out):
+        GET  /health
+        GET  /metrics                                     -> Prometheus text format
+        POST /upload     {"filename", "content": base64}  -> {"upload_id"}
+        POST /parse      {"upload_id"} or {"text"}        -> candidate profile
+        POST /jobs       {"title", "company", "description"} -> job ID and requirements
+        POST /match      {"job_id", "candidate_ids"?, "top_k"?} -> match results
+        GET  /shortlist?job_id=...                        -> shortlisted candidates
+    """
+
+    def __init__(self, args, writer):
+        self.args = args
+        self.writer = writer
+        self.jd_agent = JDAnalyzer(writer=writer)
+        self.cv_agent = CVParser(writer=writer, duplicate_index=load_duplicate_index(args.duplicate_threshold))
+        self.candidate_store = ColumnarCandidateStore()
+        self.candidate_store.load()
+        self.matching_agent = MatchingEngine(threshold=args.threshold, writer=writer,
+                                             candidate_store=self.candidate_store)
+
+        os.makedirs(args.upload_dir, exist_ok=True)
+        self.threads = ThreadPoolExecutor(max_workers=args.llm_workers + 8, thread_name_prefix="service")
+        self.processes = ProcessPoolExecutor(max_workers=args.extract_workers,
+                                             mp_context=multiprocessing.get_context("spawn"))
+        self.active_requests = 0
+        self.handled_requests = 0
+        self.rejected_requests = 0
+
+        self.routes = {
+            ("GET", "/health"): self.health,
+            ("GET", "/metrics"): self.metrics_page,
+            ("POST", "/upload"): self.upload,
+            ("POST", "/parse"): self.parse,
+            ("POST", "/jobs"): self.create_job,
+            ("POST", "/match"): self.match,
+            ("GET", "/shortlist"): self.shortlist,
+        }
+
+    async def serve(self):
+        # Created on the running loop
+        self.llm_slots = asyncio.Semaphore(self.args.llm_workers)
+        self.match_lock = asyncio.Lock()  # One match at a time: it refreshes and reads the shared store
+
+        server = await asyncio.start_server(self.handle_connection, self.args.host, self.args.port)
+        print(f"Screening service listening on http://{self.args.host}:{self.args.port}")
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        self.threads.shutdown()
+        self.processes.shutdown()
+
+    def run_blocking(self, func, *args):
+        return asyncio.get_running_loop().run_in_executor(self.threads, func, *args)
+
+    async def handle_connection(self, reader, writer):
+        """Serve HTTP/1.1 requests on one connection until the client closes it"""
+        try:
+            while True:
+                request = await read_request(reader)
+                if request is None:
+                    break
+                method, target, headers, body = request
+
+                status, payload = await self.dispatch(method, target, body)
+                keep_alive = headers.get("connection", "").lower() != "close"
+                writer.write(format_response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except HTTPError as e:
+            # The request itself could not be read
+            writer.write(format_response(e.status, {"error": e.message}, False))
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def dispatch(self, method, target, body):
+        url = urlsplit(target)
+        route = self.routes.get((method, url.path))
+        if route is None:
+            if any(path == url.path for _, path in self.routes):
+                return 405, {"error": f"{method} is not allowed on {url.path}"}
+            return 404, {"error": f"Unknown endpoint: {url.path}"}
+
+        # Reject right away instead of queueing when the service is saturated
+        if self.active_requests >= self.args.max_requests:
+            self.rejected_requests += 1
+            return 503, {"error": "Too many requests in progress, retry later"}
+
+        self.active_requests += 1
+        started = time.perf_counter()
+        status = 500
+        try:
+            query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            data = {}
+            if body:
+                try:
+                    data = json.loads(body)
+                except ValueError:
+                    raise HTTPError(400, "Request body must be JSON")
+                if not isinstance(data, dict):
+                    raise HTTPError(400, "Request body must be a JSON object")
+            payload = await route(query, data)
+            status = 200
+            return status, payload
+        except HTTPError as e:
+            status = e.status
+            return e.status, {"error": e.message}
+        except Exception as e:
+            print(f"Error handling {method} {url.path}: {e}")
+            return 500, {"error": str(e)}
+        finally:
+            self.active_requests -= 1
+            self.handled_requests += 1
+            metrics.observe("service_request_seconds", time.perf_counter() - started, path=url.path, status=status)
+
+    async def health(self, query, data):
+        return {
+            "status": "ok",
+            "candidates": len(self.candidate_store),
+            "active_requests": self.active_requests,
+            "handled_requests": self.handled_requests,
+            "rejected_requests": self.rejected_requests,
+            "pending_writes": self.writer.pending
+        }
+
+    async def metrics_page(self, query, data):
+        return metrics.format_prometheus()
+
+    async def upload(self, query, data):
+        filename = os.path.basename(data.get("filename") or "")
+        ext = os.path.splitext(filename)[1].lower()
+        if ext not in UPLOAD_EXTENSIONS:
+            raise HTTPError(400, f"filename must end with one of {', '.join(UPLOAD_EXTENSIONS)}")
+        try:
+            content = base64.b64decode(data.get("content") or "", validate=True)
+        except ValueError:
+            raise HTTPError(400, "content must be base64")
+
+        # Uploads are named by their fingerprint, the same one the CLIs use for resume files
+        upload_id = await self.run_blocking(self._save_upload, content, ext)
+        return {"upload_id": upload_id, "filename": filename, "bytes": len(content)}
+
+    def _save_upload(self, content, ext):
+        temp_path = os.path.join(self.args.upload_dir, f".incoming-{uuid.uuid4().hex}{ext}")
+        with open(temp_path, 'wb') as file:
+            file.write(content)
+        upload_id = compute_file_fingerprint(temp_path)
+        os.replace(temp_path, os.path.join(self.args.upload_dir, upload_id + ext))
+        return upload_id
+
+    def _upload_path(self, upload_id):
+        if not re.fullmatch(r'[0-9a-f]{64}', upload_id or ""):
+            raise HTTPError(400, "upload_id must be the ID returned by /upload")
+        for ext in UPLOAD_EXTENSIONS:
+            path = os.path.join(self.args.upload_dir, upload_id + ext)
+            if os.path.exists(path):
+                return path
+        raise HTTPError(404, f"Unknown upload: {upload_id}")
+
+    async def parse(self, query, data):
+        if data.get("upload_id"):
+            path = self._upload_path(data["upload_id"])
+            content_hash = data["upload_id"]
+            cv_text = None
+        elif data.get("text"):
+            path = None
+            cv_text = data["text"]
+            content_hash = compute_text_fingerprint(cv_text)
+        else:
+            raise HTTPError(400, "Provide an upload_id or the resume text")
+
+        candidate_id = fingerprint_to_id("cand", content_hash)
+        known = await self.run_blocking(get_known_candidate_ids, [candidate_id])
+        if candidate_id in known:
+            await self.run_blocking(self.writer.flush)
+            candidate = (await self.run_blocking(get_candidate_profiles, candidate_id)).get(candidate_id)
+            if candidate is not None:
+                return candidate_json(candidate, cached=True)
+
+        if cv_text is None:
+            loop = asyncio.get_running_loop()
+            cv_text, worker_metrics = await loop.run_in_executor(self.processes, metrics.call_collecting,
+                                                                 extract_text_from_file, path)
+            metrics.merge(worker_metrics)
+
+        async with self.llm_slots:
+            candidate, duplicate_of, signature = await self.run_blocking(self.cv_agent.parse_cv, candidate_id, cv_text)
+        await self.run_blocking(self.cv_agent.store_cv, candidate, content_hash, duplicate_of, signature)
+        return candidate_json(candidate, cached=False, duplicate_of=duplicate_of)
+
+    async def create_job(self, query, data):
+        description = data.get("description")
+        if not description:
+            raise HTTPError(400, "description is required")
+        title = data.get("title") or "Untitled"
+        company = data.get("company") or "Your Company"
+
+        job_hash = compute_text_fingerprint(title, company, description)
+        job_id = fingerprint_to_id("job", job_hash)
+
+        if await self.run_blocking(job_requirements_exist, job_id):
+            requirements = await self.run_blocking(get_job_requirements, job_id)
+            return {"job_id": job_id, "cached": True, "requirements": requirements.to_dict()}
+
+        description_hash = compute_description_fingerprint(description)
+        await self.run_blocking(self.writer.submit, "jobs", job_id, title, company, description, job_hash, description_hash)
+
+        source = await self.run_blocking(find_job_requirements_by_description, description_hash)
+        if source is not None:
+            requirements = await self.run_blocking(self.jd_agent.reuse_requirements, job_id, source)
+        else:
+            async with self.llm_slots:
+                requirements = await self.run_blocking(self.jd_agent.process_job, job_id, description)
+        return {"job_id": job_id, "cached": False, "requirements": requirements.to_dict()}
+
+    async def match(self, query, data):
+        job_id = data.get("job_id")
+        if not job_id:
+            raise HTTPError(400, "job_id is required")
+        candidate_ids = data.get("candidate_ids")
+        if candidate_ids is not None and (not isinstance(candidate_ids, list)
+                                          or not all(isinstance(c, str) for c in candidate_ids)):
+            raise HTTPError(400, "candidate_ids must be a list of candidate IDs")
+        top_k = data.get("top_k")
+        if top_k is not None and (not isinstance(top_k, int) or isinstance(top_k, bool) or top_k < 1):
+            raise HTTPError(400, "top_k must be a whole number of at least 1")
+
+        # Profiles and requirements submitted by earlier requests must be visible first
+        await self.run_blocking(self.writer.flush)
+        if not await self.run_blocking(job_requirements_exist, job_id):
+            raise HTTPError(404, f"Unknown job: {job_id}")
+
+        async with self.match_lock:
+            await self.run_blocking(self.candidate_store.refresh)
+            results = await self.run_blocking(self.matching_agent.match_candidates, job_id, candidate_ids, top_k)
+            stats = dict(self.matching_agent.last_match_stats)
+        return {"job_id": job_id, "stats": stats, "results": [result.to_dict() for result in results]}
+
+    async def shortlist(self, query, data):
+        job_id = query.get("job_id") or data.get("job_id")
+        if not job_id:
+            raise HTTPError(400, "job_id is required")
+
+        await self.run_blocking(self.writer.flush)
+        return {"job_id": job_id, "shortlisted": await self.run_blocking(get_shortlisted_candidates, job_id)}
+
+def candidate_json(candidate, **extra):
+    data = {"candidate_id": candidate.candidate_id}
+    data.update(candidate.to_profile())
+    data.update(extra)
+    return data
+
+async def read_request(reader):
+    """Read one HTTP request: (method, target, headers, body), or None at end of stream"""
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    try:
+        method, target, _ = request_line.decode("latin-1").split()
+    except ValueError:
+        raise HTTPError(400, "Malformed request line")
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get("content-length") or 0)
+    except ValueError:
+        raise HTTPError(400, "Content-Length must be a number")
+    if length < 0:
+        raise HTTPError(400, "Content-Length must not be negative")
+    if length > MAX_BODY_BYTES:
+        raise HTTPError(413, f"Request body larger than {MAX_BODY_BYTES} bytes")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), target, headers, body
+
+def format_response(status, payload, keep_alive):
+    # Text payloads (the /metrics page) are sent as they are, everything else as JSON
+    if isinstance(payload, str):
+        body = payload.encode("utf-8")
+        content_type = "text/plain; version=0.0.4"
+    else:
+        body = json.dumps(payload, default=str).encode("utf-8")
+        content_type = "application/json"
+    head = (
+        f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return head.encode("latin-1") + body
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+# File: tests/helpers.py
+# Shared setup for the tests: a throwaway database per test case
+
+import os
+import shutil
+import tempfile
+import unittest
+import db.database as database
+
+class DatabaseTestCase(unittest.TestCase):
+    """Test case with a fresh database file, set up like setup_database() does for the CLIs"""
+
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix="screening-test-")
+        self._db_file = database.DB_FILE
+        database.DB_FILE = os.path.join(self.work_dir, "test.db")
+        database.setup_database()
+
+    def tearDown(self):
+        database.DB_FILE = self._db_file
+        shutil.rmtree(self.work_dir, ignore_errors=True)
@@ -0,0 +1,66 @@
+# File: tests/test_cv_parser.py
+import unittest
+from agents.cv_parser1 import CVParser
+from utils.near_duplicate import MinHashIndex
+from tests.helpers import DatabaseTestCase
+
+RESUME = """{name}
+{email} | {phone}
+
+Summary
+Backend engineer with eight years of experience building scalable services, data pipelines
+and cloud platforms for customers in finance, retail and logistics. Led migrations of legacy
+applications, automated testing and deployment, and reduced latency across the platform.
+
+Skills:
+- Python
+- Django
+- PostgreSQL
+- Docker
+- Kubernetes
+
+Experience:
+Company 12 Inc
+Senior Developer, 2019-04 - Present
+- designed and maintained scalable services for clients across the platform and data pipelines
+- improved performance of applications and automated deployment of features to the cloud
+Company 48 Inc
+Software Engineer, 2015-02 - 2019-03
+- developed features for customers and migrated the platform to cloud services with the team
+
+Education:
+Bachelor of Science in Computer Science, University of Technology, 2014
+"""
+
+class NearDuplicateTest(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        # Regex extraction, so the test needs no LLM server
+        self.parser = CVParser(duplicate_index=MinHashIndex(threshold=0.8), use_llm=False)
+        original = RESUME.format(name="Gerald Taylor", email="gerald.taylor@example.com", phone="555-201-3344")
+        candidate, duplicate_of, signature = self.parser.parse_cv("cand_original", original)
+        self.parser.store_cv(candidate, duplicate_of=duplicate_of, signature=signature)
+
+    def test_template_resume_of_another_person_is_parsed(self):
+        text = RESUME.format(name="Devin Frazier", email="devin.frazier@example.com", phone="555-987-6543")
+        candidate, duplicate_of, _ = self.parser.parse_cv("cand_other", text)
+
+        self.assertIsNone(duplicate_of)
+        self.assertEqual(candidate.candidate_id, "cand_other")
+        self.assertEqual(candidate.name, "Devin Frazier")
+        self.assertEqual(candidate.email, "devin.frazier@example.com")
+        self.assertEqual(candidate.phone, "555-987-6543")
+
+    def test_resubmitted_resume_reuses_the_profile(self):
+        # Same person with a reformatted phone number and a reworded line
+        text = RESUME.format(name="Gerald Taylor", email="Gerald.Taylor@example.com", phone="(555) 201-3344")
+        text = text.replace("Led migrations", "Led the migrations")
+        candidate, duplicate_of, _ = self.parser.parse_cv("cand_copy", text)
+
+        self.assertEqual(duplicate_of, "cand_original")
+        self.assertEqual(candidate.candidate_id, "cand_copy")
+        self.assertEqual(candidate.name, "Gerald Taylor")
+        self.assertEqual(candidate.resume_text, text)
+
+if __name__ == "__main__":
+    unittest.main()
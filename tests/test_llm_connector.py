@@ -0,0 +1,62 @@
+# File: tests/test_llm_connector.py
+import time
+import threading
+import unittest
+from unittest import mock
+import utils.llm_connector as llm_connector
+from utils.adaptive_limit import AdaptiveLimiter
+from utils.circuit_breaker import CircuitBreaker, CircuitOpenError, CLOSED, OPEN
+
+class OpenCircuitTest(unittest.TestCase):
+    def setUp(self):
+        self.limiter = AdaptiveLimiter("test", initial=1, min_limit=1, max_limit=1)
+        self.breaker = CircuitBreaker("test", failure_threshold=1, probe_interval=60.0)
+        with self.assertRaises(ValueError):
+            self.breaker.call(self.fail)
+        self.assertEqual(self.breaker.state, OPEN)
+
+        patches = [
+            mock.patch.object(llm_connector, "limiter", self.limiter),
+            mock.patch.object(llm_connector, "breaker", self.breaker),
+            mock.patch.object(llm_connector, "_get_client", lambda: None),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    @staticmethod
+    def fail():
+        raise ValueError("server down")
+
+    def test_open_circuit_fails_fast_while_the_limiter_is_saturated(self):
+        # A hung request holds the only slot
+        self.limiter.acquire()
+        outcome = []
+
+        def call():
+            started = time.perf_counter()
+            try:
+                llm_connector.chat("prompt", "model")
+            except CircuitOpenError:
+                outcome.append(time.perf_counter() - started)
+
+        thread = threading.Thread(target=call, daemon=True)
+        thread.start()
+        thread.join(2.0)
+
+        self.assertFalse(thread.is_alive(), "chat() waited for a concurrency slot")
+        self.assertEqual(len(outcome), 1)
+        self.assertLess(outcome[0], 0.5)
+        # The refused call took no slot and left no sample for the limit adjustment
+        self.assertEqual(self.limiter.in_flight, 1)
+        self.assertEqual(self.limiter._samples, 0)
+        self.assertEqual(self.breaker.rejected, 1)
+
+    def test_check_does_not_take_the_probe(self):
+        self.breaker.next_probe = 0.0
+        self.breaker.check()
+        self.assertEqual(self.breaker.call(lambda: "reply"), "reply")
+        self.assertEqual(self.breaker.state, CLOSED)
+
+if __name__ == "__main__":
+    unittest.main()
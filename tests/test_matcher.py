@@ -0,0 +1,36 @@
+# File: tests/test_matcher.py
+import unittest
+import db.database as database
+from agents.matcher import MatchingEngine
+from db.models import Candidate, JobRequirements
+from tests.helpers import DatabaseTestCase
+
+JOB_ID = "job_backend"
+
+class TopKTest(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        database.store_job(JOB_ID, "Backend Engineer", "Acme", "Python services")
+        database.store_job_requirements(JobRequirements(JOB_ID, ["Python", "Docker"], "3 years", "Bachelor"))
+        self.candidate_ids = []
+        for i, skills in enumerate((["Python"], ["Python", "Docker"], [])):
+            profile = {"name": f"Candidate {i}", "contact": {"email": f"candidate{i}@example.com", "phone": ""},
+                       "skills": skills, "experience": [], "education": []}
+            database.store_candidate_profile(Candidate.from_profile(f"cand_{i}", profile, f"Resume {i}"))
+            self.candidate_ids.append(f"cand_{i}")
+
+    def test_top_k_must_be_positive(self):
+        engine = MatchingEngine()
+        for top_k in (0, -1):
+            with self.assertRaises(ValueError):
+                engine.match_candidates(JOB_ID, self.candidate_ids, top_k=top_k)
+            with self.assertRaises(ValueError):
+                MatchingEngine(top_k=top_k)
+
+    def test_top_k_keeps_the_best_matches(self):
+        results = MatchingEngine(top_k=1).match_candidates(JOB_ID, self.candidate_ids)
+
+        self.assertEqual([result.candidate_id for result in results], ["cand_1"])
+
+if __name__ == "__main__":
+    unittest.main()
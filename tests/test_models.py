@@ -0,0 +1,23 @@
+# File: tests/test_models.py
+import datetime
+import unittest
+from db.models import Experience
+
+class DurationYearsTest(unittest.TestCase):
+    def test_missing_end_date_means_present(self):
+        start = datetime.datetime.now().year - 4
+        present = Experience.from_dict({"start_date": str(start), "end_date": "present"}).duration_years()
+
+        self.assertEqual(present, 4)
+        self.assertEqual(Experience.from_dict({"start_date": str(start), "end_date": None}).duration_years(), present)
+        self.assertEqual(Experience.from_dict({"start_date": str(start), "end_date": ""}).duration_years(), present)
+        self.assertEqual(Experience(start_date=str(start)).duration_years(), present)
+
+    def test_months_are_counted(self):
+        self.assertEqual(Experience(start_date="2015-02", end_date="2019-08").duration_years(), 4.5)
+
+    def test_entry_without_start_date_does_not_count(self):
+        self.assertEqual(Experience(start_date=None, end_date="2020").duration_years(), 0)
+
+if __name__ == "__main__":
+    unittest.main()
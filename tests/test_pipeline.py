@@ -0,0 +1,59 @@
+# File: tests/test_pipeline.py
+import os
+import tempfile
+import threading
+import unittest
+from utils.document_processor import extract_document
+from utils.pipeline import Pipeline, Stage, THREAD, PROCESS, ASYNC
+
+class OnErrorTest(unittest.TestCase):
+    def test_failing_items_are_reported_from_a_worker_process(self):
+        with tempfile.TemporaryDirectory() as directory:
+            present = os.path.join(directory, "present.txt")
+            with open(present, "w", encoding="utf-8") as file:
+                file.write("Resume text")
+            unsupported = os.path.join(directory, "resume.odt")
+            failures = []
+
+            pipeline = Pipeline([
+                Stage("extract", extract_document, 2, PROCESS,
+                      on_error=lambda item, error: failures.append((item[0], type(error)))),
+            ])
+            results = pipeline.run([("present", present), ("unsupported", unsupported)])
+
+        self.assertEqual(results, [("present", "Resume text")])
+        self.assertEqual(failures, [("unsupported", ValueError)])
+        self.assertEqual(pipeline.stats[0].failed, 1)
+
+    def test_failing_items_of_an_async_stage_are_reported(self):
+        failures = []
+
+        def parse(item):
+            if item % 2:
+                raise ValueError(item)
+            return item
+
+        pipeline = Pipeline([Stage("parse", parse, 4, ASYNC, on_error=lambda item, error: failures.append(item))])
+        results = pipeline.run(range(6))
+
+        self.assertEqual(sorted(results), [0, 2, 4])
+        self.assertEqual(sorted(failures), [1, 3, 5])
+
+    def test_failing_on_error_does_not_stop_the_stage(self):
+        def fail(item):
+            raise ValueError(item)
+
+        def on_error(item, error):
+            raise RuntimeError("Cannot submit to a closed writer")
+
+        for mode, workers in ((THREAD, 2), (ASYNC, 2)):
+            pipeline = Pipeline([Stage("s", fail, workers, mode, on_error=on_error)], queue_size=2)
+            finished = threading.Event()
+            thread = threading.Thread(target=lambda: (pipeline.run(range(100)), finished.set()), daemon=True)
+            thread.start()
+
+            self.assertTrue(finished.wait(10), f"{mode} pipeline hung")
+            self.assertEqual(pipeline.stats[0].failed, 100)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+# File: tests/test_scheduler.py
+import datetime
+import json
+import unittest
+import db.database as database
+from agents.scheduler import InterviewScheduler, create_slot_allocator
+from db.models import Candidate, MatchResult
+from tests.helpers import DatabaseTestCase
+
+JOB_ID = "job_backend"
+
+class SchedulerRerunTest(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        database.store_job(JOB_ID, "Backend Engineer", "Acme", "Python services")
+
+    def shortlist(self, *numbers):
+        for i in numbers:
+            profile = {"name": f"Candidate {i}", "contact": {"email": f"candidate{i}@example.com", "phone": ""},
+                       "skills": ["Python"], "experience": [], "education": []}
+            database.store_candidate_profile(Candidate.from_profile(f"cand_{i}", profile, f"Resume {i}"))
+            database.store_match_results(MatchResult(JOB_ID, f"cand_{i}", overall_score=90 - i, shortlisted=True))
+
+    def schedule(self, availability):
+        database.store_interviewer_availability(availability)
+        scheduler = InterviewScheduler(email_mode="template", allocator=create_slot_allocator(), use_llm=False)
+        return scheduler.schedule_interviews(JOB_ID, "Backend Engineer", "Acme")
+
+    def interviews(self):
+        conn = database.get_connection()
+        rows = conn.execute('''
+            SELECT candidate_id, status, proposed_slots FROM interviews ORDER BY interview_id
+        ''').fetchall()
+        outbox = conn.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+        conn.close()
+        return rows, outbox
+
+    def test_rerun_keeps_earlier_invitations(self):
+        availability = [("Alex", "Mon-Fri", "09:00", "17:00")]
+        self.shortlist(1, 2)
+        self.assertEqual(len(self.schedule(availability)), 2)
+        first, _ = self.interviews()
+
+        # A new candidate is shortlisted and the scheduler runs again
+        self.shortlist(3)
+        scheduled = self.schedule(availability)
+        rows, outbox = self.interviews()
+
+        self.assertEqual([interview["candidate"]["candidate_id"] for interview in scheduled], ["cand_3"])
+        self.assertEqual([row[0] for row in rows], ["cand_1", "cand_2", "cand_3"])
+        self.assertEqual(rows[:2], first)
+        self.assertEqual(outbox, 3)
+        # No slot is held twice
+        slots = [(slot["interviewer"], slot["start"]) for row in rows for slot in json.loads(row[2])]
+        self.assertEqual(len(slots), len(set(slots)))
+
+    def test_rerun_schedules_candidates_awaiting_slots(self):
+        # One hour of interviewer time: room for a single candidate
+        day = datetime.date.today() + datetime.timedelta(days=10)
+        self.shortlist(1, 2)
+        self.schedule([("Alex", "", f"{day}T09:00", f"{day}T10:00")])
+        rows, _ = self.interviews()
+        self.assertEqual([row[1] for row in rows], ["Invitation Sent", "Awaiting Slots"])
+
+        self.schedule([("Blair", "", f"{day}T09:00", f"{day}T10:00")])
+        rows, outbox = self.interviews()
+
+        self.assertEqual([row[:2] for row in rows], [("cand_1", "Invitation Sent"), ("cand_2", "Invitation Sent")])
+        self.assertEqual(json.loads(rows[1][2])[0]["interviewer"], "Blair")
+        self.assertEqual(outbox, 2)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+# File: tests/test_service.py
+import os
+import json
+import asyncio
+import argparse
+import unittest
+from db.writer import WriteBehindWriter
+from service import ScreeningService
+from tests.helpers import DatabaseTestCase
+
+class BadRequestTest(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        args = argparse.Namespace(host="127.0.0.1", port=0, threshold=70.0, max_requests=4, llm_workers=2,
+                                  extract_workers=1, upload_dir=os.path.join(self.work_dir, "uploads"),
+                                  duplicate_threshold=0)
+        self.writer = WriteBehindWriter()
+        self.service = ScreeningService(args, self.writer)
+        self.addCleanup(self.writer.close)
+        self.addCleanup(self.service.close)
+
+    def request(self, raw):
+        """Send raw request bytes and return the (status, JSON payload) of the response"""
+        async def exchange():
+            server = await asyncio.start_server(self.service.handle_connection, "127.0.0.1", 0)
+            async with server:
+                reader, writer = await asyncio.open_connection(*server.sockets[0].getsockname()[:2])
+                writer.write(raw)
+                await writer.drain()
+                response = await reader.read()
+                writer.close()
+                return response
+
+        response = asyncio.run(exchange())
+        head, _, body = response.partition(b"\r\n\r\n")
+        return int(head.split()[1]), json.loads(body)
+
+    def post(self, body, path="/jobs"):
+        return self.request(b"POST %s HTTP/1.1\r\nConnection: close\r\n"
+                            b"Content-Length: %d\r\n\r\n%s" % (path.encode(), len(body), body))
+
+    def test_invalid_match_parameters(self):
+        for body, message in (({"top_k": 0}, "top_k"), ({"top_k": -3}, "top_k"), ({"top_k": "5"}, "top_k"),
+                              ({"top_k": 2.5}, "top_k"), ({"top_k": True}, "top_k"),
+                              ({"candidate_ids": "cand_1"}, "candidate_ids"),
+                              ({"candidate_ids": ["cand_1", 7]}, "candidate_ids")):
+            status, payload = self.post(json.dumps({"job_id": "job_backend", **body}).encode(), "/match")
+            self.assertEqual(status, 400, body)
+            self.assertIn(message, payload["error"])
+
+    def test_body_that_is_not_a_json_object(self):
+        for body in (b"[]", b'"x"', b"42", b"null"):
+            status, payload = self.post(body)
+            self.assertEqual(status, 400, body)
+            self.assertEqual(payload, {"error": "Request body must be a JSON object"})
+
+    def test_body_that_is_not_json(self):
+        for body in (b"{", b"\xff\xfe"):
+            status, payload = self.post(body)
+            self.assertEqual(status, 400, body)
+            self.assertEqual(payload, {"error": "Request body must be JSON"})
+
+    def test_invalid_content_length(self):
+        for length in (b"abc", b"-5"):
+            status, payload = self.request(b"POST /jobs HTTP/1.1\r\nContent-Length: " + length + b"\r\n\r\n{}")
+            self.assertEqual(status, 400, length)
+            self.assertIn("Content-Length", payload["error"])
+
+if __name__ == "__main__":
+    unittest.main()
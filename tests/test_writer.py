@@ -0,0 +1,87 @@
+# File: tests/test_writer.py
+import sqlite3
+import unittest
+from unittest import mock
+import db.database as database
+import db.writer as writer_module
+from db.models import Candidate
+from db.writer import WriteBehindWriter
+from tests.helpers import DatabaseTestCase
+
+class CountingCursor(sqlite3.Cursor):
+    """Counts statements that end the connection's transaction (e.g. RELEASE of an outermost savepoint)"""
+
+    def execute(self, sql, *args):
+        in_transaction = self.connection.in_transaction
+        result = super().execute(sql, *args)
+        if in_transaction and not self.connection.in_transaction:
+            self.connection.commits += 1
+        return result
+
+class CountingConnection(sqlite3.Connection):
+    """Connection that counts every committed transaction"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.commits = 0
+
+    def cursor(self, factory=CountingCursor):
+        return super().cursor(factory)
+
+    def commit(self):
+        if self.in_transaction:
+            self.commits += 1
+        super().commit()
+
+def make_candidate(i):
+    profile = {"name": f"Candidate {i}", "contact": {"email": f"candidate{i}@example.com", "phone": ""},
+               "skills": ["Python"], "experience": [], "education": []}
+    return Candidate.from_profile(f"cand_{i:04d}", profile, f"Resume {i}")
+
+class WriteBehindWriterTest(DatabaseTestCase):
+    def test_interleaved_batch_commits_once(self):
+        connections = []
+
+        def get_connection():
+            conn = sqlite3.connect(database.DB_FILE, factory=CountingConnection)
+            conn.execute("PRAGMA foreign_keys = ON")
+            connections.append(conn)
+            return conn
+
+        run_id = database.create_run("test", {})
+        with mock.patch.object(writer_module, "get_connection", get_connection):
+            writer = WriteBehindWriter(batch_size=1000, flush_interval=60)
+            # One table after the other per resume, as the screening pipelines submit them
+            for i in range(100):
+                candidate = make_candidate(i)
+                writer.submit("candidates", candidate)
+                writer.submit("resume_signatures", candidate.candidate_id, [i] * 8)
+                writer.submit("run_checkpoints", run_id, "resume", candidate.candidate_id)
+            writer.close()
+
+        self.assertEqual(writer.written, 300)
+        self.assertEqual(writer.batches, 1)
+        self.assertEqual(connections[0].commits, 1)
+
+        conn = database.get_connection()
+        counts = [conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                  for table in ("candidates", "resume_signatures", "run_checkpoints")]
+        conn.close()
+        self.assertEqual(counts, [100, 100, 100])
+
+    def test_bad_record_does_not_drop_the_batch(self):
+        writer = WriteBehindWriter(batch_size=1000, flush_interval=60)
+        writer.submit("candidates", make_candidate(1))
+        # References a run that does not exist
+        writer.submit("run_checkpoints", "no_such_run", "resume", "cand_0001")
+        writer.submit("candidates", make_candidate(2))
+        writer.close()
+
+        self.assertEqual(writer.written, 2)
+        self.assertEqual(writer.failed, 1)
+        conn = database.get_connection()
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM candidates").fetchone()[0], 2)
+        conn.close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+# File: utils/adaptive_limit.py
+# AIMD concurrency limit for calls to a shared backend such as the Ollama server
+#
+# Callers wait for a slot before each call. The limit is adjusted once per
+# window of about `limit` completed calls: when the window's latency stays
+# within `tolerance` times the baseline (the best window so far) and few
+# calls failed, the limit grows by one (if callers actually used it); when
+# latency or the error rate rises, it is multiplied by `backoff`. The server
+# is thus kept as busy as it can be without requests piling up in its queue.
+#
+# Calls of different kinds (e.g. models or prompt sizes) take different
+# times, so each call names its kind and has its own baseline. When latency
+# is still too high at the minimum limit, the server itself got slower: the
+# baseline is reset to the current latency instead of staying stuck.
+
+import time
+import threading
+from collections import defaultdict
+from utils import metrics
+
+class AdaptiveLimiter:
+    """Additive-increase, multiplicative-decrease limit on calls in flight"""
+
+    def __init__(self, name, initial=4, min_limit=1, max_limit=16, tolerance=1.5, backoff=0.75,
+                 max_error_rate=0.1, min_window=10):
+        self.name = name
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = max(min_limit, min(initial, max_limit))
+        self.tolerance = tolerance
+        self.backoff = backoff
+        self.max_error_rate = max_error_rate
+        self.min_window = min_window  # Calls per window at least, so one slow call does not decide
+        self.in_flight = 0
+        self._condition = threading.Condition()
+        self._latencies = defaultdict(list)  # Kind -> latencies of successful calls in the current window
+        self._samples = 0          # Calls completed in the current window
+        self._errors = 0           # Failed calls in the current window
+        self._saturated = False    # Whether calls in flight reached the limit during the window
+        self._baselines = {}       # Kind -> lowest mean latency of a window
+        metrics.set_gauge("concurrency_limit", self.limit, limiter=name)
+
+    def acquire(self):
+        """Wait for a slot; returns the start time to pass to release()"""
+        waited = time.perf_counter()
+        with self._condition:
+            while self.in_flight >= self.limit:
+                self._condition.wait()
+            self.in_flight += 1
+            if self.in_flight >= self.limit:
+                self._saturated = True
+        start = time.perf_counter()
+        metrics.observe("concurrency_wait_seconds", start - waited, limiter=self.name)
+        return start
+
+    def release(self, start, outcome="ok", kind=None):
+        """Free a slot taken by acquire()
+
+        outcome is "ok", "error" or "dropped" (no sample, e.g. the call was
+        refused before reaching the backend); kind groups calls whose
+        latencies are comparable.
+        """
+        latency = time.perf_counter() - start
+        with self._condition:
+            self.in_flight -= 1
+            if outcome != "dropped":
+                self._samples += 1
+                if outcome == "ok":
+                    self._latencies[kind].append(latency)
+                else:
+                    self._errors += 1
+                if self._samples >= max(self.min_window, self.limit):
+                    self._adjust()
+            self._condition.notify_all()
+
+    def _adjust(self):
+        """Finish a window and move the limit; called with the condition held"""
+        # Latency relative to the baseline of each kind, weighted by the calls of that kind
+        means = {kind: sum(latencies) / len(latencies) for kind, latencies in self._latencies.items()}
+        ratio_sum = 0.0
+        successes = 0
+        for kind, mean in means.items():
+            baseline = self._baselines.get(kind, mean)
+            ratio_sum += mean / max(baseline, 1e-6) * len(self._latencies[kind])
+            successes += len(self._latencies[kind])
+        ratio = ratio_sum / successes if successes else 1.0
+
+        if ratio > self.tolerance and self.limit == self.min_limit:
+            self._baselines.update(means)
+        else:
+            for kind, mean in means.items():
+                self._baselines[kind] = min(mean, self._baselines.get(kind, mean))
+
+        if self._errors / self._samples > self.max_error_rate or ratio > self.tolerance:
+            limit = max(self.min_limit, int(self.limit * self.backoff))
+        elif self._saturated:
+            limit = min(self.max_limit, self.limit + 1)
+        else:
+            limit = self.limit
+
+        self._latencies.clear()
+        self._samples = 0
+        self._errors = 0
+        self._saturated = self.in_flight >= limit
+
+        if limit != self.limit:
+            metrics.increment("concurrency_limit_changes_total", limiter=self.name,
+                              direction="up" if limit > self.limit else "down")
+            self.limit = limit
+            metrics.set_gauge("concurrency_limit", limit, limiter=self.name)
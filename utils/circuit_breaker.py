@@ -0,0 +1,131 @@
+# File: utils/circuit_breaker.py
+# Circuit breaker that stops calling a backend after repeated failures or slow replies
+#
+# Closed: calls go through; consecutive failures and calls slower than the
+# latency SLO are counted, and reaching the threshold opens the circuit.
+# Open: calls fail at once with CircuitOpenError, so callers can use their
+# fallback instead of waiting for a request that will fail too.
+# Half-open: once the probe interval has passed, a single call is let
+# through as a probe. Success closes the circuit; failure opens it again and
+# doubles the interval, up to max_probe_interval.
+
+import time
+import threading
+from utils import metrics
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a backend while its circuit is open"""
+
+class CircuitBreaker:
+    """Track consecutive failures of a backend and refuse calls while it is failing"""
+
+    def __init__(self, name, failure_threshold=5, latency_slo=None, probe_interval=10.0,
+                 max_probe_interval=300.0, clock=time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.latency_slo = latency_slo  # Seconds; slower calls count as failures (None: no SLO)
+        self.probe_interval = probe_interval
+        self.max_probe_interval = max_probe_interval
+        self.clock = clock
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Close the circuit and forget past failures"""
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0         # Consecutive failures and SLO breaches
+            self.interval = self.probe_interval
+            self.next_probe = 0.0
+            self.probing = False      # Whether the half-open probe is in flight
+            self.trips = 0
+            self.rejected = 0
+
+    def call(self, func, *args, **kwargs):
+        """Call func unless the circuit is open; raises CircuitOpenError when it is"""
+        probe = self._admit()
+        start = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            self._record(probe, f"{type(e).__name__}: {e}")
+            raise
+        seconds = time.perf_counter() - start
+        if self.latency_slo is not None and seconds > self.latency_slo:
+            self._record(probe, f"took {seconds:.1f}s, above the {self.latency_slo:g}s SLO")
+        else:
+            self._record(probe, None)
+        return result
+
+    def check(self):
+        """Raise CircuitOpenError if a call would be refused now, without admitting one
+
+        Lets callers fail fast before waiting for anything else, such as a
+        concurrency slot; call() still decides whether the call goes through.
+        """
+        with self._lock:
+            if (self.state == CLOSED or (self.state == OPEN and self.clock() >= self.next_probe)
+                    or (self.state == HALF_OPEN and not self.probing)):
+                return
+            wait = self._reject()
+        self._raise_open(wait)
+
+    def _admit(self):
+        """Return whether the call is the half-open probe, or raise CircuitOpenError"""
+        with self._lock:
+            if self.state == CLOSED:
+                return False
+            if self.state == OPEN and self.clock() >= self.next_probe:
+                self.state = HALF_OPEN
+                metrics.increment("circuit_transitions_total", circuit=self.name, state=HALF_OPEN)
+            if self.state == HALF_OPEN and not self.probing:
+                self.probing = True
+                return True
+            wait = self._reject()
+        self._raise_open(wait)
+
+    def _reject(self):
+        """Count a refused call and return the seconds until the next probe; called with the lock held"""
+        self.rejected += 1
+        return max(0.0, self.next_probe - self.clock())
+
+    def _raise_open(self, wait):
+        metrics.increment("circuit_rejected_total", circuit=self.name)
+        raise CircuitOpenError(f"Circuit breaker '{self.name}' is open (next probe in {wait:.0f}s)")
+
+    def _record(self, probe, failure):
+        """Update the state after a call; failure describes why it failed, or is None"""
+        message = None
+        with self._lock:
+            if probe:
+                self.probing = False
+                if failure is None:
+                    self.state = CLOSED
+                    self.failures = 0
+                    self.interval = self.probe_interval
+                    message = f"Circuit breaker '{self.name}' closed: probe succeeded"
+                else:
+                    self.interval = min(self.interval * 2, self.max_probe_interval)
+                    message = self._open(f"probe failed ({failure})")
+            elif self.state == CLOSED:
+                # Calls that started before the circuit opened do not count once it has
+                if failure is None:
+                    self.failures = 0
+                else:
+                    self.failures += 1
+                    if self.failures >= self.failure_threshold:
+                        message = self._open(f"{self.failures} consecutive failures, last: {failure}")
+            state = self.state
+        if message:
+            metrics.increment("circuit_transitions_total", circuit=self.name, state=state)
+            print(message)
+
+    def _open(self, reason):
+        self.state = OPEN
+        self.next_probe = self.clock() + self.interval
+        self.trips += 1
+        return f"Circuit breaker '{self.name}' opened after {reason}; using fallbacks, next probe in {self.interval:.0f}s"
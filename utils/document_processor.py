@@ -1,5 +1,7 @@
 import os
 import re
+import hashlib
+from utils import metrics
 
 def extract_text_from_file(file_path):
     """Extract text from a file based on its extension"""
@@ -7,13 +9,49 @@ def extract_text_from_file(file_path):
     ext = ext.lower()
     
     if ext == '.pdf':
-        return extract_text_from_pdf(file_path)
+        extract = extract_text_from_pdf
     elif ext in ['.docx', '.doc']:
-        return extract_text_from_docx(file_path)
+        extract = extract_text_from_docx
     elif ext in ['.txt', '.md', '.rtf']:  # This line already includes .txt
-        return extract_text_from_txt(file_path)
+        extract = extract_text_from_txt
     else:
         raise ValueError(f"Unsupported file format: {ext}")
+    
+    with metrics.timer("document_extract_seconds", format=ext[1:]):
+        return extract(file_path)
+
+def extract_document(task):
+    """Extract the text of a (key, file_path) task, returning (key, text)
+    
+    Module-level so it can run in a worker process of the screening pipeline.
+    """
+    key, file_path = task
+    return key, extract_text_from_file(file_path)
+
+def compute_file_fingerprint(file_path, chunk_size=1 << 16):
+    """Compute a SHA-256 fingerprint of a file's raw contents"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def compute_text_fingerprint(*parts):
+    """Compute a SHA-256 fingerprint of one or more text values"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update((part or '').encode('utf-8'))
+        digest.update(b'\0')  # Separator so ("ab", "c") and ("a", "bc") differ
+    return digest.hexdigest()
+
+def normalize_text(text):
+    """Lowercase text and reduce it to its words, ignoring punctuation and layout"""
+    return ' '.join(re.findall(r'\w+', (text or '').lower()))
+
+def compute_description_fingerprint(description):
+    """Fingerprint a job description so copies that differ only in case,
+    punctuation or whitespace get the same value"""
+    return compute_text_fingerprint(normalize_text(description))
 
 def extract_text_from_pdf(pdf_path):
     """Extract text from a PDF file"""
@@ -36,6 +74,7 @@ def extract_text_from_pdf(pdf_path):
         return f"PDF file: {os.path.basename(pdf_path)}"
     except Exception as e:
         print(f"Error extracting text from PDF: {e}")
+        metrics.increment("document_extract_errors_total", format="pdf")
         return ""
 
 def extract_text_from_docx(docx_path):
@@ -63,6 +102,7 @@ def extract_text_from_docx(docx_path):
         return f"DOCX file: {os.path.basename(docx_path)}"
     except Exception as e:
         print(f"Error extracting text from DOCX: {e}")
+        metrics.increment("document_extract_errors_total", format="docx")
         return ""
 
 def extract_text_from_txt(txt_path):
@@ -77,7 +117,9 @@ def extract_text_from_txt(txt_path):
                 return file.read()
         except Exception as e:
             print(f"Error extracting text with latin-1 encoding: {e}")
+            metrics.increment("document_extract_errors_total", format="txt")
             return ""
     except Exception as e:
         print(f"Error extracting text from text file: {e}")
+        metrics.increment("document_extract_errors_total", format="txt")
         return ""
\ No newline at end of file
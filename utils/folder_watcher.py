@@ -0,0 +1,126 @@
+import os
+import time
+import threading
+
+# watchdog (inotify and friends) is optional: without it folders are polled
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:
+    Observer = None
+    FileSystemEventHandler = object
+
+class _WakeHandler(FileSystemEventHandler):
+    """Wake the watcher up on any file system event"""
+
+    def __init__(self, wake):
+        self.wake = wake
+
+    def on_any_event(self, event):
+        self.wake.set()
+
+class FolderWatcher:
+    """Report files that appeared, changed or disappeared in a set of folders
+
+    Folders are compared against the last scan by modification time and
+    size. A new or changed file is only reported once it has stayed the
+    same for settle_seconds, so files still being copied or uploaded are
+    not picked up half-written. With watchdog installed, file system
+    events wake the watcher up right away; otherwise it polls every
+    poll_interval seconds.
+    """
+
+    def __init__(self, directories, extensions, settle_seconds=2.0, poll_interval=1.0, use_events=True):
+        self.directories = [directory for directory in directories if directory]
+        self.extensions = tuple(ext.lower() for ext in extensions)
+        self.settle_seconds = settle_seconds
+        self.poll_interval = poll_interval
+
+        self._known = {}    # Path -> (mtime, size) when it was last reported
+        self._pending = {}  # Path -> ((mtime, size), time it was first seen with that state)
+        self._wake = threading.Event()
+        self._observer = None
+
+        if use_events and Observer is not None:
+            try:
+                self._observer = Observer()
+                handler = _WakeHandler(self._wake)
+                for directory in self.directories:
+                    self._observer.schedule(handler, directory, recursive=False)
+                self._observer.start()
+            except Exception as e:
+                print(f"File system events unavailable ({e}), polling instead")
+                self._observer = None
+
+    @property
+    def uses_events(self):
+        return self._observer is not None
+
+    def _snapshot(self):
+        files = {}
+        for directory in self.directories:
+            try:
+                entries = list(os.scandir(directory))
+            except FileNotFoundError:
+                continue
+            for entry in entries:
+                if not entry.name.lower().endswith(self.extensions) or entry.name.startswith('.'):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue  # Removed while scanning
+                if entry.is_file():
+                    files[entry.path] = (stat.st_mtime_ns, stat.st_size)
+        return files
+
+    def scan(self):
+        """Return (ready, removed): settled new or changed files, and files that disappeared"""
+        now = time.monotonic()
+        current = self._snapshot()
+
+        removed = [path for path in self._known if path not in current]
+        for path in removed:
+            del self._known[path]
+        for path in [path for path in self._pending if path not in current]:
+            del self._pending[path]
+
+        ready = []
+        for path, state in current.items():
+            if self._known.get(path) == state:
+                continue
+
+            pending = self._pending.get(path)
+            if pending is None or pending[0] != state:
+                # New, or still changing: start (or restart) the settle timer
+                self._pending[path] = (state, now)
+            elif now - pending[1] >= self.settle_seconds:
+                del self._pending[path]
+                self._known[path] = state
+                ready.append(path)
+
+        return sorted(ready), sorted(removed)
+
+    def has_pending(self):
+        """Whether some files are waiting to settle"""
+        return bool(self._pending)
+
+    def wait(self, idle_timeout=30.0):
+        """Sleep until the next scan is due
+
+        While files are settling, or without file system events, that is
+        poll_interval. Otherwise the watcher sleeps until an event arrives,
+        rescanning every idle_timeout seconds in case an event was missed.
+        """
+        if self._pending or self._observer is None:
+            timeout = self.poll_interval
+        else:
+            timeout = idle_timeout
+        self._wake.wait(timeout)
+        self._wake.clear()
+
+    def stop(self):
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
@@ -1,16 +1,129 @@
-import ollama
 import json
 import re
+import time
+import threading
+from config import Config
+from utils import metrics
+from utils.circuit_breaker import CircuitBreaker, CircuitOpenError
+from utils.adaptive_limit import AdaptiveLimiter
+from utils.model_router import ModelRouter
 
-def query_llm(prompt, model_name="mistral", max_retries=3):
+_host = Config.LLM_HOST
+_client = None
+_client_lock = threading.Lock()
+
+# Shared by every agent: when the server is down or overloaded, chat() fails
+# fast with CircuitOpenError and the agents go straight to their fallbacks
+breaker = CircuitBreaker("llm", failure_threshold=Config.LLM_FAILURE_THRESHOLD,
+                         latency_slo=Config.LLM_LATENCY_SLO, probe_interval=Config.LLM_PROBE_INTERVAL,
+                         max_probe_interval=Config.LLM_MAX_PROBE_INTERVAL)
+
+# Requests in flight to the server, across CV parsing, JD analysis and email
+# generation; callers beyond the limit wait for a slot
+limiter = AdaptiveLimiter("llm", initial=Config.LLM_INITIAL_CONCURRENCY, min_limit=Config.LLM_MIN_CONCURRENCY,
+                          max_limit=Config.LLM_MAX_CONCURRENCY, tolerance=Config.LLM_LATENCY_TOLERANCE)
+
+# Picks the model per task and prompt size with --route_models; latency
+# profiles are recorded on every call either way
+router = ModelRouter(Config.MODEL_ROUTES, Config.MODEL_LATENCY_BUDGETS, Config.DEFAULT_MODEL,
+                     alternatives=Config.ALTERNATIVE_MODELS, profile_file=Config.MODEL_PROFILE_FILE)
+
+def set_host(host):
+    """Send chat requests to another Ollama server, e.g. a local mock (None for the default)"""
+    global _host, _client
+    with _client_lock:
+        _host = host
+        _client = None
+    breaker.reset()
+
+def _get_client():
+    global _client
+    # Imported on first use: ollama pulls in httpx, which dominates CLI startup time
+    import ollama
+    
+    with _client_lock:
+        if _client is None:
+            _client = ollama.Client(host=_host, timeout=Config.LLM_TIMEOUT)
+        return _client
+
+def configure_llm(args):
+    """Apply the --llm_host, --mock_llm and --route_models options; returns the started mock server, or None
+    
+    --mock_llm starts a utils.mock_ollama server in this process and points
+    the agents at it; its value is a comma-separated spec such as
+    "latency=lognormal:0.8:0.5,error_rate=0.05,max_concurrency=4".
+    """
+    router.enabled = args.route_models
+    if args.mock_llm is not None:
+        from utils.mock_ollama import start_mock
+        mock = start_mock(args.mock_llm)
+        set_host(mock.host)
+        print(f"Using mock LLM at {mock.host}")
+        return mock
+    if args.llm_host:
+        set_host(args.llm_host)
+    return None
+
+def close_llm(mock):
+    """Save the model latency profiles, and stop a server started by configure_llm() and print what it served"""
+    router.save()
+    if mock is not None:
+        mock.stop()
+        print(f"Mock LLM: {mock.format_stats()}")
+
+def route_model(task, prompt, default=Config.DEFAULT_MODEL):
+    """Model for a task's prompt: the router's choice with --route_models, else default"""
+    return router.choose(task, len(prompt), default)
+
+def chat(prompt, model_name=Config.DEFAULT_MODEL, task="chat"):
+    """Send a prompt to the Ollama LLM and return the reply text (raises on failure)
+    
+    Raises CircuitOpenError without contacting the server while the circuit
+    breaker is open. Waits for a slot when the adaptive concurrency limit is
+    reached. The latency is recorded in the profile of (model_name, task).
+    """
+    client = _get_client()
+    # Fail fast while the circuit is open, instead of first waiting for a slot behind hung
+    # requests; such calls never take a slot, so they do not count in the limiter's windows
+    breaker.check()
+    start = limiter.acquire()
+    outcome = "dropped"
+    try:
+        reply = breaker.call(_chat, client, prompt, model_name)
+        outcome = "ok"
+        return reply
+    except CircuitOpenError:
+        raise
+    except Exception:
+        outcome = "error"
+        raise
+    finally:
+        # Prompts of similar length to the same model take comparable time
+        limiter.release(start, outcome, kind=(model_name, len(prompt).bit_length()))
+        if outcome != "dropped":
+            router.record(model_name, task, len(prompt), time.perf_counter() - start, outcome == "ok")
+
+def _chat(client, prompt, model_name):
+    start = time.perf_counter()
+    status = "error"
+    try:
+        response = client.chat(
+            model=model_name,
+            messages=[{"role": "user", "content": prompt}]
+        )
+        status = "ok"
+        return response["message"]["content"]
+    finally:
+        metrics.observe("llm_request_seconds", time.perf_counter() - start, model=model_name, status=status)
+
+def query_llm(prompt, model_name=Config.DEFAULT_MODEL, max_retries=3):
     """Query the Ollama LLM with retries"""
     for attempt in range(max_retries):
         try:
-            response = ollama.chat(
-                model=model_name,
-                messages=[{"role": "user", "content": prompt}]
-            )
-            return response["message"]["content"]
+            return chat(prompt, model_name)
+        except CircuitOpenError as e:
+            print(f"Not querying LLM: {e}")
+            return "Error: The language model is unavailable."
         except Exception as e:
             if attempt < max_retries - 1:
                 print(f"Error querying LLM (attempt {attempt+1}/{max_retries}): {e}. Retrying...")
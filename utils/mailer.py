@@ -0,0 +1,117 @@
+# File: utils/mailer.py
+# Email senders for the outbox dispatcher
+#
+# A sender takes a batch of OutboxMessages and returns one result per
+# message: None when it was sent, or the exception that stopped it. A
+# PermanentSendError (e.g. a rejected address) is not retried.
+#
+# Messages carry an idempotency key. The file sender names its files after
+# it, so a message sent again after a dispatcher restart replaces its own
+# file, and the SMTP sender uses it as the Message-ID, by which receiving
+# servers recognise a repeat.
+
+import os
+import smtplib
+from email.header import Header
+from email.mime.text import MIMEText
+from email.utils import formatdate
+from urllib.parse import urlsplit
+from config import Config
+
+class PermanentSendError(Exception):
+    """A message that will fail the same way however often it is sent"""
+
+def build_email(message, sender_address):
+    """Email for an OutboxMessage"""
+    # MIMEText rather than EmailMessage: its headers are not parsed on assignment, which is several times faster
+    email = MIMEText(message.body, "plain", "utf-8")
+    email["From"] = sender_address
+    email["To"] = message.recipient
+    email["Subject"] = message.subject if message.subject.isascii() else Header(message.subject, "utf-8")
+    email["Date"] = formatdate(localtime=True)
+    email["Message-ID"] = f"<{message.idempotency_key}@{sender_address.rpartition('@')[2] or 'localhost'}>"
+    return email
+
+class FileSender:
+    """Write every message to DIR/<idempotency key>.eml instead of sending it; a local stand-in for a mail server"""
+
+    def __init__(self, directory, sender_address=Config.EMAIL_FROM):
+        self.directory = directory
+        self.sender_address = sender_address
+        os.makedirs(directory, exist_ok=True)
+
+    def send_batch(self, messages):
+        results = []
+        for message in messages:
+            path = os.path.join(self.directory, f"{message.idempotency_key}.eml")
+            temp_path = f"{path}.tmp"
+            try:
+                with open(temp_path, "wb") as file:
+                    file.write(build_email(message, self.sender_address).as_bytes())
+                os.replace(temp_path, path)
+                results.append(None)
+            except OSError as e:
+                results.append(e)
+        return results
+
+    def __str__(self):
+        return f"files in {self.directory}"
+
+class SmtpSender:
+    """Send through an SMTP server, over one connection per batch
+
+    Pointed at a local debugging server (e.g. `python -m aiosmtpd -n -l
+    localhost:1025`) it prints the messages instead of delivering them.
+    """
+
+    def __init__(self, host, port=25, sender_address=Config.EMAIL_FROM, timeout=30.0, username=None, password=None):
+        self.host = host
+        self.port = port
+        self.sender_address = sender_address
+        self.timeout = timeout
+        self.username = username
+        self.password = password
+
+    def send_batch(self, messages):
+        try:
+            smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            if self.username:
+                smtp.starttls()
+                smtp.login(self.username, self.password or "")
+        except (OSError, smtplib.SMTPException) as e:
+            return [e] * len(messages)
+
+        results = []
+        with smtp:
+            for message in messages:
+                try:
+                    smtp.send_message(build_email(message, self.sender_address))
+                    results.append(None)
+                except smtplib.SMTPRecipientsRefused as e:
+                    results.append(PermanentSendError(f"Recipient refused: {e.recipients}"))
+                except smtplib.SMTPResponseException as e:
+                    if e.smtp_code >= 500:
+                        results.append(PermanentSendError(f"{e.smtp_code} {e.smtp_error!r}"))
+                    else:
+                        results.append(e)
+                except smtplib.SMTPServerDisconnected as e:
+                    # The rest of the batch is retried later
+                    results.extend([e] * (len(messages) - len(results)))
+                    break
+                except (OSError, smtplib.SMTPException) as e:
+                    results.append(e)
+        return results
+
+    def __str__(self):
+        return f"SMTP server {self.host}:{self.port}"
+
+def create_sender(spec=Config.EMAIL_SENDER, sender_address=Config.EMAIL_FROM):
+    """Sender for a spec: "file:DIR" or "smtp://[user:password@]host[:port]" (STARTTLS when a user is given)"""
+    if spec.startswith("file:"):
+        return FileSender(spec[len("file:"):] or ".", sender_address)
+    if spec.startswith("smtp://"):
+        url = urlsplit(spec)
+        if not url.hostname:
+            raise ValueError(f"Invalid SMTP sender: {spec!r}")
+        return SmtpSender(url.hostname, url.port or 25, sender_address, username=url.username, password=url.password)
+    raise ValueError(f"Unknown email sender: {spec!r} (expected file:DIR or smtp://host:port)")
@@ -0,0 +1,235 @@
+# File: utils/metrics.py
+# Process-wide counters and timings, exported in the Prometheus text format
+#
+# Counters count events (e.g. LLM replies that needed a fallback parser),
+# gauges hold a current value (e.g. a concurrency limit) and timers record
+# durations in seconds as histograms. All are keyed by a name and optional
+# labels such as stage, model or table:
+#
+#     with metrics.timer("llm_request_seconds", model=model_name):
+#         ...
+#     metrics.increment("llm_parse_total", agent="cv_parser", outcome="json")
+
+import time
+import functools
+import threading
+from contextlib import contextmanager
+
+# Histogram bucket bounds in seconds, from fast DB queries to slow LLM calls
+BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Descriptions for the metrics recorded across the screening pipeline
+HELP = {
+    "document_extract_seconds": "Time to extract the text of a document, by file format",
+    "document_extract_errors_total": "Documents whose text could not be extracted, by file format",
+    "llm_request_seconds": "Time of LLM chat requests, by model and status",
+    "llm_parse_total": "Agent LLM calls by model and outcome: used as returned, or replaced by a fallback",
+    "agent_seconds": "Time spent in agent operations",
+    "pipeline_stage_seconds": "Time spent per item in each pipeline stage",
+    "pipeline_items_total": "Items handled by each pipeline stage, by outcome",
+    "db_write_seconds": "Time of direct database writes, by table",
+    "db_query_seconds": "Time of database queries",
+    "db_write_batch_seconds": "Time to write and commit one write-behind batch",
+    "db_rows_written_total": "Rows written by the write-behind writer, by table",
+    "db_write_errors_total": "Rows the write-behind writer failed to write, by table",
+    "circuit_transitions_total": "Circuit breaker state changes, by circuit and new state",
+    "circuit_rejected_total": "Calls refused while a circuit breaker was open",
+    "concurrency_limit": "Current adaptive concurrency limit, by limiter",
+    "concurrency_limit_changes_total": "Adaptive concurrency limit increases and decreases, by limiter",
+    "concurrency_wait_seconds": "Time calls waited for a slot under the adaptive concurrency limit",
+    "llm_route_total": "Models picked by the model router, by task and reason",
+    "service_request_seconds": "Time to handle screening service requests, by path and status",
+}
+
+_lock = threading.Lock()
+_counters = {}  # (name, labels) -> value
+_gauges = {}    # (name, labels) -> value
+_timers = {}    # (name, labels) -> [count, sum, min, max, bucket counts]
+
+def _key(name, labels):
+    return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+def increment(name, amount=1, **labels):
+    """Add amount to a counter"""
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+def set_gauge(name, value, **labels):
+    """Set a gauge to its current value"""
+    key = _key(name, labels)
+    with _lock:
+        _gauges[key] = value
+
+def observe(name, seconds, **labels):
+    """Record one duration in a timer"""
+    key = _key(name, labels)
+    with _lock:
+        _observe(key, 1, seconds, seconds, seconds, [1 if seconds <= bound else 0 for bound in BUCKETS])
+
+def _observe(key, count, total, low, high, buckets):
+    entry = _timers.get(key)
+    if entry is None:
+        _timers[key] = [count, total, low, high, list(buckets)]
+        return
+    entry[0] += count
+    entry[1] += total
+    entry[2] = min(entry[2], low)
+    entry[3] = max(entry[3], high)
+    entry[4] = [a + b for a, b in zip(entry[4], buckets)]
+
+@contextmanager
+def timer(name, **labels):
+    """Time the body of a with block, recording it even when it raises"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start, **labels)
+
+def timed(name, **labels):
+    """Decorator recording the duration of every call of a function"""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timer(name, **labels):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def snapshot():
+    """Copy of every metric, as a picklable dict that merge() accepts"""
+    with _lock:
+        return {
+            "counters": dict(_counters),
+            "gauges": dict(_gauges),
+            "timers": {key: list(entry[:4]) + [list(entry[4])] for key, entry in _timers.items()}
+        }
+
+def reset():
+    """Clear every metric"""
+    with _lock:
+        _counters.clear()
+        _gauges.clear()
+        _timers.clear()
+
+def drain():
+    """Return a snapshot and clear the metrics, so they are not reported twice"""
+    with _lock:
+        data = {"counters": dict(_counters), "gauges": dict(_gauges), "timers": dict(_timers)}
+        _counters.clear()
+        _gauges.clear()
+        _timers.clear()
+    return data
+
+def merge(data):
+    """Add the metrics of a snapshot, e.g. one taken in a worker process"""
+    with _lock:
+        for key, value in data["counters"].items():
+            _counters[key] = _counters.get(key, 0) + value
+        # The latest value of a gauge wins
+        _gauges.update(data.get("gauges", {}))
+        for key, entry in data["timers"].items():
+            _observe(key, *entry)
+
+def call_collecting(func, *args):
+    """Call func in a worker process and return (result, metrics it recorded)
+
+    Worker processes have their own registry; the parent passes the second
+    value to merge() so their metrics show up in its report.
+    """
+    result = func(*args)
+    return result, drain()
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + "}"
+
+def format_prometheus():
+    """Format every metric in the Prometheus text exposition format"""
+    data = snapshot()
+    lines = []
+
+    by_name = {}
+    for (name, labels), value in data["counters"].items():
+        by_name.setdefault(name, ("counter", []))[1].append((labels, value))
+    for (name, labels), value in data["gauges"].items():
+        by_name.setdefault(name, ("gauge", []))[1].append((labels, value))
+    for (name, labels), entry in data["timers"].items():
+        by_name.setdefault(name, ("histogram", []))[1].append((labels, entry))
+
+    for name in sorted(by_name):
+        kind, series = by_name[name]
+        lines.append(f"# HELP {name} {HELP.get(name, name)}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in sorted(series, key=lambda item: item[0]):
+            if kind != "histogram":
+                lines.append(f"{name}{_format_labels(labels)} {value:g}")
+                continue
+            count, total, _, _, buckets = value
+            for bound, bucket_count in zip(BUCKETS, buckets):
+                lines.append(f"{name}_bucket{_format_labels(labels, [('le', f'{bound:g}')])} {bucket_count}")
+            lines.append(f"{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {count}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {total:.6f}")
+            lines.append(f"{name}_count{_format_labels(labels)} {count}")
+    return "\n".join(lines) + "\n"
+
+def write_prometheus(path):
+    """Write every metric to a file, e.g. for the node exporter's textfile collector
+
+    The file is replaced atomically, so a scraper never reads half of it.
+    """
+    import os
+
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w") as file:
+        file.write(format_prometheus())
+    os.replace(temp_path, path)
+
+def report(path=None):
+    """Print the summary table and, when a path is given, write the Prometheus file"""
+    print(f"\nMetrics:\n{format_summary()}")
+    if path:
+        write_prometheus(path)
+        print(f"Metrics written to {path}")
+
+def format_summary():
+    """Format timings, counters and fallback rates as a table for the end of a run"""
+    data = snapshot()
+    if not data["counters"] and not data["gauges"] and not data["timers"]:
+        return "No metrics recorded"
+
+    def series_name(name, labels):
+        return name + (" " + " ".join(f"{key}={value}" for key, value in labels) if labels else "")
+
+    lines = []
+    if data["timers"]:
+        lines.append(f"{'Timing':<72} {'Count':>7} {'Total':>9} {'Mean':>9} {'Max':>9}")
+        for (name, labels), (count, total, _, high, _) in sorted(data["timers"].items()):
+            lines.append(f"{series_name(name, labels):<72} {count:>7} {total:>8.2f}s "
+                         f"{total / count * 1000:>7.1f}ms {high * 1000:>7.1f}ms")
+
+    if data["counters"]:
+        lines.append("")
+        lines.append(f"{'Counter':<72} {'Value':>7} {'Share':>9}")
+        # Share of each outcome among the series that differ only in their outcome label
+        groups = {}
+        for (name, labels), value in data["counters"].items():
+            rest = tuple(pair for pair in labels if pair[0] != "outcome")
+            groups[(name, rest)] = groups.get((name, rest), 0) + value
+        for (name, labels), value in sorted(data["counters"].items()):
+            share = ""
+            if any(key == "outcome" for key, _ in labels):
+                group_total = groups[(name, tuple(pair for pair in labels if pair[0] != "outcome"))]
+                share = f"{value / group_total * 100:.1f}%" if group_total else ""
+            lines.append(f"{series_name(name, labels):<72} {value:>7g} {share:>9}")
+
+    if data["gauges"]:
+        lines.append("")
+        lines.append(f"{'Gauge':<72} {'Value':>7}")
+        for (name, labels), value in sorted(data["gauges"].items()):
+            lines.append(f"{series_name(name, labels):<72} {value:>7g}")
+    return "\n".join(lines)
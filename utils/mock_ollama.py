@@ -0,0 +1,339 @@
+# File: utils/mock_ollama.py
+# Local stand-in for the Ollama chat API, for offline and reproducible load tests
+#
+# Replies are derived from the prompt (a profile from the resume text,
+# requirements from the job description bullets, an invitation email), so
+# the agents get realistic input without a model. Latency follows a
+# configurable distribution, a share of requests can fail, and like a real
+# Ollama server only max_concurrency requests are processed at once while
+# the rest wait in a bounded queue.
+#
+#     python -m utils.mock_ollama --port 11435 --latency lognormal:0.8:0.5 --error_rate 0.02
+#     python main.py --llm_host http://127.0.0.1:11435 ...    (or --mock_llm to run one in-process)
+
+import re
+import json
+import time
+import zlib
+import random
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+DEFAULT_REQUIREMENTS = {
+    "skills": ["Python", "SQL", "Docker", "AWS", "Git"],
+    "experience": "3+ years",
+    "education": "Bachelor's degree in Computer Science",
+    "responsibilities": ["Build services", "Review code"]
+}
+
+SECTION_HEADER = re.compile(r'^\s*([A-Z][A-Za-z ]{2,40}):?\s*$')
+BULLET = re.compile(r'^\s*(?:[-*•]|\d+\.)\s*(.+?)\s*$')
+
+def parse_latency(spec):
+    """Parse a latency distribution into a function of a random.Random returning seconds
+
+    fixed:S, uniform:MIN:MAX, normal:MEAN:SD, lognormal:MEDIAN:SIGMA or
+    exponential:MEAN; a plain number means fixed.
+    """
+    name, _, params = str(spec).partition(":")
+    try:
+        if not params:
+            value = float(name)
+            return lambda rng: value
+        values = [float(value) for value in params.split(":")]
+        if name == "fixed":
+            return lambda rng: values[0]
+        if name == "uniform":
+            return lambda rng: rng.uniform(values[0], values[1])
+        if name == "normal":
+            return lambda rng: max(0.0, rng.gauss(values[0], values[1]))
+        if name == "lognormal":
+            import math
+            mu = math.log(values[0])
+            return lambda rng: rng.lognormvariate(mu, values[1])
+        if name == "exponential":
+            return lambda rng: rng.expovariate(1 / values[0])
+    except (ValueError, IndexError, ZeroDivisionError):
+        pass
+    raise ValueError(f"Invalid latency distribution: {spec}")
+
+def _sections(text):
+    """Map lowercase section headers to their bullet lines"""
+    sections = {}
+    current = None
+    for line in text.splitlines():
+        header = SECTION_HEADER.match(line)
+        if header:
+            current = sections.setdefault(header.group(1).strip().lower(), [])
+            continue
+        bullet = BULLET.match(line)
+        if bullet and current is not None:
+            current.append(bullet.group(1))
+    return sections
+
+def profile_reply(prompt):
+    """Build a plausible profile from the resume text at the end of the prompt"""
+    resume = prompt.rsplit("Here is the resume:", 1)[-1]
+    lines = [line.strip() for line in resume.splitlines() if line.strip()]
+    sections = _sections(resume)
+
+    skills = sections.get("skills")
+    if not skills:
+        skills_match = re.search(r'Skills:\s*(.+)', resume)
+        skills = [skill.strip() for skill in skills_match.group(1).split(",")] if skills_match else []
+    email = re.search(r'[\w.-]+@[\w.-]+\.\w+', resume)
+    phone = re.search(r'\d{3}[\s.-]\d{3}[\s.-]\d{4}', resume)
+    years = [int(year) for year in re.findall(r'\b(19\d\d|20\d\d)-\d\d\b', resume)]
+    return {
+        "name": lines[0] if lines else "Unknown",
+        "contact": {"email": email.group(0) if email else "", "phone": phone.group(0) if phone else ""},
+        "skills": skills,
+        "experience": [{"company": "Example Corp", "title": "Engineer",
+                        "start_date": f"{min(years)}-01" if years else "2018-01",
+                        "end_date": "present", "description": ""}],
+        "education": [{"degree": "BS in Computer Science", "institution": "University", "year": 2017}]
+    }
+
+def requirements_reply(prompt):
+    """Build requirements from the bullets of the job description at the end of the prompt"""
+    description = prompt.rsplit("Here is the job description:", 1)[-1]
+    sections = _sections(description)
+    requirements = sections.get("requirements") or sections.get("qualifications") or []
+    if not requirements:
+        return DEFAULT_REQUIREMENTS
+
+    years = re.search(r'(\d+\+?\s*years?)', description)
+    education = next((item for item in requirements if re.search(r'degree|bachelor|master|phd', item, re.I)), "")
+    return {
+        "skills": [item for item in requirements if len(item.split()) <= 4 and not re.search(r'years|degree', item, re.I)],
+        "experience": years.group(1) if years else "",
+        "education": education,
+        "responsibilities": sections.get("responsibilities", [])
+    }
+
+def email_reply(prompt):
+    """Write an invitation email for the candidate and job named in the prompt
+
+    Template prompts (which ask for $candidate_name) get the placeholders
+    instead of a name and times.
+    """
+    match = re.search(r'inviting (.+?) for an interview for the (.+?) position at (.+?)\.', prompt)
+    name, job_title, company = match.groups() if match else ("candidate", "open", "our company")
+    template = "$candidate_name" in prompt
+    if template:
+        name = "$candidate_name"
+    times = "\n\n$time_slots\n\n" if template and "$time_slots" in prompt else " "
+    return (f"Subject: Interview Invitation - {job_title} Position at {company}\n\n"
+            f"Dear {name},\n\nCongratulations on being shortlisted for the {job_title} position."
+            f"{times}Please let us know which of the proposed time slots works for you.\n\n"
+            f"Best regards,\nHiring Team\n{company}")
+
+def personalized_reply(prompt):
+    """Return the email at the end of a personalization prompt with one sentence added"""
+    email = prompt.rsplit("Return only the email.", 1)[-1].strip()
+    head, _, rest = email.partition("\n\n")
+    return f"{head}\n\nYour experience stood out among many strong applications.\n\n{rest}"
+
+def default_reply(prompt):
+    """Pick the reply for a prompt from the agents (CV parser, JD analyzer or scheduler)"""
+    if "Here is the resume:" in prompt:
+        return json.dumps(profile_reply(prompt))
+    if "job description" in prompt.lower():
+        return json.dumps(requirements_reply(prompt))
+    if "Here is an interview invitation" in prompt:
+        return personalized_reply(prompt)
+    return email_reply(prompt)
+
+class MockOllama:
+    """Serve /api/chat replies with simulated latency, errors and limited concurrency
+
+    Latency and failures are drawn from a generator seeded by the seed,
+    the prompt and how often that prompt was sent before, so a rerun with
+    the same requests sees the same delays and errors, and a retried prompt
+    can succeed. model_latency maps model names to their own latency
+    distribution, e.g. to see a model router prefer a faster model.
+    responses maps a prompt kind ("profile", "requirements" or "email") to a
+    canned reply (a dict is sent as JSON) that replaces the generated one.
+    """
+
+    def __init__(self, port=0, latency=0.2, error_rate=0.0, max_concurrency=None, max_queue=512,
+                 seed=0, responses=None, host="127.0.0.1", model_latency=None):
+        self.sample_latency = parse_latency(latency)
+        self.model_latency = {model: parse_latency(spec) for model, spec in (model_latency or {}).items()}
+        self.error_rate = error_rate
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.seed = seed
+        self.responses = responses or {}
+        self.calls = 0
+        self.errors = 0
+        self.rejected = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.queued = 0
+        self._attempts = {}  # Prompt checksum -> requests seen
+        self._lock = threading.Lock()
+        self._slots = threading.Semaphore(max_concurrency) if max_concurrency else None
+
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                if self.path == "/api/version":
+                    self.send_json(200, {"version": "0.0.0-mock"})
+                elif self.path == "/api/tags":
+                    self.send_json(200, {"models": [{"name": "mock:latest"}]})
+                else:
+                    self.send_json(404, {"error": f"unknown endpoint {self.path}"})
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if self.path != "/api/chat":
+                    self.send_json(404, {"error": f"unknown endpoint {self.path}"})
+                    return
+                try:
+                    request = json.loads(body or b"{}")
+                except json.JSONDecodeError:
+                    self.send_json(400, {"error": "invalid JSON"})
+                    return
+                self.send_json(*mock.handle_chat(request))
+
+            def send_json(self, status, payload):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self.host = f"http://{host}:{self.port}"
+
+    def handle_chat(self, request):
+        """Answer one chat request, returning (status, payload)"""
+        messages = request.get("messages") or [{}]
+        prompt = messages[-1].get("content", "")
+
+        checksum = zlib.crc32(prompt.encode("utf-8"))
+        with self._lock:
+            self.calls += 1
+            attempt = self._attempts.get(checksum, 0)
+            self._attempts[checksum] = attempt + 1
+            if self._slots is not None and self.queued >= self.max_queue:
+                self.rejected += 1
+                return 503, {"error": "server busy, please try again. maximum pending requests exceeded"}
+            self.queued += 1
+        rng = random.Random(f"{self.seed}:{checksum}:{attempt}")
+
+        if self._slots is not None:
+            self._slots.acquire()
+        with self._lock:
+            self.queued -= 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            sample_latency = self.model_latency.get(request.get("model"), self.sample_latency)
+            time.sleep(sample_latency(rng))
+            if rng.random() < self.error_rate:
+                with self._lock:
+                    self.errors += 1
+                return 500, {"error": "mock model failure"}
+            return 200, {
+                "model": request.get("model", "mock"),
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "message": {"role": "assistant", "content": self.reply(prompt)},
+                "done": True
+            }
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+            if self._slots is not None:
+                self._slots.release()
+
+    def reply(self, prompt):
+        if "Here is the resume:" in prompt:
+            kind = "profile"
+        elif "job description" in prompt.lower():
+            kind = "requirements"
+        else:
+            kind = "email"
+        if kind in self.responses:
+            canned = self.responses[kind]
+            return canned if isinstance(canned, str) else json.dumps(canned)
+        return default_reply(prompt)
+
+    def start(self):
+        """Serve on a background thread; returns self"""
+        threading.Thread(target=self.server.serve_forever, name="mock-ollama", daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def format_stats(self):
+        return (f"{self.calls} calls, {self.errors} failed, {self.rejected} rejected, "
+                f"at most {self.max_in_flight} at once")
+
+def start_mock(spec="", port=0):
+    """Start an in-process mock from a comma-separated spec, e.g. "latency=uniform:0.1:0.3,error_rate=0.05"
+
+    Keys are latency, error_rate, max_concurrency, max_queue and seed, and
+    latency.MODEL for the latency of one model.
+    """
+    types = {"latency": str, "error_rate": float, "max_concurrency": int, "max_queue": int, "seed": int}
+    options = {}
+    model_latency = {}
+    for part in filter(None, (spec or "").split(",")):
+        key, _, value = part.partition("=")
+        if key.startswith("latency."):
+            model_latency[key[len("latency."):]] = value
+            continue
+        if key not in types:
+            raise ValueError(f"Unknown mock LLM option: {key} (expected one of {', '.join(types)})")
+        options[key] = types[key](value)
+    return MockOllama(port=port, model_latency=model_latency, **options).start()
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a local stand-in for the Ollama chat API')
+    parser.add_argument('--port', type=int, default=11435, help='Port to listen on')
+    parser.add_argument('--latency', type=str, default='0.2',
+                        help='Seconds per request: a number, fixed:S, uniform:MIN:MAX, normal:MEAN:SD, '
+                             'lognormal:MEDIAN:SIGMA or exponential:MEAN')
+    parser.add_argument('--model_latency', type=str, action='append', default=[], metavar='MODEL=LATENCY',
+                        help='Latency of one model, e.g. phi2=uniform:0.1:0.3 (repeatable)')
+    parser.add_argument('--error_rate', type=float, default=0.0, help='Share of requests answered with HTTP 500')
+    parser.add_argument('--max_concurrency', type=int, help='Requests processed at once; the rest wait in a queue')
+    parser.add_argument('--max_queue', type=int, default=512, help='Waiting requests before new ones get HTTP 503')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for latencies and errors')
+    parser.add_argument('--responses', type=str,
+                        help='JSON file with canned replies for "profile", "requirements" and/or "email"')
+    args = parser.parse_args()
+
+    responses = None
+    if args.responses:
+        with open(args.responses) as file:
+            responses = json.load(file)
+
+    try:
+        model_latency = dict(item.split("=", 1) for item in args.model_latency)
+        mock = MockOllama(args.port, args.latency, args.error_rate, args.max_concurrency, args.max_queue,
+                          args.seed, responses, model_latency=model_latency)
+    except ValueError as e:
+        parser.error(str(e))
+    print(f"Mock Ollama listening on {mock.host} (set OLLAMA_HOST={mock.host} or pass --llm_host)")
+    try:
+        mock.server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n{mock.format_stats()}")
+
+if __name__ == "__main__":
+    main()
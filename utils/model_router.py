@@ -0,0 +1,174 @@
+# File: utils/model_router.py
+# Per-task model choice from input size and recorded latency profiles
+#
+# Every LLM call records its latency under (model, task), and the profiles
+# are kept in a JSON file between runs. With routing on, a task's input goes
+# to the cheapest model of its route that handles inputs of that size. When
+# the profile of that model predicts more than the task's latency budget
+# (because it is slow on long inputs, or has slowed down recently), the
+# input goes to the profiled model predicted to be fastest instead, from the
+# route or the alternative models. Every PROBE_EVERY-th such input still goes
+# to the first model, so its profile notices when it is fast again.
+#
+# Sizes are prompt lengths in characters.
+
+import os
+import json
+import threading
+from utils import metrics
+
+MIN_SAMPLES = 5           # Calls before a profile is trusted for predictions
+DECAY = 0.95              # Weight of earlier calls per new call, so profiles follow recent latency
+FAILURES_TO_SKIP = 3      # Consecutive failures after which a model is skipped (e.g. not installed)
+PROBE_EVERY = 20          # Latency fallbacks between calls that still go to the slow model
+
+class LatencyProfile:
+    """Latency of one model on one task, fitted as base seconds plus seconds per input character"""
+
+    def __init__(self, weight=0.0, sum_x=0.0, sum_y=0.0, sum_xx=0.0, sum_xy=0.0, samples=0):
+        # Exponentially decayed sums for a least-squares fit of seconds = a + b * characters
+        self.weight = weight
+        self.sum_x = sum_x
+        self.sum_y = sum_y
+        self.sum_xx = sum_xx
+        self.sum_xy = sum_xy
+        self.samples = samples
+
+    def record(self, size, seconds):
+        self.weight = self.weight * DECAY + 1
+        self.sum_x = self.sum_x * DECAY + size
+        self.sum_y = self.sum_y * DECAY + seconds
+        self.sum_xx = self.sum_xx * DECAY + size * size
+        self.sum_xy = self.sum_xy * DECAY + size * seconds
+        self.samples += 1
+
+    def predict(self, size):
+        """Expected seconds for an input of size characters, or None until there are enough samples"""
+        if self.samples < MIN_SAMPLES:
+            return None
+        mean_x = self.sum_x / self.weight
+        mean_y = self.sum_y / self.weight
+        variance = self.sum_xx / self.weight - mean_x * mean_x
+        # With inputs of (nearly) one size there is no slope to fit; use the mean
+        slope = (self.sum_xy / self.weight - mean_x * mean_y) / variance if variance > 1e-6 * (mean_x * mean_x + 1) else 0.0
+        return max(0.0, mean_y + max(0.0, slope) * (size - mean_x))
+
+    def to_dict(self):
+        return {"weight": self.weight, "sum_x": self.sum_x, "sum_y": self.sum_y, "sum_xx": self.sum_xx,
+                "sum_xy": self.sum_xy, "samples": self.samples}
+
+class ModelRouter:
+    """Choose the model for each task and input, and record how long models take"""
+
+    def __init__(self, routes, budgets, default_model, alternatives=(), profile_file=None, enabled=False):
+        self.routes = routes                # Task -> [(model, longest input in characters or None)], cheapest first
+        self.budgets = budgets              # Task -> seconds
+        self.default_model = default_model
+        self.alternatives = list(alternatives)  # Further latency fallbacks, once they have a profile
+        self.profile_file = profile_file
+        self.enabled = enabled
+        self._profiles = {}                 # (model, task) -> LatencyProfile
+        self._failures = {}                 # Model -> consecutive failed calls
+        self._fallbacks = {}                # (task, model) -> inputs sent elsewhere because it was slow
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._dirty = False
+
+    def choose(self, task, size, default=None):
+        """Model for an input of size characters; default (or the default model) when routing is off"""
+        default = default or self.default_model
+        route = self.routes.get(task)
+        if not self.enabled or not route:
+            return default
+        self._load()
+
+        with self._lock:
+            usable = [(model, limit) for model, limit in route
+                      if self._failures.get(model, 0) < FAILURES_TO_SKIP]
+            if not usable:
+                return default
+            # The cheapest model trusted with inputs of this size; the largest one when none is
+            primary = next((model for model, limit in usable if limit is None or size <= limit), usable[-1][0])
+            predicted = self._predict(primary, task, size)
+            budget = self.budgets.get(task)
+            model, reason = primary, "size"
+            if predicted is not None and budget is not None and predicted > budget:
+                others = [other for other, _ in usable] + self.alternatives
+                estimates = [(self._predict(other, task, size), other) for other in dict.fromkeys(others)
+                             if other != primary and self._failures.get(other, 0) < FAILURES_TO_SKIP]
+                estimates = [(seconds, other) for seconds, other in estimates if seconds is not None]
+                if estimates:
+                    seconds, fastest = min(estimates)
+                    if seconds < predicted:
+                        count = self._fallbacks.get((task, primary), 0) + 1
+                        self._fallbacks[(task, primary)] = count
+                        if count % PROBE_EVERY:
+                            model, reason = fastest, "latency_fallback"
+                        else:
+                            reason = "probe"
+        metrics.increment("llm_route_total", task=task, model=model, reason=reason)
+        return model
+
+    def record(self, model, task, size, seconds, ok):
+        """Add one call to the latency profile of (model, task)"""
+        self._load()
+        with self._lock:
+            if not ok:
+                self._failures[model] = self._failures.get(model, 0) + 1
+                if self._failures[model] == FAILURES_TO_SKIP and self.enabled:
+                    print(f"Model router: skipping {model} after {FAILURES_TO_SKIP} consecutive failures")
+                return
+            self._failures[model] = 0
+            profile = self._profiles.get((model, task))
+            if profile is None:
+                profile = self._profiles[(model, task)] = LatencyProfile()
+            profile.record(size, seconds)
+            self._dirty = True
+
+    def _predict(self, model, task, size):
+        profile = self._profiles.get((model, task))
+        return profile.predict(size) if profile else None
+
+    def _load(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            if not self.profile_file or not os.path.exists(self.profile_file):
+                return
+            try:
+                with open(self.profile_file) as file:
+                    data = json.load(file)
+                for entry in data.get("profiles", []):
+                    self._profiles[(entry["model"], entry["task"])] = LatencyProfile(**entry["profile"])
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                print(f"Error loading model latency profiles from {self.profile_file}: {e}")
+
+    def save(self):
+        """Write the profiles to the profile file, if any changed"""
+        with self._lock:
+            if not self.profile_file or not self._dirty:
+                return
+            data = {"profiles": [{"model": model, "task": task, "profile": profile.to_dict()}
+                                 for (model, task), profile in sorted(self._profiles.items())]}
+            self._dirty = False
+        temp_path = f"{self.profile_file}.tmp"
+        try:
+            with open(temp_path, "w") as file:
+                json.dump(data, file, indent=2)
+            os.replace(temp_path, self.profile_file)
+        except OSError as e:
+            print(f"Error saving model latency profiles to {self.profile_file}: {e}")
+
+    def format_profiles(self, size=2000):
+        """Format the predicted latency of every profiled model per task, for an input of size characters"""
+        self._load()
+        lines = [f"{'Task':<10} {'Model':<20} {'Calls':>7} {f'Predicted ({size} chars)':>24}"]
+        with self._lock:
+            for (model, task), profile in sorted(self._profiles.items(), key=lambda item: (item[0][1], item[0][0])):
+                predicted = profile.predict(size)
+                estimate = f"{predicted:.2f}s" if predicted is not None else "-"
+                lines.append(f"{task:<10} {model:<20} {profile.samples:>7} {estimate:>24}")
+        return "\n".join(lines)
@@ -0,0 +1,127 @@
+import re
+import sys
+import random
+import hashlib
+from array import array
+
+# Defaults for the near-duplicate resume index
+DEFAULT_SIMILARITY_THRESHOLD = 0.8
+DEFAULT_NUM_PERM = 128
+DEFAULT_BANDS = 32
+DEFAULT_SHINGLE_SIZE = 3
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_WORD_PATTERN = re.compile(r'\w+')
+
+class MinHashIndex:
+    """MinHash/LSH index for finding near-duplicate documents
+
+    Each document is reduced to a MinHash signature over its word shingles.
+    Signatures are split into bands and bucketed, so a query only compares
+    against documents sharing at least one band, and the estimated Jaccard
+    similarity of those candidates is checked against the threshold.
+    """
+
+    def __init__(self, threshold=DEFAULT_SIMILARITY_THRESHOLD, num_perm=DEFAULT_NUM_PERM,
+                 bands=DEFAULT_BANDS, shingle_size=DEFAULT_SHINGLE_SIZE, seed=1):
+        if num_perm % bands != 0:
+            raise ValueError("num_perm must be a multiple of bands")
+
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+
+        # Fixed seed, so signatures stored in the database stay comparable across runs
+        rng = random.Random(seed)
+        self._permutations = [
+            (rng.randint(1, _MERSENNE_PRIME - 1), rng.randint(0, _MERSENNE_PRIME - 1))
+            for _ in range(num_perm)
+        ]
+
+        self._signatures = {}
+        self._buckets = [{} for _ in range(bands)]
+
+    def __len__(self):
+        return len(self._signatures)
+
+    def _shingles(self, text):
+        """Split text into a set of hashed word shingles"""
+        words = _WORD_PATTERN.findall(text.lower())
+        if not words:
+            return set()
+
+        size = min(self.shingle_size, len(words))
+        shingles = set()
+        for i in range(len(words) - size + 1):
+            shingle = " ".join(words[i:i + size]).encode("utf-8")
+            shingles.add(int.from_bytes(hashlib.blake2b(shingle, digest_size=8).digest(), "little"))
+        return shingles
+
+    def signature(self, text):
+        """Compute the MinHash signature of a text, or None if it has no words"""
+        shingles = self._shingles(text or "")
+        if not shingles:
+            return None
+
+        signature = []
+        for a, b in self._permutations:
+            signature.append(min(((a * x + b) % _MERSENNE_PRIME) & _MAX_HASH for x in shingles))
+        return tuple(signature)
+
+    def _band_keys(self, signature):
+        for band in range(self.bands):
+            start = band * self.rows
+            yield band, signature[start:start + self.rows]
+
+    def add(self, key, signature):
+        """Add a document signature to the index"""
+        if signature is None or len(signature) != self.num_perm:
+            return
+
+        signature = tuple(signature)
+        self._signatures[key] = signature
+        for band, band_key in self._band_keys(signature):
+            self._buckets[band].setdefault(band_key, []).append(key)
+
+    def add_many(self, items):
+        """Add (key, signature) pairs, e.g. signatures loaded from the database"""
+        for key, signature in items:
+            self.add(key, signature)
+
+    def similarity(self, first, second):
+        """Estimate the Jaccard similarity of two signatures"""
+        return sum(1 for x, y in zip(first, second) if x == y) / self.num_perm
+
+    def query(self, signature):
+        """Return (key, similarity) of the most similar indexed document above the threshold"""
+        if signature is None or len(signature) != self.num_perm:
+            return None
+
+        candidates = set()
+        for band, band_key in self._band_keys(tuple(signature)):
+            candidates.update(self._buckets[band].get(band_key, ()))
+
+        best = None
+        for key in candidates:
+            score = self.similarity(signature, self._signatures[key])
+            if score >= self.threshold and (best is None or score > best[1]):
+                best = (key, score)
+        return best
+
+def signature_to_bytes(signature):
+    """Pack a signature into bytes for database storage"""
+    packed = array('I', signature)
+    if sys.byteorder != 'little':
+        packed.byteswap()
+    return packed.tobytes()
+
+def signature_from_bytes(data):
+    """Unpack a signature stored with signature_to_bytes"""
+    packed = array('I')
+    packed.frombytes(data)
+    if sys.byteorder != 'little':
+        packed.byteswap()
+    return tuple(packed)
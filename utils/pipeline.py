@@ -0,0 +1,346 @@
+import os
+import time
+import queue
+import threading
+from utils import metrics
+
+# asyncio, multiprocessing and concurrent.futures are imported by the stages that
+# use them, so importing the pipeline stays cheap for commands that never run one
+
+# How stage workers run
+THREAD = "thread"    # Worker threads, for blocking I/O such as database writes
+PROCESS = "process"  # Worker processes, for CPU-bound work such as PDF text extraction
+ASYNC = "async"      # Concurrent tasks on an event loop, for LLM calls
+
+DEFAULT_QUEUE_SIZE = 16
+
+# Worker defaults of the screening pipelines
+DEFAULT_EXTRACT_WORKERS = min(4, os.cpu_count() or 1)
+DEFAULT_LLM_WORKERS = 16  # Items calling the LLM at once; llm_connector's adaptive limit decides how many reach the server
+DEFAULT_BULK_WORKERS = os.cpu_count() or 1  # Processes parsing resumes without the LLM, which is CPU-bound throughout
+
+_DONE = object()  # End-of-stream marker passed between stages
+
+class Stage:
+    """One step of a pipeline
+
+    func is called with each item from the previous stage and returns the
+    item for the next one; returning None drops the item. PROCESS stages
+    need a picklable, module-level func. ASYNC stages accept coroutine
+    functions or blocking functions, which run on the loop's thread pool;
+    workers is then the number of items in flight at once. on_error, if
+    given, is called in the parent process with each item func failed on
+    and the exception (e.g. to record the failure).
+    """
+
+    def __init__(self, name, func, workers=1, mode=THREAD, queue_size=None, on_error=None):
+        if mode not in (THREAD, PROCESS, ASYNC):
+            raise ValueError(f"Unknown stage mode: {mode}")
+
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+        self.mode = mode
+        self.queue_size = queue_size
+        self.on_error = on_error
+
+class StageStats:
+    """Counters and timings of one stage, updated by its workers"""
+
+    def __init__(self, stage):
+        self.name = stage.name
+        self.mode = stage.mode
+        self.workers = stage.workers
+        self.processed = 0
+        self.dropped = 0
+        self.failed = 0
+        self.busy_seconds = 0.0     # Time spent in func, summed over workers
+        self.blocked_seconds = 0.0  # Time spent waiting for room in the next queue
+        self.started = None
+        self.finished = None
+        self._lock = threading.Lock()
+
+    def record(self, started, finished, result, failed):
+        with self._lock:
+            if self.started is None or started < self.started:
+                self.started = started
+            if self.finished is None or finished > self.finished:
+                self.finished = finished
+            self.busy_seconds += finished - started
+            if failed:
+                self.failed += 1
+                outcome = "failed"
+            elif result is None:
+                self.dropped += 1
+                outcome = "dropped"
+            else:
+                self.processed += 1
+                outcome = "done"
+        metrics.observe("pipeline_stage_seconds", finished - started, stage=self.name)
+        metrics.increment("pipeline_items_total", stage=self.name, outcome=outcome)
+
+    def add_blocked(self, seconds):
+        with self._lock:
+            self.blocked_seconds += seconds
+
+    @property
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return self.finished - self.started
+
+    @property
+    def throughput(self):
+        """Items completed per second while the stage was active"""
+        completed = self.processed + self.dropped + self.failed
+        return completed / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def utilization(self):
+        """Fraction of worker time spent in func (close to 1 for the bottleneck stage)"""
+        capacity = self.elapsed * self.workers
+        return min(1.0, self.busy_seconds / capacity) if capacity > 0 else 0.0
+
+class Pipeline:
+    """Run items through stages connected by bounded queues
+
+    Every stage has its own workers, so the stages overlap: while one item
+    is being parsed, the next is already being extracted. Queues between
+    stages are bounded, so a slow stage makes the stages before it wait
+    instead of piling up items in memory (backpressure).
+
+    With a profiler, every stage is profiled under "<name>.<stage name>".
+    """
+
+    def __init__(self, stages, queue_size=DEFAULT_QUEUE_SIZE, name="pipeline", profiler=None):
+        if not stages:
+            raise ValueError("A pipeline needs at least one stage")
+
+        self.stages = stages
+        self.queue_size = queue_size
+        self.name = name
+        self.profiler = profiler  # utils.profiling.StageProfiler, or None
+        self.stats = [StageStats(stage) for stage in stages]
+        self.items_in = 0
+        self.items_out = 0
+        self.elapsed = 0.0
+
+    def run(self, items):
+        """Feed items through every stage and return the outputs of the last one
+
+        Outputs are in completion order, which may differ from input order.
+        """
+        queues = [queue.Queue(maxsize=stage.queue_size or self.queue_size) for stage in self.stages]
+        results = []
+        results_lock = threading.Lock()
+
+        def emit_result(result):
+            if result is _DONE:
+                return
+            with results_lock:
+                results.append(result)
+
+        threads = []
+        executors = []
+        for index, stage in enumerate(self.stages):
+            inbox = queues[index]
+            emit = queues[index + 1].put if index + 1 < len(queues) else emit_result
+            threads.extend(self._start_stage(stage, self.stats[index], inbox, emit, executors))
+
+        span = self.profiler.begin(self.name) if self.profiler else None
+        start = time.perf_counter()
+        try:
+            for item in items:
+                queues[0].put(item)
+                self.items_in += 1
+        finally:
+            queues[0].put(_DONE)
+            for thread in threads:
+                thread.join()
+            for executor in executors:
+                executor.shutdown()
+            if self.profiler:
+                self.profiler.end(span)
+
+        self.elapsed = time.perf_counter() - start
+        self.items_out = len(results)
+        return results
+
+    def _start_stage(self, stage, stats, inbox, emit, executors):
+        """Start the workers of a stage and return their threads"""
+        remaining = [stage.workers]
+        remaining_lock = threading.Lock()
+
+        def finish_worker():
+            # Pass the end marker on to a sibling worker, or downstream once all have stopped
+            with remaining_lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last:
+                emit(_DONE)
+            else:
+                inbox.put(_DONE)
+
+        def forward(result):
+            if result is None:
+                return
+            blocked_since = time.perf_counter()
+            emit(result)
+            stats.add_blocked(time.perf_counter() - blocked_since)
+
+        if stage.mode == ASYNC:
+            thread = threading.Thread(
+                target=self._run_async_stage,
+                args=(stage, stats, inbox, forward, finish_worker),
+                name=f"pipeline-{stage.name}", daemon=True
+            )
+            thread.start()
+            return [thread]
+
+        if stage.mode == PROCESS:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+            from utils.profiling import profile_call
+
+            # Spawned rather than forked, since the parent already runs threads (e.g. the DB writer)
+            pool = ProcessPoolExecutor(max_workers=stage.workers, mp_context=multiprocessing.get_context("spawn"))
+            executors.append(pool)
+            if self.profiler:
+                profile_name = self._profile_name(stage)
+                call = lambda item: self._add_profile(profile_name, _collect(
+                    pool.submit(metrics.call_collecting, profile_call, stage.func, item).result()))
+            else:
+                call = lambda item: _collect(pool.submit(metrics.call_collecting, stage.func, item).result())
+        elif self.profiler:
+            call = self.profiler.wrap(self._profile_name(stage), stage.func)
+        else:
+            call = stage.func
+
+        def worker():
+            while True:
+                item = inbox.get()
+                if item is _DONE:
+                    finish_worker()
+                    return
+                result, failed = _call_stage(stage, call, item, stats)
+                if not failed:
+                    forward(result)
+
+        threads = []
+        for i in range(stage.workers):
+            thread = threading.Thread(target=worker, name=f"pipeline-{stage.name}-{i}", daemon=True)
+            thread.start()
+            threads.append(thread)
+        return threads
+
+    def _run_async_stage(self, stage, stats, inbox, forward, finish_worker):
+        """Run an ASYNC stage: one event loop with stage.workers concurrent tasks"""
+        import asyncio
+        import inspect
+        from concurrent.futures import ThreadPoolExecutor
+
+        # Each task makes one blocking call at a time (queue read, func or queue write)
+        executor = ThreadPoolExecutor(max_workers=stage.workers, thread_name_prefix=f"pipeline-{stage.name}")
+        is_coroutine = inspect.iscoroutinefunction(stage.func)
+        func = stage.func
+        if self.profiler and not is_coroutine:
+            # Coroutines interleave on the loop thread, so only blocking functions are profiled
+            func = self.profiler.wrap(self._profile_name(stage), func)
+
+        async def task():
+            loop = asyncio.get_running_loop()
+            while True:
+                item = await loop.run_in_executor(executor, inbox.get)
+                if item is _DONE:
+                    await loop.run_in_executor(executor, finish_worker)
+                    return
+
+                started = time.perf_counter()
+                failed = False
+                result = None
+                try:
+                    if is_coroutine:
+                        result = await func(item)
+                    else:
+                        result = await loop.run_in_executor(executor, func, item)
+                except Exception as e:
+                    print(f"Error in {stage.name} stage: {e}")
+                    failed = True
+                    _report_error(stage, item, e)
+                stats.record(started, time.perf_counter(), result, failed)
+
+                if not failed:
+                    await loop.run_in_executor(executor, forward, result)
+
+        async def run_tasks():
+            await asyncio.gather(*(task() for _ in range(stage.workers)))
+
+        try:
+            asyncio.run(run_tasks())
+        finally:
+            executor.shutdown()
+
+    def _profile_name(self, stage):
+        return f"{self.name}.{stage.name}"
+
+    def _add_profile(self, name, profiled):
+        result, raw_stats = profiled
+        self.profiler.add(name, raw_stats)
+        return result
+
+    def format_stats(self):
+        """Format per-stage and end-to-end throughput as a table"""
+        lines = [
+            f"{'Stage':<12} {'Mode':<8} {'Workers':>7} {'Done':>6} {'Dropped':>7} {'Failed':>6} "
+            f"{'Items/s':>9} {'Busy':>6} {'Blocked':>9}"
+        ]
+        for stats in self.stats:
+            lines.append(
+                f"{stats.name:<12} {stats.mode:<8} {stats.workers:>7} {stats.processed:>6} {stats.dropped:>7} "
+                f"{stats.failed:>6} {stats.throughput:>9.2f} {stats.utilization*100:>5.0f}% {stats.blocked_seconds:>8.2f}s"
+            )
+
+        rate = self.items_in / self.elapsed if self.elapsed > 0 else 0.0
+        lines.append(f"End to end: {self.items_in} items in {self.elapsed:.2f}s ({rate:.2f} items/s), {self.items_out} completed")
+        return "\n".join(lines)
+
+def chunked(items, size):
+    """Lists of up to size consecutive items, e.g. to hand a worker process many small items at once"""
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _collect(reply):
+    """Merge the metrics a worker process recorded for one item and return its result"""
+    result, worker_metrics = reply
+    metrics.merge(worker_metrics)
+    return result
+
+def _call_stage(stage, call, item, stats):
+    """Call a stage function on one item, recording timing and failures"""
+    started = time.perf_counter()
+    failed = False
+    result = None
+    try:
+        result = call(item)
+    except Exception as e:
+        # A failing item is dropped, the rest of the stream keeps flowing
+        print(f"Error in {stage.name} stage: {e}")
+        failed = True
+        _report_error(stage, item, e)
+    stats.record(started, time.perf_counter(), result, failed)
+    return result, failed
+
+def _report_error(stage, item, error):
+    """Pass a failed item to the stage's on_error; a failing callback must not stop the worker"""
+    if stage.on_error is None:
+        return
+    try:
+        stage.on_error(item, error)
+    except Exception as e:
+        print(f"Error in {stage.name} stage error handler: {e}")
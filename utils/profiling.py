@@ -0,0 +1,239 @@
+# File: utils/profiling.py
+# Opt-in cProfile and tracemalloc reports per pipeline stage (--profile)
+#
+# Each stage, or each named section of a command, gets its own cProfile
+# statistics, written as a .pstats file (for pstats, snakeviz, ...) and a
+# text report of its most expensive functions. With memory tracing on,
+# every pipeline run and section also reports its peak traced memory and
+# the source lines that allocated the most while it ran.
+
+import os
+import io
+import threading
+from contextlib import contextmanager, nullcontext
+
+# cProfile, pstats and tracemalloc are imported when profiling is on, so the
+# CLIs do not pay for them on normal runs
+
+DEFAULT_PROFILE_DIR = "profile"
+TOP_FUNCTIONS = 30     # Functions listed in each text report
+TOP_ALLOCATIONS = 15   # Source lines listed per memory span
+TRACEBACK_FRAMES = 10  # Frames kept per traced allocation
+
+class _RawStats:
+    """Stats dict of a finished profile, in the shape pstats.Stats.add() accepts"""
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+def profile_call(func, item):
+    """Profile one call in a worker process, returning (result, raw stats)
+
+    Module-level so PROCESS stages can run it; the parent merges the stats
+    with StageProfiler.add().
+    """
+    import cProfile
+
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        result = func(item)
+    finally:
+        profile.disable()
+    profile.create_stats()
+    return result, profile.stats
+
+class StageProfiler:
+    """Collect cProfile statistics per stage and optional memory reports
+
+    Profilers are per thread, so stages with several workers are profiled
+    by one profiler per worker thread, merged when the reports are written.
+    Python 3.12 allows only one active profiler per process; there, calls
+    that start while another one is being profiled run unprofiled and are
+    counted as skipped.
+    """
+
+    def __init__(self, output_dir=DEFAULT_PROFILE_DIR, trace_memory=False):
+        self.output_dir = output_dir
+        self.trace_memory = trace_memory
+        self._profiles = {}  # (name, thread ID) -> cProfile.Profile
+        self._remote = {}    # name -> pstats.Stats merged from worker processes
+        self._calls = {}     # name -> [profiled calls, skipped calls]
+        self._memory = []    # (name, peak bytes above the start, size difference, top allocation lines)
+        self._lock = threading.Lock()
+
+        if trace_memory:
+            import tracemalloc
+            tracemalloc.start(TRACEBACK_FRAMES)
+
+    def wrap(self, name, func):
+        """Return func profiled under name, for stages running in this process"""
+        def profiled(item):
+            with self.section(name, trace_memory=False):
+                return func(item)
+        return profiled
+
+    @contextmanager
+    def section(self, name, trace_memory=True):
+        """Profile the body of a with block under name"""
+        import cProfile
+
+        key = (name, threading.get_ident())
+        with self._lock:
+            profile = self._profiles.get(key)
+            if profile is None:
+                profile = self._profiles[key] = cProfile.Profile()
+            counts = self._calls.setdefault(name, [0, 0])
+
+        span = self.begin(name) if trace_memory else None
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler is active (Python 3.12+)
+            with self._lock:
+                counts[1] += 1
+            try:
+                yield
+            finally:
+                self.end(span)
+            return
+
+        try:
+            yield
+        finally:
+            profile.disable()
+            with self._lock:
+                counts[0] += 1
+            self.end(span)
+
+    def add(self, name, raw_stats):
+        """Merge stats returned by profile_call() in a worker process"""
+        import pstats
+
+        with self._lock:
+            stats = self._remote.get(name)
+            if stats is None:
+                self._remote[name] = pstats.Stats(_RawStats(raw_stats))
+            else:
+                stats.add(_RawStats(raw_stats))
+            self._calls.setdefault(name, [0, 0])[0] += 1
+
+    def begin(self, name):
+        """Start a memory span (a pipeline run or section); returns a token for end()"""
+        if not self.trace_memory:
+            return None
+        import tracemalloc
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        return name, snapshot, tracemalloc.get_traced_memory()[0]
+
+    def end(self, span):
+        """Finish a memory span, recording its peak and top allocating lines"""
+        if span is None:
+            return
+        import tracemalloc
+        name, before, start = span
+        # Peak above the memory in use at the start, before the next snapshot adds its own
+        peak = tracemalloc.get_traced_memory()[1] - start
+        after = tracemalloc.take_snapshot()
+        differences = [difference for difference in after.compare_to(before, "lineno")
+                       if not _is_bookkeeping(difference.traceback[0].filename)]
+        growth = sum(difference.size_diff for difference in differences)
+        top = [str(difference) for difference in differences[:TOP_ALLOCATIONS]]
+        with self._lock:
+            self._memory.append((name, peak, growth, top))
+
+    def write_reports(self):
+        """Write <name>.pstats and <name>.txt per stage, plus allocations.txt; returns the paths"""
+        import pstats
+
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        with self._lock:
+            by_name = {}
+            for (name, _), profile in self._profiles.items():
+                profile.create_stats()
+                if not profile.stats:
+                    continue
+                if name in by_name:
+                    by_name[name].add(profile)
+                else:
+                    by_name[name] = pstats.Stats(profile)
+            for name, stats in self._remote.items():
+                if name in by_name:
+                    by_name[name].add(stats)
+                else:
+                    by_name[name] = stats
+            calls = {name: list(counts) for name, counts in self._calls.items()}
+            memory = list(self._memory)
+
+        paths = []
+        for name, stats in sorted(by_name.items()):
+            base = os.path.join(self.output_dir, _file_name(name))
+            stats.dump_stats(base + ".pstats")
+
+            stream = io.StringIO()
+            profiled, skipped = calls.get(name, (0, 0))
+            stream.write(f"{name}: {profiled} profiled calls, {skipped} skipped, "
+                         f"{stats.total_tt:.3f}s profiled\n")
+            stats.stream = stream
+            stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(TOP_FUNCTIONS)
+            with open(base + ".txt", "w") as file:
+                file.write(stream.getvalue())
+            paths.extend([base + ".pstats", base + ".txt"])
+
+        if self.trace_memory:
+            path = os.path.join(self.output_dir, "allocations.txt")
+            with open(path, "w") as file:
+                for name, peak, growth, top in memory:
+                    file.write(f"== {name}: peak {peak / 2**20:+.1f} MiB, "
+                               f"{growth / 2**20:+.1f} MiB retained\n")
+                    for line in top:
+                        file.write(f"  {line}\n")
+                    file.write("\n")
+            paths.append(path)
+
+        return paths
+
+    def format_summary(self):
+        """Format profiled calls per stage and memory peaks as a table"""
+        lines = [f"{'Profiled':<24} {'Calls':>7} {'Skipped':>8}"]
+        with self._lock:
+            for name, (profiled, skipped) in sorted(self._calls.items()):
+                lines.append(f"{name:<24} {profiled:>7} {skipped:>8}")
+            for name, peak, growth, _ in self._memory:
+                lines.append(f"Memory {name}: peak {peak / 2**20:+.1f} MiB, {growth / 2**20:+.1f} MiB retained")
+        return "\n".join(lines)
+
+    def close(self):
+        """Write the reports, print where they are and stop memory tracing"""
+        paths = self.write_reports()
+        print(f"\nProfile:\n{self.format_summary()}")
+        print(f"Profile reports written to {self.output_dir}/ ({len(paths)} files)")
+        if self.trace_memory:
+            import tracemalloc
+            tracemalloc.stop()
+
+def create_profiler(args):
+    """Build a StageProfiler from the --profile and --trace_memory options, or None when both are off"""
+    if not args.profile and not args.trace_memory:
+        return None
+    return StageProfiler(args.profile or DEFAULT_PROFILE_DIR, args.trace_memory)
+
+def profile_section(profiler, name):
+    """profiler.section(name), or a no-op context when profiling is off"""
+    if profiler is None:
+        return nullcontext()
+    return profiler.section(name)
+
+def _is_bookkeeping(filename):
+    """Whether allocations at filename are module imports or tracemalloc's own snapshots"""
+    import tracemalloc
+
+    return filename.startswith("<frozen importlib") or filename == tracemalloc.__file__
+
+def _file_name(name):
+    return "".join(c if c.isalnum() or c in "-_." else "_" for c in name)
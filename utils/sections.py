@@ -0,0 +1,107 @@
+# File: utils/sections.py
+# One-pass segmentation of resumes and job descriptions into labeled sections
+#
+# A heading is a line that starts with one of the known section names
+# ("Skills", "Work Experience", ...), either followed by a colon (with up to
+# two leading words, as in "Technical Skills:", and possibly content on the
+# same line) or alone on its line. All headings are found by a single
+# precompiled pattern in one scan of the text; a section runs from the end
+# of its heading to the start of the next one. The text before the first
+# heading is the "preamble" section (name and contact details of a resume).
+#
+# The regex extractors read their sections from the segmentation instead of
+# searching the whole text once per section, and prompts drop sections the
+# LLM does not need (see SectionSplitter.compress).
+
+import re
+from dataclasses import dataclass
+from config import Config
+from utils import metrics
+
+PREAMBLE = "preamble"
+
+# Label -> section names, for each kind of document
+RESUME_HEADINGS = {
+    "summary": ("summary", "profile", "objective", "about me"),
+    "skills": ("skills", "technical skills", "key skills", "core skills", "proficiencies", "abilities",
+               "competencies", "core competencies"),
+    "experience": ("experience", "work experience", "professional experience", "employment",
+                   "employment history", "work history"),
+    "education": ("education", "academic background", "qualifications"),
+    "certifications": ("certifications", "certificates", "licenses"),
+    "projects": ("projects",),
+    "references": ("references", "reference"),
+    "interests": ("interests", "hobbies"),
+}
+JOB_HEADINGS = {
+    "description": ("description", "job description", "overview", "about the role", "the role"),
+    "requirements": ("requirements", "skills", "qualifications", "required skills", "what you need"),
+    "responsibilities": ("responsibilities", "duties", "you will", "what you will do"),
+    "about": ("about us", "about the company", "who we are"),
+    "benefits": ("benefits", "perks", "what we offer"),
+}
+
+@dataclass(slots=True, frozen=True)
+class Section:
+    """A labeled part of a document, as offsets into its text"""
+
+    label: str
+    heading_start: int  # Where the heading line starts (equal to start for the preamble)
+    start: int          # Where the content starts, right after the heading
+    end: int            # Where the next heading starts, or the end of the text
+
+class SectionSplitter:
+    """Split documents of one kind into sections, with a pattern compiled once"""
+
+    def __init__(self, headings):
+        self.labels = {name: label for label, names in headings.items() for name in names}
+        # Longest names first, so "work experience" wins over "experience"
+        names = "|".join(re.escape(name).replace(r"\ ", r"\s+")
+                         for name in sorted(self.labels, key=len, reverse=True))
+        self.pattern = re.compile(
+            rf"^[ \t]*(?:(?:[A-Za-z&/]+[ \t]+){{0,2}}(?P<named>{names})[ \t]*:"
+            rf"|(?P<alone>{names})[ \t]*\.?[ \t]*$)",
+            re.IGNORECASE | re.MULTILINE)
+
+    def split(self, text):
+        """Sections of text in order, starting with the preamble"""
+        sections = []
+        label, heading_start, start = PREAMBLE, 0, 0
+        for match in self.pattern.finditer(text):
+            sections.append(Section(label, heading_start, start, match.start()))
+            name = match.group("named") or match.group("alone")
+            label = self.labels[" ".join(name.lower().split())]
+            heading_start, start = match.start(), match.end()
+        sections.append(Section(label, heading_start, start, len(text)))
+        return sections
+
+    def section_text(self, text, *labels, sections=None):
+        """Content of the first section with one of labels, or None"""
+        for section in sections if sections is not None else self.split(text):
+            if section.label in labels:
+                return text[section.start:section.end]
+        return None
+
+    def compress(self, text, drop=()):
+        """text without the sections labeled drop, with runs of spaces and blank lines collapsed"""
+        if drop:
+            text = "".join(text[section.heading_start:section.end] for section in self.split(text)
+                           if section.label not in drop)
+        text = _SPACES.sub(" ", text)
+        text = _TRAILING_SPACES.sub("", text)
+        return _BLANK_LINES.sub("\n\n", text).strip()
+
+_SPACES = re.compile(r"[ \t\f\v]+")
+_TRAILING_SPACES = re.compile(r" +$", re.MULTILINE)
+_BLANK_LINES = re.compile(r"\n\s*\n")
+
+RESUME_SECTIONS = SectionSplitter(RESUME_HEADINGS)
+JOB_SECTIONS = SectionSplitter(JOB_HEADINGS)
+
+def prompt_text(text, splitter, kind, agent):
+    """A document as it goes into a prompt: compressed, unless Config.COMPRESS_PROMPTS is off"""
+    if not Config.COMPRESS_PROMPTS:
+        return text
+    compressed = splitter.compress(text, Config.PROMPT_DROP_SECTIONS.get(kind, ()))
+    metrics.increment("prompt_chars_saved_total", len(text) - len(compressed), agent=agent)
+    return compressed
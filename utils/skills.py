@@ -0,0 +1,168 @@
+# File: utils/skills.py
+# Skill dictionary for the regex extractors
+#
+# Every skill has a canonical name and the aliases it is written as
+# ("JS", "Javascript", "ECMAScript" -> "JavaScript"). A text is tokenized by
+# one precompiled pattern and its tokens, and runs of up to max_words tokens
+# starting with a known first word, are looked up in a dict of normalized
+# aliases: a single linear pass, however large the dictionary grows.
+#
+# Resumes and job descriptions parsed this way name their skills the same
+# way, so the matcher compares "JavaScript" with "JavaScript" rather than
+# "JS" with "Javascript (ES6)". Aliases that are also common words ("Go",
+# "Excel") only match with their exact capitalization.
+
+import re
+
+# Canonical name -> aliases (the canonical name is an alias of itself)
+SKILL_DICTIONARY = {
+    # Languages
+    "Python": ("python3", "py"),
+    "Java": (),
+    "JavaScript": ("js", "ecmascript", "es6", "java script"),
+    "TypeScript": ("ts",),
+    "C++": ("cpp",),
+    "C#": ("csharp", "c sharp"),
+    "C": (),
+    "Go": ("golang",),
+    "Rust": (),
+    "Ruby": (),
+    "PHP": (),
+    "Kotlin": (),
+    "Swift": (),
+    "Scala": (),
+    "R": (),
+    "MATLAB": (),
+    "Bash": ("shell scripting",),
+    "SQL": ("t-sql", "pl/sql", "plsql"),
+    "HTML": ("html5",),
+    "CSS": ("css3", "sass", "scss"),
+    # Frameworks and libraries
+    "React": ("react.js", "reactjs"),
+    "Angular": ("angularjs", "angular.js"),
+    "Vue": ("vue.js", "vuejs"),
+    "Node.js": ("node", "nodejs"),
+    "Django": (),
+    "Flask": (),
+    "FastAPI": (),
+    "Spring": ("spring boot",),
+    ".NET": ("dotnet", "asp.net"),
+    "Pandas": (),
+    "NumPy": (),
+    "scikit-learn": ("sklearn", "scikit learn"),
+    "TensorFlow": (),
+    "PyTorch": ("torch",),
+    "Spark": ("apache spark", "pyspark"),
+    "Hadoop": (),
+    "Kafka": ("apache kafka",),
+    # Data stores
+    "PostgreSQL": ("postgres",),
+    "MySQL": (),
+    "SQLite": (),
+    "MongoDB": ("mongo",),
+    "Redis": (),
+    "Elasticsearch": ("elastic search",),
+    "Oracle": (),
+    # Cloud and operations
+    "AWS": ("amazon web services",),
+    "Azure": ("microsoft azure",),
+    "GCP": ("google cloud", "google cloud platform"),
+    "Docker": (),
+    "Kubernetes": ("k8s",),
+    "Terraform": (),
+    "Ansible": (),
+    "Jenkins": (),
+    "CI/CD": ("continuous integration", "continuous delivery"),
+    "Linux": ("unix",),
+    "Git": ("github", "gitlab"),
+    # Practices and fields
+    "REST APIs": ("rest", "restful", "rest api", "restful apis", "restful api"),
+    "GraphQL": (),
+    "Microservices": ("microservice",),
+    "Machine Learning": ("ml",),
+    "Deep Learning": (),
+    "NLP": ("natural language processing",),
+    "Computer Vision": (),
+    "Data Analysis": ("data analytics",),
+    "Statistics": (),
+    "Agile": ("agile development", "scrum", "kanban"),
+    "Testing": ("unit testing", "test automation", "tdd"),
+    "Excel": (),
+    "Tableau": (),
+    "Power BI": ("powerbi",),
+    # Soft skills
+    "Communication": ("communication skills",),
+    "Leadership": ("team leadership",),
+    "Problem solving": ("problem-solving",),
+    "Teamwork": ("collaboration",),
+    "Project Management": (),
+}
+
+# Aliases that are also everyday words or letters, matched only as written here
+EXACT_CASE_ALIASES = ("C", "Go", "R", "Rust", "Swift", "Excel", "Oracle", "Spring", "Testing", "Node",
+                      "TS", "ML", "REST", "Torch")
+
+# Words, keeping the characters of names such as "C++", "C#", "Node.js" and "R&D" (which is not R);
+# hyphenated names ("scikit-learn") are runs of words
+_TOKEN = re.compile(r"[A-Za-z0-9.][\w.+#&]*")
+
+def _normalize(phrase):
+    """Tokens of a phrase, without a sentence's final period, as they are looked up"""
+    return [token.rstrip(".") or token for token in _TOKEN.findall(phrase)]
+
+class SkillMatcher:
+    """Find the skills of a dictionary in text, under their canonical names"""
+
+    def __init__(self, dictionary=SKILL_DICTIONARY, exact_case=EXACT_CASE_ALIASES):
+        self.aliases = {}        # Lowercase alias tokens joined by spaces -> canonical name
+        self.exact_aliases = {}  # Alias as written -> canonical name, for the exact_case ones
+        exact_case = {alias.lower(): alias for alias in exact_case}
+        for skill, aliases in dictionary.items():
+            for alias in (skill, *aliases):
+                if alias.lower() in exact_case:
+                    self.exact_aliases[" ".join(_normalize(exact_case[alias.lower()]))] = skill
+                else:
+                    self.aliases[" ".join(_normalize(alias)).lower()] = skill
+
+        phrases = [key.split(" ") for key in (*self.aliases, *self.exact_aliases)]
+        self.max_words = max(len(words) for words in phrases)
+        # First words of the multi-word aliases; other tokens are only looked up alone
+        self.first_words = {words[0].lower() for words in phrases if len(words) > 1}
+
+    def find(self, text):
+        """Canonical names of the skills mentioned in text, in order of first mention"""
+        tokens = _normalize(text)
+        lowered = [token.lower() for token in tokens]
+        found = {}
+        i, count = 0, len(tokens)
+        while i < count:
+            size = 1
+            skill = None
+            if lowered[i] in self.first_words:
+                # Longest alias first, so "machine learning" is not read as "machine" + "learning"
+                for size in range(min(self.max_words, count - i), 1, -1):
+                    skill = self.aliases.get(" ".join(lowered[i:i + size]))
+                    if skill is None:
+                        skill = self.exact_aliases.get(" ".join(tokens[i:i + size]))
+                    if skill is not None:
+                        break
+                else:
+                    size = 1
+            if skill is None:
+                skill = self.aliases.get(lowered[i]) or self.exact_aliases.get(tokens[i])
+            if skill is not None:
+                found[skill] = None
+            i += size
+        return list(found)
+
+    def extract(self, text, listed=()):
+        """Skills mentioned in text, followed by the items of listed (e.g. skill bullets) that name no known skill"""
+        skills = self.find(text)
+        known = set(skills)
+        for item in listed:
+            if not self.find(item) and item not in known:
+                known.add(item)
+                skills.append(item)
+        return skills
+
+SKILLS = SkillMatcher()
@@ -0,0 +1,193 @@
+# File: utils/slot_allocator.py
+# Interview slot allocation from interviewer availability
+#
+# Availability rows are (interviewer, days, start, end). With days empty,
+# start and end are date-times of a one-off window; otherwise days is a set
+# of weekdays such as "mon-fri" or "mon,wed", start and end are times of day,
+# and the window repeats on those days over the scheduling horizon.
+#
+# Each interviewer's calendar keeps its booked intervals sorted and merged,
+# so finding the next free time is a bisect plus one jump per booked block.
+# Booked intervals are extended by the buffer, which keeps at least that
+# much time free between two interviews of the same interviewer.
+#
+# Every candidate is given to the interviewer with the earliest free time (a
+# heap over the calendars) and offered num_slots of that interviewer's times,
+# on different days. Offered times are held, so none is offered twice.
+
+import csv
+import heapq
+import bisect
+import datetime
+import threading
+from dataclasses import dataclass
+
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+AVAILABILITY_COLUMNS = ("interviewer", "days", "start", "end")
+
+@dataclass(slots=True, frozen=True)
+class Slot:
+    """One proposed interview time"""
+
+    interviewer: str
+    start: datetime.datetime
+    end: datetime.datetime
+
+    def format(self):
+        return f"{self.start.strftime('%A, %B %d at %I:%M %p')} with {self.interviewer}"
+
+    def to_dict(self):
+        return {"interviewer": self.interviewer, "start": self.start.isoformat(), "end": self.end.isoformat()}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["interviewer"], datetime.datetime.fromisoformat(data["start"]),
+                   datetime.datetime.fromisoformat(data["end"]))
+
+def parse_days(days):
+    """Weekday numbers (0 = Monday) of a spec such as "mon-fri" or "mon,wed,fri\""""
+    weekdays = set()
+    for part in days.lower().replace(" ", "").split(","):
+        first, _, last = part.partition("-")
+        if first not in WEEKDAYS or (last and last not in WEEKDAYS):
+            raise ValueError(f"Invalid weekdays: {days!r} (expected e.g. mon-fri or mon,wed,fri)")
+        start = WEEKDAYS.index(first)
+        stop = WEEKDAYS.index(last) if last else start
+        weekdays.update(range(start, stop + 1) if start <= stop else [*range(start, 7), *range(0, stop + 1)])
+    return weekdays
+
+def load_availability_file(path):
+    """Read availability rows from a CSV file with interviewer, days, start and end columns"""
+    with open(path, newline="", encoding="utf-8") as file:
+        reader = csv.DictReader(file)
+        missing = [column for column in AVAILABILITY_COLUMNS if column not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError(f"{path} is missing the column(s) {', '.join(missing)}")
+        return [tuple((row[column] or "").strip() for column in AVAILABILITY_COLUMNS) for row in reader]
+
+def expand_availability(rows, first_day, horizon_days):
+    """Interviewer -> [(start, end)] windows from availability rows, for the days from first_day on"""
+    last_day = first_day + datetime.timedelta(days=horizon_days)
+    windows = {}
+    for interviewer, days, start, end in rows:
+        if days:
+            weekdays = parse_days(days)
+            start_time = datetime.time.fromisoformat(start)
+            end_time = datetime.time.fromisoformat(end)
+            day = first_day
+            while day < last_day:
+                if day.weekday() in weekdays:
+                    windows.setdefault(interviewer, []).append(
+                        (datetime.datetime.combine(day, start_time), datetime.datetime.combine(day, end_time)))
+                day += datetime.timedelta(days=1)
+        else:
+            windows.setdefault(interviewer, []).append(
+                (datetime.datetime.fromisoformat(start), datetime.datetime.fromisoformat(end)))
+    return windows
+
+class InterviewerCalendar:
+    """Availability windows and booked intervals of one interviewer"""
+
+    def __init__(self, interviewer, windows, buffer):
+        self.interviewer = interviewer
+        self.buffer = buffer
+        self._window_starts = []
+        self._window_ends = []
+        for start, end in sorted(windows):
+            if end <= start:
+                continue
+            if self._window_ends and start <= self._window_ends[-1]:
+                self._window_ends[-1] = max(end, self._window_ends[-1])
+            else:
+                self._window_starts.append(start)
+                self._window_ends.append(end)
+        # Disjoint booked intervals, each extended by the buffer, sorted by start
+        self._busy_starts = []
+        self._busy_ends = []
+        self._free_from = None  # Nothing is free before this time (set by searches without skipped days)
+
+    def book(self, start, end):
+        """Mark [start, end) as taken"""
+        end = end + self.buffer
+        # Merge with every booked interval that overlaps or touches the new one
+        first = bisect.bisect_left(self._busy_ends, start)
+        last = bisect.bisect_right(self._busy_starts, end)
+        if first < last:
+            start = min(start, self._busy_starts[first])
+            end = max(end, self._busy_ends[last - 1])
+        self._busy_starts[first:last] = [start]
+        self._busy_ends[first:last] = [end]
+
+    def next_free(self, after, length, skip_days=()):
+        """Earliest start of a free interval of length at or after after, on none of skip_days; None if there is none"""
+        hinted = not skip_days and (self._free_from is None or after <= self._free_from)
+        start = after if self._free_from is None else max(after, self._free_from)
+        window = bisect.bisect_right(self._window_ends, start)
+        while window < len(self._window_starts):
+            start = max(start, self._window_starts[window])
+            if start.date() in skip_days:
+                start = datetime.datetime.combine(start.date() + datetime.timedelta(days=1), datetime.time.min)
+                window = bisect.bisect_right(self._window_ends, start)
+                continue
+            end = start + length
+            if end > self._window_ends[window]:
+                window += 1
+                continue
+            busy = bisect.bisect_right(self._busy_ends, start)
+            if busy < len(self._busy_starts) and self._busy_starts[busy] < end + self.buffer:
+                start = self._busy_ends[busy]
+                continue
+            if hinted:
+                self._free_from = start
+            return start
+        return None
+
+class SlotAllocator:
+    """Hand out non-conflicting interview slots from the calendars of all interviewers"""
+
+    def __init__(self, windows, length_minutes=60, buffer_minutes=15, earliest=None):
+        self.length = datetime.timedelta(minutes=length_minutes)
+        self.buffer = datetime.timedelta(minutes=buffer_minutes)
+        self.earliest = earliest or datetime.datetime.now()
+        self.calendars = {interviewer: InterviewerCalendar(interviewer, interviewer_windows, self.buffer)
+                          for interviewer, interviewer_windows in windows.items()}
+        self._heap = None  # (next free time, interviewer), built on first use
+        self._lock = threading.Lock()
+
+    def book(self, slots):
+        """Mark slots offered earlier (e.g. stored invitations) as taken"""
+        with self._lock:
+            for slot in slots:
+                calendar = self.calendars.get(slot.interviewer)
+                if calendar is not None and slot.end > self.earliest:
+                    calendar.book(slot.start, slot.end)
+            self._heap = None
+
+    def allocate(self, count, num_slots):
+        """Slots for count candidates: a list of up to num_slots Slots per candidate, empty once the calendars are full"""
+        with self._lock:
+            if self._heap is None:
+                self._heap = [(start, interviewer) for interviewer, start in
+                              ((interviewer, calendar.next_free(self.earliest, self.length))
+                               for interviewer, calendar in self.calendars.items()) if start is not None]
+                heapq.heapify(self._heap)
+
+            allocated = []
+            while len(allocated) < count and self._heap:
+                start, interviewer = heapq.heappop(self._heap)
+                calendar = self.calendars[interviewer]
+                slots = []
+                days = set()
+                while start is not None:
+                    calendar.book(start, start + self.length)
+                    slots.append(Slot(interviewer, start, start + self.length))
+                    days.add(start.date())
+                    if len(slots) == num_slots:
+                        break
+                    start = calendar.next_free(self.earliest, self.length, days)
+                allocated.append(slots)
+
+                start = calendar.next_free(self.earliest, self.length)
+                if start is not None:
+                    heapq.heappush(self._heap, (start, interviewer))
+            return allocated + [[] for _ in range(count - len(allocated))]
@@ -0,0 +1,227 @@
+# File: watch_daemon.py
+# Long-running mode: watch resume and job description folders and screen new files as they arrive
+import os
+import argparse
+from config import Config
+from agents.jd_analyzer import JDAnalyzer
+from agents.cv_parser1 import CVParser, load_duplicate_index
+from agents.matcher import MatchingEngine
+from utils.document_processor import (extract_text_from_file, extract_document, compute_file_fingerprint,
+                                      compute_description_fingerprint)
+from utils.folder_watcher import FolderWatcher
+from utils.pipeline import Pipeline, Stage, PROCESS, ASYNC, DEFAULT_EXTRACT_WORKERS, DEFAULT_LLM_WORKERS
+from utils.near_duplicate import DEFAULT_SIMILARITY_THRESHOLD
+from utils import metrics
+from utils.llm_connector import configure_llm, close_llm
+from db.database import (setup_database, job_requirements_exist, find_job_requirements_by_description,
+                         get_known_candidate_ids, fingerprint_to_id, set_compact_storage,
+                         set_job_status, get_open_jobs)
+from db.writer import WriteBehindWriter
+from db.columnar import ColumnarCandidateStore
+
+WATCHED_EXTENSIONS = ('.pdf', '.docx', '.doc', '.txt', '.md')
+
+def main():
+    parser = argparse.ArgumentParser(description='Watch folders and screen new resumes and job descriptions as they arrive')
+    parser.add_argument('--cv_dir', type=str, required=True, help='Directory to watch for CV files')
+    parser.add_argument('--jd_dir', type=str, help='Directory to watch for job description files (each one is an open job)')
+    parser.add_argument('--company', type=str, default='Your Company', help='Company name for new jobs')
+    parser.add_argument('--threshold', type=float, default=Config.DEFAULT_THRESHOLD, help='Match threshold (0-100)')
+    parser.add_argument('--poll_interval', type=float, default=1.0, help='Seconds between folder scans while polling')
+    parser.add_argument('--settle', type=float, default=2.0,
+                        help='Seconds a file must stay unchanged before it is ingested')
+    parser.add_argument('--no_events', action='store_true',
+                        help='Always poll, even when watchdog is installed')
+    parser.add_argument('--once', action='store_true',
+                        help='Ingest the files present now, match them and exit')
+    parser.add_argument('--extract_workers', type=int, default=DEFAULT_EXTRACT_WORKERS,
+                        help='Processes extracting text from resume files')
+    parser.add_argument('--llm_workers', type=int, default=DEFAULT_LLM_WORKERS,
+                        help='Resumes being parsed at once; the adaptive LLM concurrency limit decides how many requests reach the server')
+    parser.add_argument('--compact_storage', action='store_true',
+                        help='Store profiles in the compact binary encoding and compress resume text')
+    parser.add_argument('--duplicate_threshold', type=float, default=DEFAULT_SIMILARITY_THRESHOLD,
+                        help='Similarity (0-1) above which a resume reuses an existing profile; 0 disables near-duplicate detection')
+    parser.add_argument('--llm_host', type=str, help='Ollama server URL (default: $OLLAMA_HOST or localhost:11434)')
+    parser.add_argument('--route_models', action='store_true',
+                        help='Pick the model per task and prompt size from Config.MODEL_ROUTES and recorded latency profiles')
+    parser.add_argument('--mock_llm', type=str, nargs='?', const='', metavar='SPEC',
+                        help='Answer LLM calls with a local mock server, e.g. "latency=uniform:0.1:0.5,error_rate=0.05"')
+    parser.add_argument('--metrics_file', type=str,
+                        help='Rewrite this Prometheus text file with timings and counters after every scan')
+
+    args = parser.parse_args()
+
+    print("Setting up database...")
+    setup_database()
+    set_compact_storage(args.compact_storage)
+
+    mock_llm = configure_llm(args)
+    writer = WriteBehindWriter()
+    daemon = ScreeningDaemon(args, writer)
+    try:
+        daemon.run()
+    except KeyboardInterrupt:
+        print("\nStopping...")
+    finally:
+        daemon.stop()
+        writer.close()
+        close_llm(mock_llm)
+        metrics.report(args.metrics_file)
+
+class ScreeningDaemon:
+    """Keeps agents, the DB writer and the candidate store warm between folder scans"""
+
+    def __init__(self, args, writer):
+        self.args = args
+        self.writer = writer
+        self.jd_agent = JDAnalyzer(writer=writer)
+        self.cv_agent = CVParser(writer=writer, duplicate_index=load_duplicate_index(args.duplicate_threshold))
+        self.candidate_store = ColumnarCandidateStore()
+        self.matching_agent = MatchingEngine(threshold=args.threshold, writer=writer,
+                                             candidate_store=self.candidate_store)
+
+        # With --once files are taken as they are, without waiting for them to settle
+        settle = 0 if args.once else args.settle
+        self.watcher = FolderWatcher([args.cv_dir, args.jd_dir], WATCHED_EXTENSIONS, settle,
+                                     args.poll_interval, not args.no_events)
+        self.jd_dir = os.path.abspath(args.jd_dir) if args.jd_dir else None
+        self.job_by_path = {}  # JD file -> job ID, to close the job when the file goes away
+
+    def run(self):
+        print("Loading candidates...")
+        self.candidate_store.load()
+        mode = "file system events" if self.watcher.uses_events else f"polling every {self.args.poll_interval}s"
+        print(f"Watching {self.args.cv_dir}" + (f" and {self.args.jd_dir}" if self.args.jd_dir else "") + f" ({mode})")
+
+        while True:
+            ready, removed = self.watcher.scan()
+            jd_ready = [path for path in ready if self._is_job_description(path)]
+            cv_ready = [path for path in ready if not self._is_job_description(path)]
+
+            self.close_jobs(removed)
+            new_job_ids = self.ingest_jobs(jd_ready)
+            new_candidate_ids = self.ingest_resumes(cv_ready)
+            self.match(new_job_ids, new_candidate_ids)
+            if self.args.metrics_file:
+                metrics.write_prometheus(self.args.metrics_file)
+
+            if self.args.once and not self.watcher.has_pending():
+                return
+            self.watcher.wait()
+
+    def stop(self):
+        self.watcher.stop()
+
+    def _is_job_description(self, path):
+        return self.jd_dir is not None and os.path.dirname(os.path.abspath(path)) == self.jd_dir
+
+    def close_jobs(self, paths):
+        """Close the jobs of JD files that were removed"""
+        for path in paths:
+            job_id = self.job_by_path.pop(path, None)
+            if job_id is not None:
+                self.writer.flush()
+                set_job_status(job_id, "closed")
+                print(f"Job description removed, closed its job: {path}")
+
+    def ingest_jobs(self, paths):
+        """Analyze new or changed JD files and open their jobs; returns the new job IDs"""
+        job_ids = []
+        for path in paths:
+            try:
+                jd_hash = compute_file_fingerprint(path)
+                job_id = fingerprint_to_id("job", jd_hash)
+
+                # A changed file is a new job, and replaces the job of its previous version
+                previous = self.job_by_path.get(path)
+                if previous is not None and previous != job_id:
+                    self.writer.flush()
+                    set_job_status(previous, "closed")
+                self.job_by_path[path] = job_id
+
+                if job_requirements_exist(job_id):
+                    job_ids.append(job_id)
+                    continue
+
+                print(f"New job description: {path}")
+                jd_text = extract_text_from_file(path)
+                description_hash = compute_description_fingerprint(jd_text)
+                job_title = os.path.splitext(os.path.basename(path))[0]
+                self.writer.submit("jobs", job_id, job_title, self.args.company, jd_text, jd_hash, description_hash)
+
+                source = find_job_requirements_by_description(description_hash)
+                if source is not None:
+                    self.jd_agent.reuse_requirements(job_id, source)
+                else:
+                    self.jd_agent.process_job(job_id, jd_text)
+                job_ids.append(job_id)
+            except Exception as e:
+                print(f"Error ingesting job description {path}: {e}")
+
+        if job_ids:
+            self.writer.flush()
+            open_jobs = get_open_jobs()
+            job_ids = [job_id for job_id in job_ids if job_id not in open_jobs]
+            set_job_status(job_ids, "open")
+        return job_ids
+
+    def ingest_resumes(self, paths):
+        """Parse and store new or changed resumes; returns their candidate IDs"""
+        if not paths:
+            return []
+
+        cv_hashes = {path: compute_file_fingerprint(path) for path in paths}
+        known_ids = get_known_candidate_ids(fingerprint_to_id("cand", h) for h in cv_hashes.values())
+
+        new_resumes = []
+        for path, cv_hash in cv_hashes.items():
+            candidate_id = fingerprint_to_id("cand", cv_hash)
+            if candidate_id not in known_ids:
+                known_ids.add(candidate_id)
+                new_resumes.append(((os.path.basename(path), candidate_id, cv_hash), path))
+        if not new_resumes:
+            return []
+
+        def parse(task):
+            (cv_filename, candidate_id, cv_hash), cv_text = task
+            print(f"New resume: {cv_filename}")
+            return (cv_hash, *self.cv_agent.parse_cv(candidate_id, cv_text))
+
+        def store(parsed):
+            cv_hash, candidate, duplicate_of, signature = parsed
+            self.cv_agent.store_cv(candidate, cv_hash, duplicate_of, signature)
+            print(f"  → Processed {candidate.name}'s resume with {len(candidate.skills)} skills")
+            return candidate.candidate_id
+
+        resume_pipeline = Pipeline([
+            Stage("extract", extract_document, self.args.extract_workers, PROCESS),
+            Stage("parse", parse, self.args.llm_workers, ASYNC),
+            Stage("store", store)
+        ])
+        return resume_pipeline.run(new_resumes)
+
+    def match(self, new_job_ids, new_candidate_ids):
+        """Match new jobs against every candidate, and new candidates against every open job"""
+        if not new_job_ids and not new_candidate_ids:
+            return
+
+        self.writer.flush()
+        self.candidate_store.refresh()
+
+        open_jobs = get_open_jobs()
+        for job_id, title in open_jobs.items():
+            if job_id in new_job_ids:
+                results = self.matching_agent.match_candidates(job_id)
+            elif new_candidate_ids:
+                results = self.matching_agent.match_candidates(job_id, new_candidate_ids)
+            else:
+                continue
+
+            shortlisted = [result for result in results if result.shortlisted]
+            print(f"{title}: {len(results)} candidates matched, {len(shortlisted)} shortlisted")
+            for result in shortlisted:
+                print(f"  ✓ {result.candidate_name}: {result.overall_score:.1f}% match")
+
+if __name__ == "__main__":
+    main()